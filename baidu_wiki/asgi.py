@@ -14,7 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'baidu_wiki.settings')
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
-from notifications import routing
+from baidu_wiki import routing
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
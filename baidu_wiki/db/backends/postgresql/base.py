@@ -0,0 +1,31 @@
+"""PostgreSQL backend that reuses connections from baidu_wiki.db.pool."""
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+from baidu_wiki.db.pool import PooledConnectionMixin
+
+if is_psycopg3:
+    from psycopg.pq import TransactionStatus
+    STATUS_IDLE, STATUS_UNKNOWN = TransactionStatus.IDLE, TransactionStatus.UNKNOWN
+else:
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE as STATUS_IDLE
+    from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN as STATUS_UNKNOWN
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+
+    def configure_pooled_connection(self, connection):
+        # base.get_new_connection() only sets this for freshly opened connections
+        level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = IsolationLevel(level) if level is not None else IsolationLevel.READ_COMMITTED
+
+    def reset_connection(self, connection):
+        if connection.closed:
+            return False
+        status = connection.info.transaction_status
+        if status == STATUS_UNKNOWN:
+            return False
+        if status != STATUS_IDLE:
+            connection.rollback()
+        return True
@@ -0,0 +1,23 @@
+"""
+SQLite backend that reuses connections from baidu_wiki.db.pool.
+
+Mainly useful to exercise the pool locally; in-memory databases are never
+pooled because each connection is a separate database.
+"""
+
+from django.db.backends.sqlite3 import base
+
+from baidu_wiki.db.pool import PooledConnectionMixin
+
+
+class DatabaseWrapper(PooledConnectionMixin, base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        if self.is_in_memory_db():
+            return super(PooledConnectionMixin, self).get_new_connection(conn_params)
+        return super().get_new_connection(conn_params)
+
+    def reset_connection(self, connection):
+        if connection.in_transaction:
+            connection.rollback()
+        return True
@@ -0,0 +1,196 @@
+"""
+Process-wide pool of raw DB-API connections shared by all threads.
+
+Django keeps one connection object per thread (per request context under
+ASGI), so persistent connections (CONN_MAX_AGE) pile up under daphne, where
+every request runs its sync code in a fresh context. The pooled backends in
+baidu_wiki.db.backends instead hand the raw connection back here when Django
+closes it at the end of a request. The next request, on any thread, reuses
+it without reconnecting.
+
+Configure per database with a POOL entry:
+
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': 20,       # connections open at once
+        'TIMEOUT': 10,        # seconds to wait for a free connection
+        'MAX_IDLE': 300,      # close connections idle longer than this
+        'MAX_LIFETIME': 3600, # recycle connections older than this
+    }
+"""
+
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+DEFAULTS = {
+    'MAX_SIZE': 20,
+    'TIMEOUT': 10.0,
+    'MAX_IDLE': 300.0,
+    'MAX_LIFETIME': 3600.0,
+}
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Bounded LIFO pool; the most recently used connection is handed out first."""
+
+    def __init__(self, alias, max_size=20, timeout=10.0, max_idle=300.0, max_lifetime=3600.0):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        # (connection, created_at, returned_at)
+        self._idle = deque()
+        self._created = {}
+        self.stats = {
+            'created': 0, 'reused': 0, 'returned': 0, 'discarded': 0,
+            'expired': 0, 'waits': 0, 'wait_ms': 0.0, 'timeouts': 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def acquire(self, connect):
+        """Return an idle connection, or call connect() to open a new one."""
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            if not self._slots.acquire(timeout=self.timeout):
+                self._count('timeouts')
+                raise PoolTimeout(
+                    f"No free connection for '{self.alias}' within {self.timeout}s "
+                    f"(pool size {self.max_size})."
+                )
+            with self._lock:
+                self.stats['waits'] += 1
+                self.stats['wait_ms'] += (time.monotonic() - started) * 1000
+
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, created_at, returned_at = self._idle.pop()
+                now = time.monotonic()
+                if now - returned_at > self.max_idle or now - created_at > self.max_lifetime:
+                    self._count('expired')
+                    self._close(connection)
+                    continue
+                with self._lock:
+                    self._created[id(connection)] = created_at
+                    self.stats['reused'] += 1
+                return connection
+
+            connection = connect()
+            with self._lock:
+                self._created[id(connection)] = time.monotonic()
+                self.stats['created'] += 1
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection, reusable=True):
+        """Give a connection back; unusable ones are closed instead of pooled."""
+        try:
+            with self._lock:
+                created_at = self._created.pop(id(connection), time.monotonic())
+            if reusable and time.monotonic() - created_at <= self.max_lifetime:
+                with self._lock:
+                    self._idle.append((connection, created_at, time.monotonic()))
+                    self.stats['returned'] += 1
+            else:
+                self._count('discarded')
+                self._close(connection)
+        finally:
+            self._slots.release()
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection, created_at, returned_at in idle:
+            self._close(connection)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(
+                self.stats,
+                wait_ms=round(self.stats['wait_ms'], 3),
+                idle=len(self._idle),
+                in_use=len(self._created),
+                max_size=self.max_size,
+            )
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                options = dict(DEFAULTS, **settings_dict.get('POOL', {}))
+                pool = _pools[alias] = ConnectionPool(
+                    alias,
+                    max_size=int(options['MAX_SIZE']),
+                    timeout=float(options['TIMEOUT']),
+                    max_idle=float(options['MAX_IDLE']),
+                    max_lifetime=float(options['MAX_LIFETIME']),
+                )
+    return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.snapshot() for alias, pool in pools.items()}
+
+
+class PooledConnectionMixin:
+    """
+    DatabaseWrapper mixin that borrows raw connections from the alias' pool.
+
+    Backends implement reset_connection(connection) to return a connection
+    to a clean state, returning False when it should be discarded.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire(lambda: super(PooledConnectionMixin, self).get_new_connection(conn_params))
+        self.configure_pooled_connection(connection)
+        return connection
+
+    def configure_pooled_connection(self, connection):
+        pass
+
+    def _close(self):
+        if self.connection is None:
+            return
+        try:
+            reusable = not (self.errors_occurred and not self.is_usable()) and self.reset_connection(self.connection)
+        except Exception:
+            reusable = False
+        self.pool.release(self.connection, reusable=reusable)
+
+    def reset_connection(self, connection):
+        raise NotImplementedError
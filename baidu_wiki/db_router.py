@@ -0,0 +1,203 @@
+"""
+Primary/replica database routing.
+
+Reads go to a healthy replica from DATABASE_REPLICAS and writes go to
+`default`. ReplicaRoutingMiddleware pins a request to the primary when:
+
+* the request is a write (POST/PUT/PATCH/DELETE)
+* the client wrote within the last REPLICA_STICKY_SECONDS, so people see
+  their own comment right after posting it (read-your-writes)
+* the code runs inside an atomic block on the primary, or inside
+  `use_primary()`
+
+Replicas are health-checked at most once every REPLICA_HEALTH_CHECK_INTERVAL
+seconds per process. A replica that fails to connect, or that lags more
+than REPLICA_MAX_LAG seconds behind, is skipped until its next check. When
+no replica is usable, reads fall back to the primary.
+
+Locally, replicas can be SQLite copies of the primary refreshed by
+`manage.py sync_replicas`, which also stamps the copy time used as the lag.
+"""
+
+import contextvars
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+STICKY_KEY = 'db:sticky:{}'
+HEARTBEAT_TABLE = 'replica_heartbeat'
+
+_pinned = contextvars.ContextVar('db_pinned_to_primary', default=False)
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextmanager
+def use_primary():
+    """Route every read in the block to the primary."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def replication_lag(alias):
+    """
+    Seconds the replica is behind the primary, or None if unknown.
+
+    PostgreSQL reports its replay timestamp. SQLite stand-ins carry the time
+    of their last sync in a heartbeat table.
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT EXTRACT(EPOCH FROM (now() - pg_last_xact_replay_timestamp()))'
+            )
+            row = cursor.fetchone()
+            return float(row[0]) if row and row[0] is not None else 0.0
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(f'SELECT MAX(synced_at) FROM {HEARTBEAT_TABLE}')
+            except DatabaseError:
+                return None
+            row = cursor.fetchone()
+            return time.time() - row[0] if row and row[0] is not None else None
+        cursor.execute('SELECT 1')
+    return None
+
+
+class ReplicaHealth:
+    """Per-process cache of replica health and lag."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+
+    def check(self, alias):
+        try:
+            lag = replication_lag(alias)
+        except Exception as exc:
+            logger.warning('Replica %s is unavailable: %s', alias, exc)
+            return {'healthy': False, 'lag': None, 'error': str(exc)}
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG', 5)
+        healthy = lag is None or lag <= max_lag
+        if not healthy:
+            logger.warning('Replica %s is %.1fs behind (max %ss)', alias, lag, max_lag)
+        return {'healthy': healthy, 'lag': lag, 'error': None}
+
+    def get(self, alias):
+        interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 5)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(alias)
+            if state is not None and now - state['checked_at'] < interval:
+                return state
+        state = dict(self.check(alias), checked_at=now)
+        with self._lock:
+            self._state[alias] = state
+        return state
+
+    def healthy_replicas(self):
+        return [alias for alias in get_replicas() if self.get(alias)['healthy']]
+
+    def snapshot(self):
+        with self._lock:
+            return {alias: dict(state) for alias, state in self._state.items()}
+
+    def reset(self):
+        with self._lock:
+            self._state.clear()
+
+
+health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    """Send reads to a healthy replica unless the request is pinned to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if _pinned.get() or connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        replicas = health.healthy_replicas()
+        if not replicas:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive their schema from the primary
+        if db in get_replicas():
+            return False
+        return None
+
+
+def client_identity(request):
+    """Stable key for the client making the request, without touching the database."""
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return hashlib.sha1(credential.encode()).hexdigest()
+
+
+def issued_identities(response):
+    """
+    Identities for credentials handed out by a login or registration response.
+
+    The new user and token may not have reached the replicas yet, so the
+    client's next requests have to be pinned as well.
+    """
+    cookie = response.cookies.get(settings.SESSION_COOKIE_NAME)
+    if cookie is not None and cookie.value:
+        yield hashlib.sha1(cookie.value.encode()).hexdigest()
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict) and isinstance(data.get('token'), str):
+        yield hashlib.sha1(f"Token {data['token']}".encode()).hexdigest()
+
+
+class ReplicaRoutingMiddleware:
+    """Pin writes, and reads shortly after a client's writes, to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        identity = client_identity(request)
+        is_write = request.method not in SAFE_METHODS
+        pinned = is_write or (
+            identity is not None and get_replicas() and cache.get(STICKY_KEY.format(identity))
+        )
+
+        token = _pinned.set(bool(pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if is_write and get_replicas() and response.status_code < 400:
+            ttl = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+            for key in {identity, *issued_identities(response)} - {None}:
+                cache.set(STICKY_KEY.format(key), 1, ttl)
+        return response
@@ -0,0 +1,278 @@
+"""
+Per-endpoint request instrumentation.
+
+QueryInstrumentationMiddleware records, for every request, the number of SQL
+queries, total database time, response serialization time (time spent in the
+DRF renderer), total latency and response size, and aggregates them into
+fixed-bucket histograms keyed by the resolved URL name. The aggregates are
+kept in process memory and exposed to staff at /api/metrics/ together with
+database connection churn.
+
+Views may declare query budgets per action:
+
+    class PostViewSet(viewsets.ModelViewSet):
+        query_budgets = {'list': 6, 'retrieve': 8}
+
+QUERY_BUDGETS in settings (keyed by URL name) overrides the declared values.
+Requests over budget are logged and counted; baidu_wiki.testing turns them
+into test failures.
+"""
+
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+QUERY_BUCKETS = [0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233]
+SIZE_BUCKETS = [256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304]
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram with count, sum, min and max."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        """Upper bound of the bucket containing the q-th percentile."""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self):
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'buckets': {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class EndpointStats:
+    """Aggregated metrics for one URL name."""
+
+    def __init__(self):
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.db_time_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.serialization_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.status_codes = {}
+        self.over_budget = 0
+
+    def as_dict(self):
+        return {
+            'requests': self.latency_ms.count,
+            'over_budget': self.over_budget,
+            'status_codes': dict(self.status_codes),
+            'latency_ms': self.latency_ms.as_dict(),
+            'db_time_ms': self.db_time_ms.as_dict(),
+            'serialization_ms': self.serialization_ms.as_dict(),
+            'queries': self.queries.as_dict(),
+            'response_bytes': self.response_bytes.as_dict(),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe mapping of URL name to EndpointStats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, name, metrics, latency_ms, status_code, size, over_budget):
+        with self._lock:
+            stats = self._endpoints.get(name)
+            if stats is None:
+                stats = self._endpoints[name] = EndpointStats()
+            stats.latency_ms.observe(latency_ms)
+            stats.db_time_ms.observe(metrics.db_time_ms)
+            stats.serialization_ms.observe(metrics.serialization_ms)
+            stats.queries.observe(metrics.queries)
+            if size is not None:
+                stats.response_bytes.observe(size)
+            stats.status_codes[status_code] = stats.status_codes.get(status_code, 0) + 1
+            if over_budget:
+                stats.over_budget += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in sorted(self._endpoints.items())}
+
+    def total_requests(self):
+        with self._lock:
+            return sum(stats.latency_ms.count for stats in self._endpoints.values())
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = MetricsRegistry()
+
+
+class ConnectionStats:
+    """
+    Count database connects per alias.
+
+    connection_created fires whenever Django (re)connects, including when a
+    pooled backend hands out an existing connection. The pool's own stats
+    tell how many of those were real new connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = {}
+
+    def __call__(self, sender, connection, **kwargs):
+        with self._lock:
+            self.connects[connection.alias] = self.connects.get(connection.alias, 0) + 1
+
+    def snapshot(self, requests):
+        with self._lock:
+            connects = dict(self.connects)
+        return {
+            'connects': connects,
+            'connects_per_request': {
+                alias: round(count / requests, 3) for alias, count in connects.items()
+            } if requests else {},
+        }
+
+    def reset(self):
+        with self._lock:
+            self.connects.clear()
+
+
+connection_stats = ConnectionStats()
+connection_created.connect(connection_stats, dispatch_uid='baidu_wiki.instrumentation.connection_stats')
+
+
+class RequestMetrics:
+    """Counters accumulated while a single request is being handled."""
+
+    __slots__ = ('queries', 'db_time_ms', 'serialization_ms')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time_ms = 0.0
+        self.serialization_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time_ms += (time.perf_counter() - started) * 1000
+
+
+def get_url_name(request):
+    """Return the namespaced URL name of the matched route, or its pattern."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match.route
+
+
+def get_query_budget(request):
+    """Return the query budget for the matched view and action, if any."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+
+    overrides = getattr(settings, 'QUERY_BUDGETS', {})
+    if match.view_name in overrides:
+        return overrides[match.view_name]
+
+    view_class = getattr(match.func, 'cls', None)
+    budgets = getattr(view_class, 'query_budgets', None)
+    if not budgets:
+        return None
+    # Viewsets map HTTP methods to actions; plain APIViews use the method name
+    actions = getattr(match.func, 'actions', None) or {}
+    method = request.method.lower()
+    return budgets.get(actions.get(method, method))
+
+
+class QueryInstrumentationMiddleware:
+    """Record query count, DB time, serialization time and size per endpoint."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        budget = get_query_budget(request)
+        over_budget = budget is not None and metrics.queries > budget
+        name = get_url_name(request)
+        if over_budget:
+            logger.warning('%s %s ran %d queries (budget %d)',
+                           request.method, name, metrics.queries, budget)
+
+        size = None if response.streaming else len(response.content)
+        registry.record(name, metrics, latency_ms, response.status_code, size, over_budget)
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(metrics.queries)
+            response['X-DB-Time-Ms'] = f"{metrics.db_time_ms:.2f}"
+        return response
+
+
+class InstrumentedJSONRenderer(JSONRenderer):
+    """JSONRenderer that reports its render time to the current request metrics."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.serialization_ms += (time.perf_counter() - started) * 1000
+
@@ -0,0 +1,62 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from baidu_wiki.db_router import HEARTBEAT_TABLE, PRIMARY, get_replicas
+
+
+def sync_sqlite_replica(primary_path, replica_path):
+    """Copy the primary into the replica file and stamp the copy time."""
+    source = sqlite3.connect(str(primary_path))
+    target = sqlite3.connect(str(replica_path))
+    try:
+        source.backup(target)
+        target.execute(f'CREATE TABLE IF NOT EXISTS {HEARTBEAT_TABLE} (synced_at REAL NOT NULL)')
+        target.execute(f'DELETE FROM {HEARTBEAT_TABLE}')
+        target.execute(f'INSERT INTO {HEARTBEAT_TABLE} (synced_at) VALUES (?)', (time.time(),))
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+
+
+class Command(BaseCommand):
+    """
+    Refresh SQLite replica stand-ins from the SQLite primary.
+
+    Each sync is a full online backup, so between runs the replicas serve
+    stale data exactly like a lagging replica would. With --interval the
+    command keeps syncing, and the interval becomes the replication lag.
+    """
+
+    help = 'Copy the SQLite primary into the SQLite replica databases.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='Replica aliases (default: all in DATABASE_REPLICAS).')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep syncing every N seconds until interrupted.')
+
+    def handle(self, *args, **options):
+        primary = connections[PRIMARY].settings_dict
+        if connections[PRIMARY].vendor != 'sqlite':
+            raise CommandError('sync_replicas only works with a SQLite primary; use real replication otherwise.')
+
+        aliases = options['aliases'] or get_replicas()
+        if not aliases:
+            raise CommandError('No replicas configured, set DATABASE_REPLICAS.')
+        for alias in aliases:
+            if alias not in get_replicas():
+                raise CommandError(f"'{alias}' is not a configured replica.")
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f"Replica '{alias}' is not a SQLite database.")
+
+        while True:
+            for alias in aliases:
+                started = time.perf_counter()
+                sync_sqlite_replica(primary['NAME'], connections[alias].settings_dict['NAME'])
+                self.stdout.write(f"Synced {alias} in {(time.perf_counter() - started) * 1000:.0f} ms")
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
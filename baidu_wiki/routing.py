@@ -0,0 +1,14 @@
+"""
+WebSocket routes for the project.
+
+Apps that add consumers append their patterns here so asgi.py has a single
+place to import from.
+"""
+
+from django.urls import path
+
+from messaging.consumers import MessageConsumer
+
+websocket_urlpatterns = [
+    path('ws/messages/', MessageConsumer.as_asgi()),
+]
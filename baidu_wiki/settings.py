@@ -41,10 +41,15 @@ INSTALLED_APPS = [
     'users',
     'wiki',
     'posts',
+    'tieba',
     'search',
+    'messaging',
+    'baidu_wiki',
 ]
 
 MIDDLEWARE = [
+    'baidu_wiki.instrumentation.QueryInstrumentationMiddleware',
+    'baidu_wiki.db_router.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -52,6 +57,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.activity.LastActiveMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -78,13 +84,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'baidu_wiki.wsgi.application'
 ASGI_APPLICATION = 'baidu_wiki.asgi.application'
 
-# Database
-DATABASES = {
-    'default': {
+# Database. SQLite unless DB_ENGINE=postgresql
+DB_ENGINE = config('DB_ENGINE', default='sqlite3')
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='baidu_wiki'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+
+# Read replicas. Locally, list SQLite files that stand in for replicas, e.g.
+# DATABASE_REPLICA_FILES=replica1.sqlite3,replica2.sqlite3, and refresh them
+# with `manage.py sync_replicas`. Tests mirror them onto the primary.
+REPLICA_FILES = config('DATABASE_REPLICA_FILES', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+for index, name in enumerate(REPLICA_FILES, 1):
+    DATABASES[f'replica{index}'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': BASE_DIR / name,
+        'TEST': {'MIRROR': 'default'},
     }
-}
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+# Connection reuse. Under gunicorn (WSGI) each worker thread keeps its
+# connection for DB_CONN_MAX_AGE seconds. Under daphne (ASGI) every request
+# runs in a new thread context, so persistent connections are never reused
+# and only pile up; set DB_POOL=True there to share a process-wide pool of at
+# most DB_POOL_MAX_SIZE connections per database instead.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = True
+    if DB_POOL:
+        database['ENGINE'] = database['ENGINE'].replace('django.db.backends.', 'baidu_wiki.db.backends.')
+        # The pool owns connection lifetime; Django closes (returns) after each request
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=20, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=float),
+        }
+DATABASE_ROUTERS = ['baidu_wiki.db_router.PrimaryReplicaRouter']
+
+# Seconds a client keeps reading from the primary after a write
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=10, cast=int)
+# Replicas further behind than this are skipped
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=5, cast=float)
+REPLICA_HEALTH_CHECK_INTERVAL = 5
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -133,13 +191,34 @@ SITE_ID = 1
 
 # REST Framework
 REST_FRAMEWORK = {
+    # Token first, so requests carrying a token never load the session
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # Views opt in with throttle_scopes; see baidu_wiki/throttling.py
+    'DEFAULT_THROTTLE_CLASSES': [
+        'baidu_wiki.throttling.UserRateThrottle',
+        'baidu_wiki.throttling.IPRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'like': '60/min',
+        'like_ip': '600/min',
+        'comment': '10/min',
+        'comment_ip': '120/min',
+        'report': '20/hour',
+        'follow': '60/min',
+        'follow_ip': '600/min',
+        'register': '5/hour',
+        'tieba': '5/day',
+        'checkin': '60/min',
+        'checkin_ip': '600/min',
+        'message': '30/min',
+        'message_ip': '300/min',
+    },
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_FILTER_BACKENDS': [
@@ -147,8 +226,99 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'baidu_wiki.instrumentation.InstrumentedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Token lookups are cached for TOKEN_CACHE_TTL seconds in the shared cache and
+# TOKEN_LOCAL_CACHE_TTL seconds per process; see users/authentication.py
+TOKEN_CACHE_TTL = 300
+TOKEN_LOCAL_CACHE_TTL = 5
+TOKEN_LOCAL_CACHE_SIZE = 10000
+
+# last_active is written at most once per LAST_ACTIVE_INTERVAL seconds per
+# user, in batches every LAST_ACTIVE_FLUSH_INTERVAL seconds; see users/activity.py
+LAST_ACTIVE_INTERVAL = 60
+LAST_ACTIVE_FLUSH_INTERVAL = 10
+
+# Reported content is hidden once its moderation score (report severity
+# weighted by reporter reputation, each reporter counted once) reaches
+# MODERATION_AUTO_HIDE_SCORE and at least MODERATION_AUTO_HIDE_REPORTERS
+# distinct users reported it; see posts/moderation.py
+MODERATION_AUTO_HIDE_SCORE = 12.0
+MODERATION_AUTO_HIDE_REPORTERS = 3
+
+# Near-duplicate posts and comments (estimated Jaccard similarity of
+# character shingles at or above DEDUP_THRESHOLD, within the last
+# DEDUP_WINDOW_HOURS) are saved unapproved ('flag') or refused ('reject');
+# see posts/dedup.py
+DEDUP_ACTION = 'flag'
+DEDUP_THRESHOLD = 0.7
+DEDUP_WINDOW_HOURS = 72
+DEDUP_MIN_LENGTH = 20
+
+# Each worker checks the shared cache this often (seconds) for changes to
+# the sensitive word list and rebuilds its automaton; see posts/wordfilter.py
+WORD_FILTER_RELOAD_INTERVAL = 10
+
+# Seconds a user's list of joined forums (and so their forum roles) is
+# cached; membership changes invalidate it. See tieba/membership.py.
+TIEBA_JOINED_CACHE_TTL = 60 * 60
+
+# Hot replies (神回复) above a thread: its HOT_REPLIES_COUNT most liked
+# comments with at least HOT_REPLIES_MIN_LIKES likes, read from a per-post
+# sorted set of HOT_REPLIES_CANDIDATES that is rebuilt from the database
+# every HOT_REPLIES_TTL seconds. See posts/hotreplies.py.
+HOT_REPLIES_COUNT = 3
+HOT_REPLIES_CANDIDATES = 20
+HOT_REPLIES_MIN_LIKES = 3
+HOT_REPLIES_TTL = 60 * 60
+
+# Reputation earned per article, edit, post and comment written and per
+# like they receive, and the reputation each level starts at (level 1 at
+# REPUTATION_LEVELS[0], level 2 at [1], ...). See users/reputation.py.
+REPUTATION_POINTS = {
+    'article': 10,
+    'edit': 2,
+    'post': 5,
+    'comment': 1,
+    'article_like': 5,
+    'post_like': 2,
+    'comment_like': 1,
+}
+REPUTATION_LEVELS = [0, 50, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000]
+# Seconds to merge reputation changes per user before writing them in
+# batches; 0 writes each change in the transaction that caused it
+REPUTATION_FLUSH_INTERVAL = 0
+
+# Contributor leaderboards for today, this week and all time. A day or
+# week board is kept LEADERBOARD_GRACE_DAYS after it ends, so the one that
+# just closed can still be shown; see users/leaderboards.py.
+LEADERBOARD_GRACE_DAYS = 1
+LEADERBOARD_PAGE_SIZE = 20
+LEADERBOARD_MAX_PAGE_SIZE = 100
+
+# Recent searches (搜索历史): each user's SEARCH_HISTORY_SIZE latest distinct
+# queries, kept in the cache and saved to the database in the background
+# every SEARCH_HISTORY_PERSIST_INTERVAL seconds; see search/history.py
+SEARCH_HISTORY_SIZE = 20
+SEARCH_HISTORY_PERSIST_INTERVAL = 30
+SEARCH_HISTORY_CACHE_TTL = 7 * 24 * 60 * 60
+# History entries shown above the autocomplete suggestions
+SEARCH_HISTORY_SUGGESTIONS = 3
+
+# Search hits show up to SEARCH_SNIPPET_FRAGMENTS highlighted fragments of
+# at most SEARCH_SNIPPET_LENGTH characters instead of their whole content;
+# see search/snippets.py
+SEARCH_SNIPPET_LENGTH = 120
+SEARCH_SNIPPET_FRAGMENTS = 2
+
+# Per-endpoint SQL query budgets, keyed by URL name. These override the
+# query_budgets declared on views; see baidu_wiki/instrumentation.py.
+QUERY_BUDGETS = {}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
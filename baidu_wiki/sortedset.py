@@ -0,0 +1,302 @@
+"""
+Sorted sets for rankings kept up to date incrementally.
+
+With django-redis as the default cache the sets are Redis ZSETs: an
+update or rank lookup is O(log N) on the server and every worker sees the
+same ranking. With any other cache, or while Redis is unreachable, each
+process keeps its own sets in memory instead, so callers must be able to
+rebuild a set from the database when it reads as missing.
+
+A set can be capped with `limit`: only the `limit` highest members are
+kept, so a top-K set stays K long however much data is behind it. A set
+can also be given a `ttl` in seconds; once it expires it reads as missing
+and the caller rebuilds it, which is how drift gets reconciled.
+
+Members are strings (ids are converted by the caller); scores are floats.
+Rankings run from the highest score down.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'zset:'
+
+
+class LocalSortedSet:
+    """Scores by member, plus (-score, member) pairs kept sorted with bisect."""
+
+    def __init__(self):
+        self.scores = {}
+        self.order = []
+        self.expires_at = None
+
+    def set(self, member, score):
+        old = self.scores.get(member)
+        if old is not None:
+            del self.order[bisect.bisect_left(self.order, (-old, member))]
+        self.scores[member] = score
+        bisect.insort(self.order, (-score, member))
+
+    def discard(self, member):
+        old = self.scores.pop(member, None)
+        if old is not None:
+            del self.order[bisect.bisect_left(self.order, (-old, member))]
+
+    def trim(self, limit):
+        while len(self.order) > limit:
+            _, member = self.order.pop()
+            del self.scores[member]
+
+
+class LocalSortedSets:
+    """In-process sorted sets, bounded to the `max_keys` most recently used keys."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._sets = OrderedDict()
+
+    def _get(self, key, create=False):
+        zset = self._sets.get(key)
+        if zset is not None and zset.expires_at is not None and zset.expires_at <= time.monotonic():
+            del self._sets[key]
+            zset = None
+        if zset is None and create:
+            zset = self._sets[key] = LocalSortedSet()
+            if len(self._sets) > self.max_keys:
+                self._sets.popitem(last=False)
+        if zset is not None:
+            self._sets.move_to_end(key)
+        return zset
+
+    def _finish(self, zset, limit, ttl):
+        if limit is not None:
+            zset.trim(limit)
+        if ttl is not None:
+            zset.expires_at = time.monotonic() + ttl
+
+    def exists(self, key):
+        with self._lock:
+            return self._get(key) is not None
+
+    def add(self, key, scores, limit=None, ttl=None):
+        with self._lock:
+            zset = self._get(key, create=True)
+            for member, score in scores.items():
+                zset.set(member, float(score))
+            self._finish(zset, limit, ttl)
+
+    def replace(self, key, scores, limit=None, ttl=None):
+        with self._lock:
+            self._sets.pop(key, None)
+            zset = self._get(key, create=True)
+            for member, score in scores.items():
+                zset.set(member, float(score))
+            self._finish(zset, limit, ttl)
+
+    def incr(self, key, member, amount, limit=None, ttl=None):
+        with self._lock:
+            zset = self._get(key, create=True)
+            score = zset.scores.get(member, 0.0) + amount
+            zset.set(member, score)
+            self._finish(zset, limit, ttl)
+        return score
+
+    def incr_many(self, increments):
+        for key, member, amount, ttl in increments:
+            self.incr(key, member, amount, ttl=ttl)
+
+    def remove(self, key, *members):
+        with self._lock:
+            zset = self._get(key)
+            if zset is not None:
+                for member in members:
+                    zset.discard(member)
+
+    def top(self, key, count, offset=0):
+        with self._lock:
+            zset = self._get(key)
+            if zset is None:
+                return []
+            return [(member, -score) for score, member in zset.order[offset:offset + count]]
+
+    def rank(self, key, member):
+        with self._lock:
+            zset = self._get(key)
+            if zset is None or member not in zset.scores:
+                return None
+            return bisect.bisect_left(zset.order, (-zset.scores[member], member))
+
+    def score(self, key, member):
+        with self._lock:
+            zset = self._get(key)
+            return zset.scores.get(member) if zset is not None else None
+
+    def count(self, key):
+        with self._lock:
+            zset = self._get(key)
+            return len(zset.order) if zset is not None else 0
+
+    def delete(self, key):
+        with self._lock:
+            self._sets.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
+
+
+class RedisSortedSets:
+    """The same operations on Redis ZSETs; writes go in one MULTI/EXEC."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def _finish(self, pipe, key, limit, ttl):
+        if limit is not None:
+            pipe.zremrangebyrank(key, 0, -limit - 1)
+        if ttl is not None:
+            pipe.expire(key, int(ttl))
+
+    def exists(self, key):
+        return bool(self.client.exists(key))
+
+    def add(self, key, scores, limit=None, ttl=None):
+        if not scores:
+            return
+        pipe = self.client.pipeline()
+        pipe.zadd(key, scores)
+        self._finish(pipe, key, limit, ttl)
+        pipe.execute()
+
+    def replace(self, key, scores, limit=None, ttl=None):
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        if scores:
+            pipe.zadd(key, scores)
+            self._finish(pipe, key, limit, ttl)
+        pipe.execute()
+
+    def incr(self, key, member, amount, limit=None, ttl=None):
+        pipe = self.client.pipeline()
+        pipe.zincrby(key, amount, member)
+        self._finish(pipe, key, limit, ttl)
+        return float(pipe.execute()[0])
+
+    def incr_many(self, increments):
+        pipe = self.client.pipeline(transaction=False)
+        for key, member, amount, ttl in increments:
+            pipe.zincrby(key, amount, member)
+            if ttl is not None:
+                pipe.expire(key, int(ttl))
+        pipe.execute()
+
+    def remove(self, key, *members):
+        if members:
+            self.client.zrem(key, *members)
+
+    def top(self, key, count, offset=0):
+        rows = self.client.zrevrange(key, offset, offset + count - 1, withscores=True)
+        return [(member.decode(), score) for member, score in rows]
+
+    def rank(self, key, member):
+        return self.client.zrevrank(key, member)
+
+    def score(self, key, member):
+        return self.client.zscore(key, member)
+
+    def count(self, key):
+        return self.client.zcard(key)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class SortedSets:
+    """Use Redis sorted sets, falling back to local ones when Redis fails."""
+
+    retry_after = 30
+
+    def __init__(self):
+        self.local = LocalSortedSets()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._resolved = False
+
+    @property
+    def redis(self):
+        if not self._resolved:
+            self._resolved = True
+            backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            if backend.startswith('django_redis.'):
+                from django_redis import get_redis_connection
+                self._redis = RedisSortedSets(get_redis_connection('default'))
+        return self._redis
+
+    def _call(self, operation, key, *args, **kwargs):
+        if self.redis is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return getattr(self.redis, operation)(KEY_PREFIX + key, *args, **kwargs)
+            except Exception as exc:
+                logger.warning('Sorted sets fall back to local memory: %s', exc)
+                self._redis_down_until = time.monotonic() + self.retry_after
+        return getattr(self.local, operation)(key, *args, **kwargs)
+
+    def exists(self, key):
+        return self._call('exists', key)
+
+    def add(self, key, scores, limit=None, ttl=None):
+        """Set the scores of {member: score}, keeping the `limit` highest."""
+        return self._call('add', key, scores, limit=limit, ttl=ttl)
+
+    def replace(self, key, scores, limit=None, ttl=None):
+        """Swap the whole set for {member: score}, e.g. when rebuilding it."""
+        return self._call('replace', key, scores, limit=limit, ttl=ttl)
+
+    def incr(self, key, member, amount=1, limit=None, ttl=None):
+        """Add `amount` to a member's score (from 0) and return the new score."""
+        return self._call('incr', key, member, amount, limit=limit, ttl=ttl)
+
+    def incr_many(self, increments):
+        """Apply [(key, member, amount, ttl)] in one round trip."""
+        if not increments:
+            return
+        if self.redis is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return self.redis.incr_many(
+                    [(KEY_PREFIX + key, member, amount, ttl) for key, member, amount, ttl in increments]
+                )
+            except Exception as exc:
+                logger.warning('Sorted sets fall back to local memory: %s', exc)
+                self._redis_down_until = time.monotonic() + self.retry_after
+        return self.local.incr_many(increments)
+
+    def remove(self, key, *members):
+        return self._call('remove', key, *members)
+
+    def top(self, key, count, offset=0):
+        """[(member, score)] from the highest score down."""
+        return self._call('top', key, count, offset)
+
+    def rank(self, key, member):
+        """0-based position from the top, or None when absent."""
+        return self._call('rank', key, member)
+
+    def score(self, key, member):
+        return self._call('score', key, member)
+
+    def count(self, key):
+        return self._call('count', key)
+
+    def delete(self, key):
+        return self._call('delete', key)
+
+
+sorted_sets = SortedSets()
@@ -0,0 +1,111 @@
+"""
+Test helpers for keeping endpoint query counts within budget.
+
+    from baidu_wiki.testing import QueryBudgetTestCase, assert_query_budget, rows_over_budget
+
+    class PostQueryBudgetTests(QueryBudgetTestCase):
+        rows = rows_over_budget(PostViewSet)
+
+        def test_post_list_queries(self):
+            assert_query_budget(self.client, 'get', '/api/posts/posts/')
+
+The budget comes from the view's query_budgets (or QUERY_BUDGETS in settings)
+unless one is passed explicitly; exceeding it fails the test with the list of
+executed queries so the N+1 is easy to spot. A fixture with `rows` rows per
+listing cannot hide a query per row inside the budget.
+
+QueryBudgetTestCase runs against a local memory cache (TEST_CACHES), so the
+tests need no Redis.
+"""
+
+from contextlib import ExitStack, contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from users.activity import tracker
+
+from .instrumentation import get_query_budget
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _format_failure(label, budget, queries):
+    lines = [f"{label} ran {len(queries)} queries, budget is {budget}:"]
+    lines.extend(f"  {i}. [{query['alias']}] {query['sql']}" for i, query in enumerate(queries, 1))
+    return '\n'.join(lines)
+
+
+@contextmanager
+def query_budget(budget, label='Block'):
+    """
+    Fail if the enclosed block runs more than budget queries.
+
+    Queries are captured on every alias in connections, so reads the router
+    sends to a replica count against the budget like those on the primary.
+    """
+    captured = []
+    with ExitStack() as stack:
+        contexts = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections}
+        yield captured
+    for alias, context in contexts.items():
+        captured.extend({**query, 'alias': alias} for query in context.captured_queries)
+    if len(captured) > budget:
+        raise QueryBudgetExceeded(_format_failure(label, budget, captured))
+
+
+def assert_query_budget(client, method, path, budget=None, **kwargs):
+    """
+    Issue a request through the test client and enforce its query budget.
+
+    Returns the response so callers can make further assertions on it.
+    """
+    if budget is None:
+        match = resolve(path.split('?', 1)[0])
+        request = type('BudgetRequest', (), {'resolver_match': match, 'method': method.upper()})()
+        budget = get_query_budget(request)
+        if budget is None:
+            raise AssertionError(f"No query budget declared for {match.view_name} ({method.upper()}).")
+
+    with query_budget(budget, label=f"{method.upper()} {path}"):
+        response = getattr(client, method.lower())(path, **kwargs)
+    return response
+
+
+def rows_over_budget(*views):
+    """Rows a fixture needs so that a query per row overruns every budget of the views."""
+    return max(budget for view in views for budget in view.query_budgets.values()) + 1
+
+
+def create_users(prefix, count):
+    return [
+        get_user_model().objects.create_user(f'{prefix}{i}', f'{prefix}{i}@example.com', 'pass')
+        for i in range(count)
+    ]
+
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryBudgetTestCase(TestCase):
+    """
+    Endpoint query budget tests, against an empty local memory cache.
+
+    Reads may be routed to a replica, and the budget counts every alias, so
+    the tests may use all of them.
+    """
+
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        # Write the last_active the requests queued while the test database exists
+        tracker.flush()
@@ -0,0 +1,216 @@
+"""
+Token-bucket throttles for write endpoints.
+
+A view opts in by mapping actions (or HTTP methods on plain APIViews) to
+throttle scopes:
+
+    throttle_scopes = {'like': 'like', 'create': 'comment'}
+
+UserRateThrottle limits each user (anonymous clients by IP) with the rate
+configured for the scope in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+IPRateThrottle adds a looser per-IP limit from the `<scope>_ip` rate, if
+there is one. Rates use DRF's "<count>/<period>" format. The count is the
+bucket capacity, so a client may burst that many requests and then gets
+tokens back evenly over the period.
+
+Buckets live in Redis when the default cache is django-redis. A Lua script
+updates them atomically in one round trip. With any other cache, or while
+Redis is unreachable, each process keeps its own buckets in memory.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'throttle:'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS[1] bucket; ARGV capacity, refill per second, now, cost.
+# Returns {allowed, milliseconds until enough tokens}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, wait}
+"""
+
+
+def get_client_ip(request):
+    """
+    Client IP address, honouring X-Forwarded-For.
+
+    With REST_FRAMEWORK['NUM_PROXIES'] set, only the address appended by the
+    outermost trusted proxy is used, so clients cannot pick their own IP.
+    """
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    num_proxies = api_settings.NUM_PROXIES
+    if x_forwarded_for and num_proxies != 0:
+        addresses = [address.strip() for address in x_forwarded_for.split(',')]
+        if num_proxies is None:
+            return addresses[0]
+        return addresses[-min(num_proxies, len(addresses))]
+    return request.META.get('REMOTE_ADDR')
+
+
+def parse_rate(rate):
+    """'30/min' -> (capacity 30, refill tokens per second)."""
+    count, period = rate.split('/')
+    seconds = PERIODS[period[0]]
+    return int(count), int(count) / seconds
+
+
+class LocalBuckets:
+    """In-process token buckets, bounded to `max_keys` most recently used keys."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def consume(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (cost - tokens) / rate
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait == 0.0, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBuckets:
+    """Token buckets in Redis, updated atomically by TOKEN_BUCKET_LUA."""
+
+    def __init__(self, client):
+        self.script = client.register_script(TOKEN_BUCKET_LUA)
+
+    def consume(self, key, capacity, rate, cost=1):
+        allowed, wait_ms = self.script(keys=[key], args=[capacity, rate, time.time(), cost])
+        return bool(allowed), wait_ms / 1000
+
+
+class RateLimiter:
+    """Consume from Redis buckets, falling back to local ones when Redis fails."""
+
+    retry_after = 30
+
+    def __init__(self):
+        self.local = LocalBuckets()
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._resolved = False
+
+    @property
+    def redis(self):
+        if not self._resolved:
+            self._resolved = True
+            backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+            if backend.startswith('django_redis.'):
+                from django_redis import get_redis_connection
+                self._redis = RedisBuckets(get_redis_connection('default'))
+        return self._redis
+
+    def consume(self, key, capacity, rate, cost=1):
+        """Return (allowed, seconds to wait before retrying)."""
+        if self.redis is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                return self.redis.consume(KEY_PREFIX + key, capacity, rate, cost)
+            except Exception as exc:
+                logger.warning('Rate limiting falls back to local buckets: %s', exc)
+                self._redis_down_until = time.monotonic() + self.retry_after
+        return self.local.consume(key, capacity, rate, cost)
+
+
+limiter = RateLimiter()
+
+_parsed_rates = {}
+
+
+def get_scope(request, view):
+    scopes = getattr(view, 'throttle_scopes', None)
+    if not scopes:
+        return None
+    return scopes.get(getattr(view, 'action', None) or request.method.lower())
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base class; subclasses pick the rate name and who the bucket belongs to."""
+
+    def rate_name(self, scope):
+        return scope
+
+    def get_ident(self, request):
+        return get_client_ip(request)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = get_scope(request, view)
+        if scope is None:
+            return True
+        rate_name = self.rate_name(scope)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(rate_name)
+        if not rate:
+            return True
+        if rate not in _parsed_rates:
+            _parsed_rates[rate] = parse_rate(rate)
+        capacity, refill = _parsed_rates[rate]
+
+        allowed, wait = limiter.consume(f"{rate_name}:{self.get_ident(request)}", capacity, refill)
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserRateThrottle(TokenBucketThrottle):
+    """Per-user bucket for the scope; anonymous clients share one per IP."""
+
+    def get_ident(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"u{request.user.pk}"
+        return f"ip{get_client_ip(request)}"
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """Per-IP bucket from the `<scope>_ip` rate, for many accounts behind one address."""
+
+    def rate_name(self, scope):
+        return f"{scope}_ip"
@@ -6,6 +6,8 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
 
+from .views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', TemplateView.as_view(template_name='index.html'), name='home'),
@@ -17,7 +19,10 @@ urlpatterns = [
     path('api/auth/', include('users.urls')),
     path('api/wiki/', include('wiki.urls')),
     path('api/posts/', include('posts.urls')),
+    path('api/tieba/', include('tieba.urls')),
     path('api/search/', include('search.urls')),
+    path('api/messages/', include('messaging.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics'),
     path('accounts/', include('allauth.urls')),
 ]
 
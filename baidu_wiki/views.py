@@ -0,0 +1,30 @@
+"""Project-level API views."""
+
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db.pool import pool_stats
+from .db_router import health
+from .instrumentation import connection_stats, registry
+
+
+class MetricsView(APIView):
+    """Admin-only view of endpoint, connection and replica metrics for this process."""
+    
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response({
+            'endpoints': registry.snapshot(),
+            'connections': dict(
+                connection_stats.snapshot(registry.total_requests()),
+                pools=pool_stats(),
+            ),
+            'replicas': health.snapshot(),
+        })
+    
+    def delete(self, request):
+        registry.reset()
+        connection_stats.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,25 @@
+"""
+End-to-end benchmarks for the API.
+
+    python -m benchmarks seed --scale small --flush
+    python -m benchmarks run --scale small --output before.json
+    python -m benchmarks compare before.json after.json
+    python -m benchmarks load --server asgi --concurrency 32 --duration 30
+    python -m benchmarks connections --duration 10
+    python -m benchmarks throttle --iterations 100000
+    python -m benchmarks dedup --fingerprints 1000000
+    python -m benchmarks slugs --count 10000 --threads 4
+
+`seed` builds a deterministic synthetic dataset, `run` drives the DRF
+endpoints through the test client and writes throughput, latency
+percentiles and query counts as JSON, and `compare` diffs two reports.
+`load` replays a concurrent read/write mix against the WSGI or ASGI app
+and checks denormalized counters for drift afterwards. `connections` runs
+that load once per connection strategy (close after each request,
+CONN_MAX_AGE, pooled backend) and reports connects per request.
+`throttle` times the rate limiter's per-request overhead and `dedup` the
+near-duplicate check against a large fingerprint table. `slugs` creates
+many articles with one title and checks their slugs are unique.
+Benchmarks use benchmarks.settings (SQLite + local-memory cache) unless
+DJANGO_SETTINGS_MODULE is set.
+"""
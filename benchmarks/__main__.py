@@ -0,0 +1,534 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+
+
+def migrate():
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0, interactive=False)
+
+
+def seed(options):
+    from django.core.management import call_command
+    from .generator import DatasetGenerator
+
+    if options.flush:
+        call_command('flush', verbosity=0, interactive=False)
+    sys.stderr.write(f"Generating '{options.scale}' dataset (seed {options.seed})\n")
+    generator = DatasetGenerator(
+        options.scale, options.seed, stdout=sys.stderr,
+        users=options.users, posts=options.posts, articles=options.articles,
+    )
+    return generator.generate()
+
+
+def run(options):
+    from .runner import run as run_benchmarks, select_scenarios
+
+    scenarios = select_scenarios(options.scenario, include_writes=not options.read_only)
+    manifest = None
+    if not options.reuse:
+        options.flush = True
+        manifest = seed(options)
+
+    sys.stderr.write(f"Running {len(scenarios)} scenarios x {options.iterations} requests\n")
+    report = run_benchmarks(
+        scenarios, iterations=options.iterations, warmup=options.warmup,
+        seed=options.seed, manifest=manifest, stdout=sys.stderr,
+    )
+    write_report(report, options.output)
+
+
+def load(options):
+    from .load import DEFAULT_MIX, LoadTest
+
+    if not options.reuse:
+        options.flush = True
+        seed(options)
+
+    sys.stderr.write(
+        f"Load test: {options.concurrency} users on {options.server.upper()} for {options.duration:g}s\n"
+    )
+    report = LoadTest(
+        server=options.server, users=options.concurrency, duration=options.duration,
+        mix=options.mix or DEFAULT_MIX, think_ms=options.think_ms, seed=options.seed,
+    ).run()
+    totals = report['totals']
+    sys.stderr.write(
+        f"  {totals['requests']} requests, {totals['throughput_rps']} req/s, "
+        f"error rate {totals['error_rate']:.2%}\n"
+    )
+    for label, drift in report['counter_drift'].items():
+        if drift['rows']:
+            sys.stderr.write(f"  drift {label}: {drift['rows']} rows off by {drift['total_drift']} in total\n")
+    write_report(report, options.output)
+
+
+# name -> environment for the child process running the load test
+CONNECTION_STRATEGIES = {
+    'close': {'BENCH_CONN_MAX_AGE': '0'},
+    'persistent': {'BENCH_CONN_MAX_AGE': '60'},
+    'pool': {'BENCH_DB_POOL': '8'},
+}
+
+
+def compare_connections(options):
+    """Run the same load under each connection strategy, one process per run."""
+    if not options.reuse:
+        options.flush = True
+        seed(options)
+
+    results = {}
+    for server in options.server:
+        for strategy, env in CONNECTION_STRATEGIES.items():
+            handle, path = tempfile.mkstemp(suffix='.json')
+            os.close(handle)
+            command = [
+                sys.executable, '-m', 'benchmarks', 'load', '--reuse', '--server', server,
+                '--concurrency', str(options.concurrency), '--duration', str(options.duration),
+                '--seed', str(options.seed), '-o', path,
+            ]
+            if options.mix:
+                command += ['--mix', options.mix]
+            try:
+                subprocess.run(command, env=dict(os.environ, **env), check=True, stderr=subprocess.DEVNULL)
+                with open(path, encoding='utf-8') as report:
+                    report = json.load(report)
+            finally:
+                os.unlink(path)
+            results[f"{server}/{strategy}"] = {
+                'throughput_rps': report['totals']['throughput_rps'],
+                'error_rate': report['totals']['error_rate'],
+                'p95_ms': max(action['latency_ms']['p95'] for action in report['actions'].values()),
+                **report['connections'],
+            }
+            row = results[f"{server}/{strategy}"]
+            sys.stderr.write(
+                f"  {server}/{strategy:<11} {row['throughput_rps']:>8} req/s  "
+                f"{row['opened']:>6} opened, {row['connects']:>6} connects ({row['connects_per_request']}/request)\n"
+            )
+    write_report(results, options.output)
+
+
+def throttle(options):
+    from .throttle import run_throttle_benchmark
+
+    report = run_throttle_benchmark(options.iterations, options.keys, options.redis)
+    for name, stats in report['cases'].items():
+        sys.stderr.write(
+            f"  {name:<30} mean {stats['mean_us']:>8.2f}  p50 {stats['p50_us']:>8.2f}  "
+            f"p99 {stats['p99_us']:>8.2f} us\n"
+        )
+    write_report(report, options.output)
+
+
+def dedup(options):
+    from .dedup import run_dedup_benchmark
+
+    report = run_dedup_benchmark(
+        stored=options.fingerprints, texts=options.texts, queries=options.queries,
+        seed=options.seed, stdout=sys.stderr,
+    )
+    for name in ('signature_ms', 'lookup_ms'):
+        stats = report[name]
+        sys.stderr.write(f"  {name:<13} mean {stats['mean']:>7.3f}  p50 {stats['p50']:>7.3f}  p99 {stats['p99']:>7.3f}\n")
+    sys.stderr.write(
+        f"  detected {report['detected_copies']:.0%} of edited copies, "
+        f"{report['false_positives_on_fresh_text']:.0%} false positives\n"
+    )
+    write_report(report, options.output)
+
+
+def tieba(options):
+    from .tieba import run_tieba_benchmark
+
+    report = run_tieba_benchmark(
+        posts=options.posts, requests=options.requests, joined=options.joined,
+        seed=options.seed, reuse=options.reuse, stdout=sys.stderr,
+    )
+    sys.stderr.write(f"  {report['query_plan']}\n")
+    for name, stats in report['listing_ms'].items():
+        sys.stderr.write(
+            f"  {name:<12} p50 {stats['p50']:>8.2f}  p99 {stats['p99']:>8.2f} ms  {stats['queries']} queries\n"
+        )
+    sys.stderr.write(f"  {'COUNT(*)':<12} p50 {report['count_star_ms']['p50']:>8.2f} ms\n")
+    joined = report['joined']
+    sys.stderr.write(
+        f"  joined list of {joined['forums']}: uncached p50 {joined['uncached_ms']['p50']:.3f} ms, "
+        f"cached p50 {joined['cached_ms']['p50']:.3f} ms\n"
+    )
+    write_report(report, options.output)
+
+
+def bump(options):
+    from .bump import run_bump_benchmark
+
+    report = run_bump_benchmark(
+        posts=options.posts, comments=options.comments, requests=options.requests,
+        aggregate_requests=options.aggregate_requests, seed=options.seed, reuse=options.reuse,
+        stdout=sys.stderr,
+    )
+    sys.stderr.write(f"  {report['posts']} threads, {report['comments']} replies\n")
+    for name in ('page_query_ms', 'api_ms', 'aggregate_page_query_ms', 'reply_ms'):
+        stats = report[name]
+        sys.stderr.write(f"  {name:<24} p50 {stats['p50']:>9.2f}  p99 {stats['p99']:>9.2f} ms\n")
+    write_report(report, options.output)
+
+
+def checkin(options):
+    from .checkin import run_checkin_benchmark
+
+    report = run_checkin_benchmark(
+        members=options.members, sample=options.sample, checkins=options.checkins,
+        target_users=options.target_users, seed=options.seed, stdout=sys.stderr,
+    )
+    for name, value in report['storage'].items():
+        sys.stderr.write(f"  {name:<52} {value:>12}\n")
+    for name in ('checkin_ms', 'count_today_ms', 'ranking_page_ms'):
+        stats = report[name]
+        sys.stderr.write(f"  {name:<16} p50 {stats['p50']:>8.3f}  p99 {stats['p99']:>8.3f} ms\n")
+    write_report(report, options.output)
+
+
+def onlyop(options):
+    from .onlyop import run_onlyop_benchmark
+
+    report = run_onlyop_benchmark(
+        floors=options.floors, op_share=options.op_share, page_size=options.page_size,
+        seed=options.seed, reuse=options.reuse,
+    )
+    sys.stderr.write(f"  {report['floors']} floors, {report['op_floors']} by the OP\n")
+    for name in ('only_op', 'whole_thread'):
+        row = report[name]
+        sys.stderr.write(
+            f"  {name:<13} {row['requests']:>5} requests  {row['total_ms']:>10.1f} ms total  "
+            f"p50 {row['request_ms']['p50']:>7.2f} ms  {row['queries_per_request']} queries/request\n"
+        )
+    write_report(report, options.output)
+
+
+def messaging(options):
+    from .messaging import run_messaging_benchmark
+
+    report = run_messaging_benchmark(
+        conversations=options.conversations, messages_per_conversation=options.messages,
+        unread_share=options.unread_share, page_size=options.page_size, sends=options.sends,
+        seed=options.seed, reuse=options.reuse,
+    )
+    sys.stderr.write(
+        f"  {report['conversations']} conversations, {report['messages']} messages, "
+        f"{report['unread_messages']} unread in {report['unread_conversations']}\n"
+    )
+    for name in ('inbox_first_page', 'naive_inbox_first_page', 'unread_total', 'naive_unread_total'):
+        row = report[name]
+        sys.stderr.write(f"  {name:<23} p50 {row['ms']['p50']:>9.2f} ms  {row['queries']} queries\n")
+    walk = report['inbox_walk']
+    sys.stderr.write(
+        f"  whole inbox: {walk['requests']} pages in {walk['total_ms']:.1f} ms, "
+        f"{walk['queries_per_request']} queries/page; send p50 {report['send_ms']['p50']:.2f} ms\n"
+    )
+    write_report(report, options.output)
+
+
+def snippets(options):
+    from .snippets import run_snippets_benchmark
+
+    report = run_snippets_benchmark(
+        scale=options.scale, queries=options.queries, page_size=options.page_size, sort_by=options.sort_by,
+        repeat=options.repeat, seed=options.seed, reuse=options.reuse, stdout=sys.stderr,
+        users=options.users, posts=options.posts, articles=options.articles,
+    )
+    sys.stderr.write(f"  {report['articles']} articles, {len(report['queries'])} queries\n")
+    for name in ('snippets', 'full_content'):
+        row = report[name]
+        sys.stderr.write(
+            f"  {name:<13} {row['mean_bytes']:>9} bytes/page  p50 {row['ms']['p50']:>8.2f} ms  "
+            f"p99 {row['ms']['p99']:>8.2f} ms  {row['max_queries']} queries\n"
+        )
+    sys.stderr.write(f"  {report['bytes_saved']:.0%} smaller, {report['speedup_p50']}x faster at p50\n")
+    write_report(report, options.output)
+
+
+def floors(options):
+    from .floors import run_floor_check
+
+    report = run_floor_check(
+        threads=options.threads, replies=options.replies, rollback_rate=options.rollback_rate,
+        seed=options.seed,
+    )
+    allocator, naive = report['allocator'], report['max_plus_one']
+    sys.stderr.write(
+        f"  allocator: {allocator['comments']} floors, last {allocator['last_floor']}, "
+        f"unique={allocator['unique']} gap_free={allocator['gap_free']}, "
+        f"{allocator['rolled_back']} rolled back, {allocator['replies_per_second']} replies/s\n"
+        f"  MAX()+1:   {naive['collisions']} of {naive['attempts']} inserts collided\n"
+    )
+    write_report(report, options.output)
+    if not report['passed']:
+        sys.stderr.write("Floor check FAILED\n")
+        sys.exit(1)
+
+
+def wordfilter(options):
+    from .wordfilter import run_wordfilter_benchmark
+
+    report = run_wordfilter_benchmark(
+        words=options.words, megabytes=options.megabytes, naive_words=options.naive_words,
+        repeat=options.repeat, seed=options.seed,
+    )
+    sys.stderr.write(
+        f"  {report['words']} words, {report['automaton_states']} states, "
+        f"built in {report['build_seconds']:.3f}s; {report['matches']} matches in {report['text_mb']} MB\n"
+    )
+    for name, rate in report['mb_per_second'].items():
+        sys.stderr.write(f"  {name:<20} {rate:>9.2f} MB/s\n")
+    write_report(report, options.output)
+
+
+def slugs(options):
+    from .slugs import run_slugs_benchmark
+
+    report = run_slugs_benchmark(
+        count=options.count, threads=options.threads, title=options.title, keep=options.keep,
+    )
+    sys.stderr.write(
+        f"  {report['articles']} articles titled {report['title']!r} with {report['threads']} thread(s): "
+        f"{report['ms_per_article']:.3f} ms and {report['queries_per_article']:.2f} queries each, "
+        f"{report['unique_slugs']} unique slugs, e.g. {report['sample']}\n"
+    )
+    write_report(report, options.output)
+    if not report['passed']:
+        sys.stderr.write("Slug allocation FAILED\n")
+        sys.exit(1)
+
+
+def write_report(report, path):
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if path:
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(output + '\n')
+        sys.stderr.write(f"Wrote {path}\n")
+    else:
+        sys.stdout.write(output + '\n')
+
+
+def compare(options):
+    from .runner import compare as compare_reports
+
+    with open(options.baseline, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    with open(options.candidate, encoding='utf-8') as handle:
+        candidate = json.load(handle)
+
+    rows, regressions = compare_reports(baseline, candidate, options.threshold)
+    for name, metric, before, after, change in rows:
+        flag = ' <-- regression' if (name, metric, before, after, change) in regressions else ''
+        print(f"{name:<20} {metric:<15} {before:>10.2f} -> {after:>10.2f}  {change:+7.1%}{flag}")
+    print(f"\n{len(regressions)} regression(s) over {options.threshold:.0%}")
+    if regressions and options.fail_on_regression:
+        sys.exit(1)
+
+
+def add_dataset_arguments(parser):
+    from .generator import SCALES
+
+    parser.add_argument('--scale', choices=list(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=None, help='Override the number of users for the scale.')
+    parser.add_argument('--posts', type=int, default=None, help='Override the number of posts for the scale.')
+    parser.add_argument('--articles', type=int, default=None, help='Override the number of articles for the scale.')
+
+
+def main(argv=None):
+    setup_django()
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='API benchmark suite.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='Generate the synthetic dataset.')
+    add_dataset_arguments(seed_parser)
+    seed_parser.add_argument('--flush', action='store_true', help='Empty the database first.')
+
+    run_parser = commands.add_parser('run', help='Regenerate the dataset and run the scenarios.')
+    add_dataset_arguments(run_parser)
+    run_parser.add_argument('--iterations', type=int, default=200)
+    run_parser.add_argument('--warmup', type=int, default=20)
+    run_parser.add_argument('--scenario', action='append', help='Only run this scenario (repeatable).')
+    run_parser.add_argument('--read-only', action='store_true', help='Skip scenarios that write.')
+    run_parser.add_argument('--reuse', action='store_true', help='Run against the existing dataset.')
+    run_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    load_parser = commands.add_parser('load', help='Concurrent load test against the WSGI or ASGI app.')
+    add_dataset_arguments(load_parser)
+    load_parser.add_argument('--server', choices=['wsgi', 'asgi'], default='wsgi')
+    load_parser.add_argument('--concurrency', '-c', type=int, default=16, help='Concurrent virtual users.')
+    load_parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run.')
+    load_parser.add_argument('--mix', default=None, help='Weighted actions, e.g. view=40,like=10,comment=5.')
+    load_parser.add_argument('--think-ms', type=float, default=0, help='Pause between requests per user.')
+    load_parser.add_argument('--reuse', action='store_true', help='Run against the existing dataset.')
+    load_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    connections_parser = commands.add_parser(
+        'connections', help='Compare closing, persistent and pooled connections under load.',
+    )
+    add_dataset_arguments(connections_parser)
+    connections_parser.add_argument('--server', action='append', choices=['wsgi', 'asgi'],
+                                    help='Server to test (repeatable, default both).')
+    connections_parser.add_argument('--concurrency', '-c', type=int, default=16)
+    connections_parser.add_argument('--duration', type=float, default=10.0)
+    connections_parser.add_argument('--mix', default=None)
+    connections_parser.add_argument('--reuse', action='store_true', help='Run against the existing dataset.')
+    connections_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    throttle_parser = commands.add_parser('throttle', help='Time the throttle hot path.')
+    throttle_parser.add_argument('--iterations', type=int, default=100000)
+    throttle_parser.add_argument('--keys', type=int, default=1000, help='Distinct users to spread calls over.')
+    throttle_parser.add_argument('--redis', default=None, help='Also time the Redis bucket script, e.g. redis://localhost:6379/0.')
+    throttle_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    dedup_parser = commands.add_parser('dedup', help='Time near-duplicate lookups against many fingerprints.')
+    dedup_parser.add_argument('--fingerprints', type=int, default=100000, help='Signatures to store first.')
+    dedup_parser.add_argument('--texts', type=int, default=2000, help='How many stored signatures come from real text.')
+    dedup_parser.add_argument('--queries', type=int, default=500)
+    dedup_parser.add_argument('--seed', type=int, default=42)
+    dedup_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    tieba_parser = commands.add_parser('tieba', help='Time the thread listing of a very large forum.')
+    tieba_parser.add_argument('--posts', type=int, default=1000000, help='Threads in the forum.')
+    tieba_parser.add_argument('--requests', type=int, default=20, help='Requests per listed page.')
+    tieba_parser.add_argument('--joined', type=int, default=200, help='Forums joined by the member whose list is timed.')
+    tieba_parser.add_argument('--seed', type=int, default=42)
+    tieba_parser.add_argument('--reuse', action='store_true', help='Keep an existing benchmark forum.')
+    tieba_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    bump_parser = commands.add_parser('bump', help='Time the latest-reply listing of a large category.')
+    bump_parser.add_argument('--posts', type=int, default=1000000, help='Threads in the category.')
+    bump_parser.add_argument('--comments', type=int, default=50000000,
+                             help='Replies across those threads (the default takes a long while to generate).')
+    bump_parser.add_argument('--requests', type=int, default=20)
+    bump_parser.add_argument('--aggregate-requests', type=int, default=3,
+                             help='Runs of the slow Max() ordering it replaces.')
+    bump_parser.add_argument('--seed', type=int, default=42)
+    bump_parser.add_argument('--reuse', action='store_true', help='Keep an existing benchmark category.')
+    bump_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    checkin_parser = commands.add_parser('checkin', help='Measure check-in storage and time check-ins.')
+    checkin_parser.add_argument('--members', type=int, default=100000, help='Members with a check-in history.')
+    checkin_parser.add_argument('--sample', type=int, default=2000,
+                                help='Members whose history also goes in a row-per-day table.')
+    checkin_parser.add_argument('--checkins', type=int, default=1000, help='Check-ins to time.')
+    checkin_parser.add_argument('--target-users', type=int, default=10000000,
+                                help='Scale storage figures to this many users.')
+    checkin_parser.add_argument('--seed', type=int, default=42)
+    checkin_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    onlyop_parser = commands.add_parser('onlyop', help='Time reading only the OP\'s floors of a huge thread.')
+    onlyop_parser.add_argument('--floors', type=int, default=20000)
+    onlyop_parser.add_argument('--op-share', type=float, default=0.05, help='Share of floors posted by the OP.')
+    onlyop_parser.add_argument('--page-size', type=int, default=30)
+    onlyop_parser.add_argument('--seed', type=int, default=42)
+    onlyop_parser.add_argument('--reuse', action='store_true', help='Keep an existing benchmark thread.')
+    onlyop_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    messaging_parser = commands.add_parser('messaging', help='Time the inbox of a user with many conversations.')
+    messaging_parser.add_argument('--conversations', type=int, default=10000)
+    messaging_parser.add_argument('--messages', type=int, default=5, help='Messages per conversation.')
+    messaging_parser.add_argument('--unread-share', type=float, default=0.05,
+                                  help='Share of conversations with unread messages.')
+    messaging_parser.add_argument('--page-size', type=int, default=20)
+    messaging_parser.add_argument('--sends', type=int, default=200, help='Messages to send and time.')
+    messaging_parser.add_argument('--seed', type=int, default=42)
+    messaging_parser.add_argument('--reuse', action='store_true', help='Keep existing benchmark conversations.')
+    messaging_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    snippets_parser = commands.add_parser('snippets', help='Compare search pages with snippets and with full content.')
+    add_dataset_arguments(snippets_parser)
+    snippets_parser.add_argument('--queries', type=int, default=10, help='Vocabulary words to search for.')
+    snippets_parser.add_argument('--page-size', type=int, default=20)
+    snippets_parser.add_argument('--sort-by', choices=['relevance', 'date', 'views', 'likes'], default='relevance')
+    snippets_parser.add_argument('--repeat', type=int, default=5, help='Requests per query and view.')
+    snippets_parser.add_argument('--reuse', action='store_true', help='Search the existing dataset.')
+    snippets_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    floors_parser = commands.add_parser('floors', help='Check floor numbering under concurrent replies.')
+    floors_parser.add_argument('--threads', type=int, default=16)
+    floors_parser.add_argument('--replies', type=int, default=25, help='Replies per thread.')
+    floors_parser.add_argument('--rollback-rate', type=float, default=0.1,
+                               help='Share of attempts that allocate a floor and roll back.')
+    floors_parser.add_argument('--seed', type=int, default=42)
+    floors_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    wordfilter_parser = commands.add_parser('wordfilter', help='Measure sensitive word filter throughput.')
+    wordfilter_parser.add_argument('--words', type=int, default=5000, help='Size of the word list.')
+    wordfilter_parser.add_argument('--megabytes', type=float, default=4.0, help='Amount of text to scan.')
+    wordfilter_parser.add_argument('--naive-words', type=int, default=500,
+                                   help='Words to time the naive loop with; the result is scaled to --words.')
+    wordfilter_parser.add_argument('--repeat', type=int, default=3)
+    wordfilter_parser.add_argument('--seed', type=int, default=42)
+    wordfilter_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    slugs_parser = commands.add_parser('slugs', help='Time slug allocation for many articles with one title.')
+    slugs_parser.add_argument('--count', type=int, default=10000)
+    slugs_parser.add_argument('--threads', type=int, default=1)
+    slugs_parser.add_argument('--title', default='百度百科 测试词条')
+    slugs_parser.add_argument('--keep', action='store_true', help='Keep the created articles.')
+    slugs_parser.add_argument('--output', '-o', help='Write the JSON report here instead of stdout.')
+
+    compare_parser = commands.add_parser('compare', help='Compare two JSON reports.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Relative change that counts as a regression (default 0.1).')
+    compare_parser.add_argument('--fail-on-regression', action='store_true')
+
+    options = parser.parse_args(argv)
+    if options.command == 'slugs' and (options.count < 1 or options.threads < 1):
+        parser.error('--count and --threads must be positive.')
+    if options.command == 'compare':
+        return compare(options)
+    if options.command == 'throttle':
+        return throttle(options)
+    if options.command == 'wordfilter':
+        return wordfilter(options)
+
+    migrate()
+    if options.command == 'seed':
+        manifest = seed(options)
+        print(json.dumps(manifest, indent=2, ensure_ascii=False))
+    elif options.command == 'load':
+        load(options)
+    elif options.command == 'dedup':
+        dedup(options)
+    elif options.command == 'tieba':
+        tieba(options)
+    elif options.command == 'bump':
+        bump(options)
+    elif options.command == 'checkin':
+        checkin(options)
+    elif options.command == 'onlyop':
+        onlyop(options)
+    elif options.command == 'floors':
+        floors(options)
+    elif options.command == 'messaging':
+        messaging(options)
+    elif options.command == 'snippets':
+        snippets(options)
+    elif options.command == 'slugs':
+        slugs(options)
+    elif options.command == 'connections':
+        options.server = options.server or ['wsgi', 'asgi']
+        compare_connections(options)
+    else:
+        run(options)
+
+
+if __name__ == '__main__':
+    main()
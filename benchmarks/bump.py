@@ -0,0 +1,153 @@
+"""
+Benchmark of listing a category by latest reply (顶帖 order).
+
+Fills one category with `posts` threads and `comments` replies, most of
+them on a minority of busy threads, with last_reply_at/last_reply_by set
+the way posts/replies.py maintains them. It then times:
+
+* the ?order=active page query, which reads the partial index on
+  (category, -is_pinned, -last_reply_at)
+* the same endpoint through the API, whose pagination adds a COUNT(*)
+  over the category
+* the order it replaces: Max('comments__created_at') per thread, which
+  aggregates every reply in the category before it can sort
+* posting a reply, including the single-UPDATE bump of its thread
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.functions import Coalesce
+from django.test import Client
+from django.utils import timezone
+
+from posts.models import Post, PostCategory, PostComment
+from posts.replies import record_reply
+
+from .generator import next_pk, reset_sequences
+from .runner import QueryCounter, percentile
+from .tieba import make_authors
+
+BATCH = 5000
+SLUG = 'bump-bench'
+
+
+def stats(samples):
+    samples = sorted(samples)
+    return {
+        'mean': round(sum(samples) / len(samples), 3),
+        'p50': round(percentile(samples, 50), 3),
+        'p99': round(percentile(samples, 99), 3),
+    }
+
+
+def fill(posts, comments, rng, authors, stdout):
+    # Posts outlive their category (SET_NULL), so drop them first
+    Post.objects.filter(category__slug=SLUG).delete()
+    PostCategory.objects.filter(slug=SLUG).delete()
+    category = PostCategory.objects.create(name=SLUG, slug=SLUG)
+
+    now = timezone.now()
+    # A fifth of the threads get most of the replies
+    busy_share = 0.8
+    busy = max(1, posts // 5)
+    post_pk, comment_pk = next_pk(Post), next_pk(PostComment)
+    started = time.perf_counter()
+    for start in range(0, posts, BATCH):
+        thread_rows, reply_rows = [], []
+        count = min(posts, start + BATCH) - start
+        for i in range(start, start + count):
+            created = now - timedelta(seconds=rng.randrange(365 * 86400))
+            share = busy_share / busy if i % 5 == 0 else (1 - busy_share) / (posts - busy)
+            replies = int(comments * share) + (rng.random() < (comments * share) % 1)
+            last_at, last_by = created, None
+            for _ in range(replies):
+                at = created + timedelta(seconds=rng.randrange(30 * 86400))
+                author = rng.choice(authors)
+                reply_rows.append(PostComment(
+                    pk=comment_pk, post_id=post_pk, author_id=author, content='顶', created_at=at,
+                ))
+                comment_pk += 1
+                if at > last_at:
+                    last_at, last_by = at, author
+            thread_rows.append(Post(
+                pk=post_pk, title=f"bump {i}", content='bench', author_id=rng.choice(authors),
+                category=category, status='published', is_pinned=i < 3, created_at=created,
+                comments_count=replies, last_reply_at=last_at, last_reply_by_id=last_by,
+            ))
+            post_pk += 1
+        with transaction.atomic():
+            Post.objects.bulk_create(thread_rows, batch_size=BATCH)
+            PostComment.objects.bulk_create(reply_rows, batch_size=BATCH)
+        if stdout and (start // BATCH) % 20 == 0:
+            stdout.write(f"  stored {start + count}/{posts} threads, {comment_pk - 1} replies\n")
+    reset_sequences([Post, PostComment])
+    with connection.cursor() as cursor:
+        if connection.vendor in ('sqlite', 'postgresql'):
+            cursor.execute('ANALYZE')
+    return category, time.perf_counter() - started
+
+
+def timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return stats(samples)
+
+
+def run_bump_benchmark(posts=1000000, comments=50000000, requests=20, aggregate_requests=3,
+                       seed=42, reuse=False, stdout=None):
+    rng = random.Random(seed)
+    authors = make_authors()
+    category = PostCategory.objects.filter(slug=SLUG).first() if reuse else None
+    fill_seconds = None
+    if category is None:
+        category, fill_seconds = fill(posts, comments, rng, authors, stdout)
+
+    visible = Post.objects.filter(category=category, status='published', is_approved=True)
+    active = visible.order_by('-is_pinned', '-last_reply_at')
+    aggregated = visible.annotate(
+        latest=Coalesce(Max('comments__created_at'), 'created_at'),
+    ).order_by('-is_pinned', '-latest')
+
+    client = Client()
+    counter = QueryCounter()
+    api_samples = []
+    for _ in range(requests):
+        counter.count = 0
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = client.get('/api/posts/posts/', {'category': category.pk, 'order': 'active'})
+        api_samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+
+    # Replies to random threads, each bumping its thread
+    thread_ids = list(visible.values_list('pk', flat=True)[:1000])
+    reply_samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with transaction.atomic():
+            comment = PostComment.objects.create(
+                post_id=rng.choice(thread_ids), author_id=rng.choice(authors), content='顶上去',
+            )
+            record_reply(comment)
+        reply_samples.append((time.perf_counter() - started) * 1000)
+
+    return {
+        'posts': visible.count(),
+        'comments': PostComment.objects.filter(post__category=category).count(),
+        'fill_seconds': round(fill_seconds, 1) if fill_seconds is not None else None,
+        'query_plan': {
+            'active': active[:20].explain(),
+            'aggregate': aggregated[:20].explain(),
+        },
+        'page_query_ms': timed(lambda: list(active[:20]), requests),
+        'api_ms': dict(stats(api_samples), queries=counter.count),
+        'aggregate_page_query_ms': timed(lambda: list(aggregated[:20]), aggregate_requests),
+        'reply_ms': stats(reply_samples),
+    }
@@ -0,0 +1,197 @@
+"""
+Benchmark of forum check-ins (签到) and their storage.
+
+Fills one forum with `members` members, each with a year of check-ins in
+one TiebaCheckIn row (a 46-byte bitmap), and the same history for a
+sample of them in a row-per-day table for comparison. Both are measured
+on disk and scaled to `target_users` (10M by default).
+
+It then times checking in (one row read and rewritten, plus the forum's
+day counter), reading today's count, the first page of today's ranking,
+and the streak and longest-streak bit operations on a full year.
+
+Redis figures are computed, not measured: a per-user year bitmap as a
+string key, and the alternative layout of one bitmap per forum per day
+indexed by user id.
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from tieba import checkin
+from tieba.models import Tieba, TiebaCheckIn, TiebaMembership
+
+from .runner import percentile
+
+User = get_user_model()
+
+BATCH = 5000
+DAY_TABLE = 'bench_checkin_day'
+# Approximate Redis cost of a small string key beyond its payload: dict
+# entry, key and value objects and allocator rounding (64-bit, jemalloc)
+REDIS_KEY_OVERHEAD = 90
+
+
+def stats(samples):
+    samples = sorted(samples)
+    return {
+        'mean': round(sum(samples) / len(samples), 4),
+        'p50': round(percentile(samples, 50), 4),
+        'p99': round(percentile(samples, 99), 4),
+    }
+
+
+def database_bytes():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_database_size(current_database())')
+            return cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_count')
+        pages = cursor.fetchone()[0]
+        cursor.execute('PRAGMA freelist_count')
+        pages -= cursor.fetchone()[0]
+        cursor.execute('PRAGMA page_size')
+        return pages * cursor.fetchone()[0]
+
+
+def make_members(count):
+    prefix = 'checkin_bench_'
+    existing = User.objects.filter(username__startswith=prefix).count()
+    for start in range(existing, count, BATCH):
+        User.objects.bulk_create([
+            User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com")
+            for i in range(start, min(count, start + BATCH))
+        ])
+    return list(User.objects.filter(username__startswith=prefix).order_by('pk').values_list('pk', flat=True)[:count])
+
+
+def year_pattern(rng, length):
+    """A year of check-ins: runs of streaks broken by gaps, like real members."""
+    bits, day = 0, 0
+    keen = rng.random()
+    while day < length:
+        run = int(rng.expovariate(1 / (2 + keen * 40)))
+        for n in range(day, min(length, day + run)):
+            bits |= 1 << n
+        day += run + 1 + int(rng.expovariate(1 / (1 + (1 - keen) * 10)))
+    return bits
+
+
+def fill(tieba, members, year, days, rng, stdout):
+    before = database_bytes()
+    set_bits = 0
+    last = date(year, 1, 1) + timedelta(days=days - 1)
+    for start in range(0, len(members), BATCH):
+        rows = []
+        for user_id in members[start:start + BATCH]:
+            bits = year_pattern(rng, days)
+            packed = checkin.as_bytes(bits)
+            set_bits += bin(bits).count('1')
+            rows.append(TiebaCheckIn(
+                tieba=tieba, user_id=user_id, year=year, days=packed, days_count=bin(bits).count('1'),
+                last_day=last if bits >> (days - 1) & 1 else None,
+                streak=checkin.run_ending_at(packed, days - 1),
+            ))
+        with transaction.atomic():
+            TiebaCheckIn.objects.bulk_create(rows)
+        if stdout and (start // BATCH) % 20 == 0:
+            stdout.write(f"  stored {min(len(members), start + BATCH)}/{len(members)} check-in years\n")
+    return database_bytes() - before, set_bits
+
+
+def fill_day_table(tieba, members, year, days, rng):
+    """The row-per-day layout this replaces, for a sample of members."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {DAY_TABLE}")
+        cursor.execute(
+            f"CREATE TABLE {DAY_TABLE} (tieba_id integer NOT NULL, user_id integer NOT NULL, "
+            f"day date NOT NULL, PRIMARY KEY (tieba_id, user_id, day))"
+        )
+    before = database_bytes()
+    rows = 0
+    first = date(year, 1, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for user_id in members:
+            bits = year_pattern(rng, days)
+            values = [(tieba.pk, user_id, first + timedelta(days=n)) for n in range(days) if bits >> n & 1]
+            cursor.executemany(f"INSERT INTO {DAY_TABLE} (tieba_id, user_id, day) VALUES (%s, %s, %s)", values)
+            rows += len(values)
+    size = database_bytes() - before
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {DAY_TABLE}")
+    return size, rows
+
+
+def timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return stats(samples)
+
+
+def run_checkin_benchmark(members=100000, sample=2000, checkins=1000, target_users=10000000, seed=42,
+                          stdout=None):
+    rng = random.Random(seed)
+    users = make_members(members)
+    Tieba.objects.filter(name='checkin-bench').delete()
+    tieba = Tieba.objects.create(name='checkin-bench', owner_id=users[0])
+    TiebaMembership.objects.bulk_create(
+        [TiebaMembership(tieba=tieba, user_id=user_id) for user_id in users], batch_size=BATCH,
+    )
+
+    # History up to yesterday, so the timed check-ins are today's
+    today = checkin.today()
+    days = checkin.day_index(today)
+    bitmap_bytes, set_bits = fill(tieba, users, today.year, max(days, 1), rng, stdout)
+    day_bytes, day_rows = fill_day_table(tieba, users[:sample], today.year, max(days, 1), rng)
+    days_per_member = set_bits / members
+    # A full year of check-ins at the observed rate
+    year_rows = days_per_member * 365 / max(days, 1)
+
+    bitmap_per_member = bitmap_bytes / members
+    day_per_row = day_bytes / max(day_rows, 1)
+    mb = 1024 * 1024
+    storage = {
+        'members': members,
+        'checkin_days_per_member_so_far': round(days_per_member, 1),
+        'bitmap_row_bytes': round(bitmap_per_member, 1),
+        'day_row_bytes': round(day_per_row, 1),
+        f"bitmap_rows_mb_for_{target_users}_users_per_forum_year": round(bitmap_per_member * target_users / mb),
+        f"day_rows_mb_for_{target_users}_users_per_forum_year": round(day_per_row * year_rows * target_users / mb),
+        f"day_rows_for_{target_users}_users_per_forum_year": round(year_rows * target_users),
+        f"redis_user_year_keys_mb_for_{target_users}_users": round(
+            (46 + len(f"checkin:{tieba.pk}:{target_users}:{today.year}") + REDIS_KEY_OVERHEAD) * target_users / mb
+        ),
+        f"redis_forum_day_bitmap_mb_for_{target_users}_users_per_day": round(target_users / 8 / mb, 2),
+    }
+
+    # Today's check-ins, one member at a time
+    order = rng.sample(users, min(checkins, members))
+    samples = []
+    for user_id in order:
+        started = time.perf_counter()
+        checkin.check_in(User(pk=user_id), tieba)
+        samples.append((time.perf_counter() - started) * 1000)
+    tieba.refresh_from_db()
+    assert checkin.count_today(tieba) == len(order)
+
+    full_year = checkin.as_bytes((1 << 366) - 1)
+    return {
+        'storage': storage,
+        'checkin_ms': stats(samples),
+        'count_today_ms': timed(lambda: checkin.count_today(Tieba.objects.get(pk=tieba.pk)), 100),
+        'ranking_page_ms': timed(lambda: list(checkin.ranking(tieba)[:20]), 100),
+        'ranking_plan': checkin.ranking(tieba)[:20].explain(),
+        'streak_us': {
+            name: round(value * 1000, 3) for name, value in (
+                ('run_ending_at', timed(lambda: checkin.run_ending_at(full_year, 365), 1000)['mean']),
+                ('longest_run', timed(lambda: checkin.longest_run(full_year), 1000)['mean']),
+            )
+        },
+    }
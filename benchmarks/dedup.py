@@ -0,0 +1,109 @@
+"""
+Benchmark of near-duplicate lookups against a large fingerprint table.
+
+Fills ContentFingerprint/FingerprintBand with `stored` signatures. Most are
+random, which gives the same band key distribution real text does at a
+fraction of the hashing cost. `texts` of them come from real generated
+comments. Then it times screening of new comments: half are edited copies
+of stored comments, half are fresh text. Signature and lookup time are
+reported separately, together with the hit rate.
+"""
+
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from posts.dedup import (
+    NUM_PERM, _PRIME, band_keys, find_duplicate, minhash, normalize, pack,
+)
+from posts.models import ContentFingerprint, FingerprintBand
+
+from .generator import sentence
+from .runner import percentile
+
+User = get_user_model()
+
+BATCH = 2000
+
+
+def mutate(rng, text):
+    """Typical spam variation: swap a few characters and add some noise."""
+    chars = list(text)
+    for _ in range(max(1, len(chars) // 25)):
+        chars[rng.randrange(len(chars))] = rng.choice('的了是在有我这')
+    return ''.join(chars) + rng.choice(['', '!!', ' 速来', '~~'])
+
+
+def fill(stored, texts, rng, stdout):
+    author_id = User.objects.order_by('pk').values_list('pk', flat=True).first()
+    if author_id is None:
+        author_id = User.objects.create_user(email='dedup-bench@example.com', username='dedup_bench').pk
+
+    ContentFingerprint.objects.all().delete()
+    originals = [sentence(rng, rng.randint(3, 6)) for _ in range(texts)]
+    now = timezone.now()
+    started = time.perf_counter()
+    next_id = 1
+    for start in range(0, stored, BATCH):
+        fingerprints, bands = [], []
+        for i in range(start, min(stored, start + BATCH)):
+            if i < texts:
+                signature = minhash(normalize(originals[i]))
+            else:
+                signature = tuple(rng.randrange(_PRIME) for _ in range(NUM_PERM))
+            fingerprints.append(ContentFingerprint(
+                pk=next_id, kind='comment', object_id=i + 1, author_id=author_id,
+                signature=pack(signature), created_at=now,
+            ))
+            bands.extend(FingerprintBand(fingerprint_id=next_id, band=key) for key in band_keys(signature))
+            next_id += 1
+        with transaction.atomic():
+            ContentFingerprint.objects.bulk_create(fingerprints)
+            FingerprintBand.objects.bulk_create(bands, batch_size=BATCH)
+        if stdout and (start // BATCH) % 50 == 0:
+            stdout.write(f"  stored {min(stored, start + BATCH)}/{stored} fingerprints\n")
+    return originals, time.perf_counter() - started
+
+
+def run_dedup_benchmark(stored=100000, texts=2000, queries=500, seed=42, stdout=None):
+    rng = random.Random(seed)
+    originals, fill_seconds = fill(stored, texts, rng, stdout)
+
+    signature_ms, lookup_ms = [], []
+    hits = {'copies': 0, 'fresh': 0}
+    for i in range(queries):
+        copy = i % 2 == 0
+        text = mutate(rng, rng.choice(originals)) if copy else sentence(rng, rng.randint(3, 6))
+
+        started = time.perf_counter()
+        minhash(normalize(text))
+        signature_ms.append((time.perf_counter() - started) * 1000)
+
+        # find_duplicate repeats the hashing; subtract it to isolate the query
+        started = time.perf_counter()
+        result = find_duplicate(text)
+        lookup_ms.append((time.perf_counter() - started) * 1000 - signature_ms[-1])
+        if result.is_duplicate:
+            hits['copies' if copy else 'fresh'] += 1
+
+    def stats(samples):
+        samples = sorted(samples)
+        return {
+            'mean': round(sum(samples) / len(samples), 3),
+            'p50': round(percentile(samples, 50), 3),
+            'p99': round(percentile(samples, 99), 3),
+        }
+
+    return {
+        'stored_fingerprints': stored,
+        'band_rows': stored * len(band_keys((0,) * NUM_PERM)),
+        'fill_seconds': round(fill_seconds, 1),
+        'queries': queries,
+        'signature_ms': stats(signature_ms),
+        'lookup_ms': stats(lookup_ms),
+        'detected_copies': round(hits['copies'] / (queries - queries // 2), 3),
+        'false_positives_on_fresh_text': round(hits['fresh'] / (queries // 2), 3),
+    }
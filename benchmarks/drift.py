@@ -0,0 +1,65 @@
+"""
+Detect denormalized counters that disagree with the rows they count.
+
+Each check compares a counter column with a COUNT over the related table in
+a single query and reports how many rows drifted, the total absolute drift
+and a few examples.
+"""
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Func, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from posts.models import CommentLike, Post, PostComment, PostLike
+from users.models import Follow
+from wiki.models import Article, ArticleLike
+
+User = get_user_model()
+
+EXAMPLES = 5
+
+
+class Abs(Func):
+    function = 'ABS'
+    output_field = IntegerField()
+
+
+def related_count(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(n=Count('pk')).values('n'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+# (label, model, counter field, related model, related field pointing back)
+CHECKS = [
+    ('post.comments_count', Post, 'comments_count', PostComment, 'post'),
+    ('post.likes_count', Post, 'likes_count', PostLike, 'post'),
+    ('comment.likes_count', PostComment, 'likes_count', CommentLike, 'comment'),
+    ('article.likes_count', Article, 'likes_count', ArticleLike, 'article'),
+    ('user.followers_count', User, 'followers_count', Follow, 'followed'),
+    ('user.following_count', User, 'following_count', Follow, 'follower'),
+]
+
+
+def check_counter(model, field, related_model, related_field):
+    rows = model.objects.annotate(actual=related_count(related_model, related_field)).exclude(actual=F(field))
+    summary = rows.aggregate(rows=Count('pk'), total=Sum(Abs(F(field) - F('actual'))))
+    examples = list(rows.values('pk', field, 'actual')[:EXAMPLES])
+    return {
+        'rows': summary['rows'],
+        'total_drift': summary['total'] or 0,
+        'examples': [
+            {'id': example['pk'], 'stored': example[field], 'actual': example['actual']}
+            for example in examples
+        ],
+    }
+
+
+def find_counter_drift():
+    """Run every check; returns {label: {'rows', 'total_drift', 'examples'}}."""
+    return {
+        label: check_counter(model, field, related_model, related_field)
+        for label, model, field, related_model, related_field in CHECKS
+    }
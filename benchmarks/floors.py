@@ -0,0 +1,169 @@
+"""
+Concurrency check for floor numbering.
+
+Many threads reply to one post at the same time through the comments API,
+each with its own database connection. A share of the attempts allocate a
+floor and then roll back, like an insert failing halfway. Afterwards the
+floors must be unique, run 2..N with no gaps, and N must equal
+Post.last_floor.
+
+The same load is then run against the MAX(floor)+1 allocation this
+replaces. The (post, floor) unique constraint rejects the colliding
+inserts, and their count shows how often that race is lost.
+
+The MAX(floor)+1 replies bypass the API, so the counters of their post are
+never maintained; both posts are deleted with their replies once the check
+is done.
+"""
+
+import random
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.models import Max
+from rest_framework.test import APIClient
+
+from posts.models import ContentFingerprint, Post, PostComment
+from posts.replies import allocate_floor
+
+User = get_user_model()
+
+TITLE = 'floor check'
+NAIVE_TITLE = 'floor check (max+1)'
+
+
+class Rollback(Exception):
+    """Raised to abandon a transaction after allocating a floor."""
+
+
+def make_users(count):
+    users = []
+    for i in range(count):
+        user, _ = User.objects.get_or_create(
+            username=f"floor_bench_{i}", defaults={'email': f"floor_bench_{i}@example.com"},
+        )
+        users.append(user)
+    return users
+
+
+def run_threads(target, users):
+    errors = []
+
+    def worker(index, user):
+        try:
+            target(index, user)
+        except Exception as exc:  # reported, not raised, so every thread finishes
+            errors.append(repr(exc))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(i, user)) for i, user in enumerate(users)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+
+def check_floors(post):
+    floors = list(
+        PostComment.objects.filter(post=post, floor__isnull=False)
+        .order_by('floor').values_list('floor', flat=True)
+    )
+    post.refresh_from_db(fields=['last_floor'])
+    return {
+        'comments': len(floors),
+        'last_floor': post.last_floor,
+        'unique': len(floors) == len(set(floors)),
+        'gap_free': floors == list(range(2, len(floors) + 2)),
+        'matches_last_floor': (floors[-1] if floors else 1) == post.last_floor,
+    }
+
+
+def remove_posts():
+    """Delete the check's posts, their replies and the replies' fingerprints."""
+    posts = Post.objects.filter(title__in=[TITLE, NAIVE_TITLE])
+    comments = PostComment.objects.filter(post__in=posts).values('pk')
+    ContentFingerprint.objects.filter(kind='comment', object_id__in=comments).delete()
+    posts.delete()
+
+
+def run_floor_check(threads=16, replies=25, rollback_rate=0.1, seed=42):
+    remove_posts()
+    try:
+        return measure(threads, replies, rollback_rate, seed)
+    finally:
+        remove_posts()
+
+
+def measure(threads, replies, rollback_rate, seed):
+    users = make_users(threads)
+    author = users[0]
+
+    # Real path: POST /api/posts/comments/ with the allocator
+    post = Post.objects.create(title=TITLE, content='floors', author=author, status='published')
+    rollbacks = []
+
+    def reply(index, user):
+        rng = random.Random(seed + index)
+        client = APIClient()
+        client.force_authenticate(user)
+        for n in range(replies):
+            if rng.random() < rollback_rate:
+                try:
+                    with transaction.atomic():
+                        allocate_floor(post.pk)
+                        raise Rollback()
+                except Rollback:
+                    rollbacks.append(1)
+                continue
+            response = client.post('/api/posts/comments/', {
+                'post': post.pk, 'content': f"thread {index} reply {n} {rng.random()}",
+            }, format='json')
+            if response.status_code != 201:
+                raise AssertionError(f"HTTP {response.status_code}: {response.data}")
+
+    elapsed, errors = run_threads(reply, users)
+    allocator = check_floors(post)
+    allocator.update(
+        seconds=round(elapsed, 3),
+        replies_per_second=round(allocator['comments'] / elapsed, 1) if elapsed else None,
+        rolled_back=len(rollbacks),
+        errors=errors[:10],
+    )
+
+    # The race it replaces: read MAX(floor), then insert MAX+1
+    naive_post = Post.objects.create(title=NAIVE_TITLE, content='floors', author=author, status='published')
+    collisions = []
+
+    def naive_reply(index, user):
+        for n in range(replies):
+            highest = PostComment.objects.filter(post=naive_post).aggregate(m=Max('floor'))['m'] or 1
+            try:
+                with transaction.atomic():
+                    PostComment.objects.create(post=naive_post, author=user, content='max+1', floor=highest + 1)
+            except (IntegrityError, OperationalError):
+                collisions.append(1)
+
+    elapsed, errors = run_threads(naive_reply, users)
+    naive = {
+        'attempts': threads * replies,
+        'collisions': len(collisions),
+        'seconds': round(elapsed, 3),
+        'errors': errors[:10],
+    }
+
+    passed = (
+        allocator['unique'] and allocator['gap_free'] and allocator['matches_last_floor']
+        and not allocator['errors']
+    )
+    return {
+        'threads': threads,
+        'replies_per_thread': replies,
+        'passed': passed,
+        'allocator': allocator,
+        'max_plus_one': naive,
+    }
@@ -0,0 +1,377 @@
+"""
+Deterministic synthetic dataset for benchmarks.
+
+Everything is drawn from a single random.Random(seed), so the same scale and
+seed always produce the same users, follow graph, posts, comment threads,
+articles, versions and likes. Rows are written with bulk_create and explicit
+primary keys, which keeps generation fast and lets comment threads point at
+parents that were created in the same batch.
+"""
+
+import bisect
+import itertools
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from posts.models import CommentLike, Post, PostCategory, PostComment, PostLike, PostTag
+from users.models import Follow
+from wiki.bulk import SlugAllocator, chunked
+from wiki.models import Article, ArticleLike, ArticleVersion, Category, Tag
+
+User = get_user_model()
+
+PASSWORD = 'bench-password'
+BATCH_SIZE = 2000
+
+SCALES = {
+    'tiny': {
+        'users': 50, 'posts': 200, 'comments_per_post': 5, 'articles': 100,
+        'versions_per_article': 3, 'likes_per_post': 4,
+    },
+    'small': {
+        'users': 500, 'posts': 3000, 'comments_per_post': 8, 'articles': 1000,
+        'versions_per_article': 4, 'likes_per_post': 6,
+    },
+    'medium': {
+        'users': 5000, 'posts': 30000, 'comments_per_post': 10, 'articles': 10000,
+        'versions_per_article': 5, 'likes_per_post': 8,
+    },
+    'large': {
+        'users': 20000, 'posts': 150000, 'comments_per_post': 12, 'articles': 50000,
+        'versions_per_article': 6, 'likes_per_post': 10,
+    },
+}
+
+# Words used to build titles and bodies; search scenarios query the same list
+VOCABULARY = [
+    '百度', '百科', '贴吧', '历史', '文化', '科学', '技术', '音乐', '电影', '游戏',
+    '体育', '旅游', '美食', '教育', '经济', '城市', '大学', '编程', '人工智能', '数据库',
+    '手机', '汽车', '动漫', '小说', '摄影', '健康', '天文', '地理', '艺术', '哲学',
+    'python', 'django', 'linux', 'redis', 'sqlite', 'android', 'music', 'movie', 'travel', 'game',
+]
+POST_CATEGORIES = ['综合讨论', '技术交流', '生活分享', '兴趣爱好', '问题求助', '新闻资讯']
+WIKI_CATEGORIES = {
+    '自然科学': ['物理学', '化学', '生物学', '天文学'],
+    '社会科学': ['经济学', '历史学', '法学'],
+    '文化艺术': ['音乐', '电影', '文学', '美术'],
+    '科学技术': ['计算机', '互联网', '人工智能'],
+}
+
+# Exponent of the power-law used for follower popularity and user activity
+ZIPF_EXPONENT = 1.1
+# Chance that a comment replies to an earlier comment in the same thread
+REPLY_PROBABILITY = 0.6
+# Chance that a reply continues the most recent branch, producing deep chains
+DEEP_REPLY_PROBABILITY = 0.5
+MAX_FOLLOWING = 200
+
+
+class WeightedSampler:
+    """Sample indexes 0..n-1 with Zipf-like weights using a cumulative table."""
+
+    def __init__(self, n, exponent=ZIPF_EXPONENT):
+        self.cumulative = list(itertools.accumulate(1.0 / (rank + 1) ** exponent for rank in range(n)))
+        self.total = self.cumulative[-1]
+
+    def sample(self, rng):
+        return bisect.bisect_left(self.cumulative, rng.random() * self.total)
+
+    def sample_distinct(self, rng, k):
+        """Draw k distinct indexes; k is capped at a quarter of n so the tail never stalls."""
+        k = min(k, max(1, len(self.cumulative) // 4))
+        chosen = set()
+        while len(chosen) < k:
+            chosen.add(self.sample(rng))
+        return chosen
+
+
+def words(rng, n):
+    return ''.join(rng.choice(VOCABULARY) for i in range(n))
+
+
+def sentence(rng, n):
+    return ' '.join(words(rng, rng.randint(2, 4)) for i in range(n)) + '。'
+
+
+def paragraphs(rng, n, sentences=4):
+    return '\n\n'.join(' '.join(sentence(rng, rng.randint(3, 6)) for j in range(sentences)) for i in range(n))
+
+
+def next_pk(model):
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def reset_sequences(models):
+    """Bring PostgreSQL sequences in line after inserting explicit ids."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class DatasetGenerator:
+    """
+    Build a benchmark dataset at one of the SCALES.
+
+    The generator expects an empty database (see `python -m benchmarks seed
+    --flush`); counters such as followers_count and comments_count are
+    recomputed from the generated rows at the end so they start consistent.
+    """
+
+    def __init__(self, scale='small', seed=42, stdout=None, **overrides):
+        if scale not in SCALES:
+            raise ValueError(f"Unknown scale '{scale}', choose from {', '.join(SCALES)}.")
+        self.scale = scale
+        self.seed = seed
+        self.config = dict(SCALES[scale], **{key: value for key, value in overrides.items() if value is not None})
+        self.rng = random.Random(seed)
+        self.stdout = stdout
+        self.now = timezone.now()
+        self.counts = {}
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message + '\n')
+            self.stdout.flush()
+
+    def generate(self):
+        steps = [
+            self.create_users, self.create_follows, self.create_categories, self.create_tags,
+            self.create_posts, self.create_comments, self.create_post_likes,
+            self.create_articles, self.create_versions, self.create_article_likes,
+            self.refresh_counters,
+        ]
+        for step in steps:
+            with transaction.atomic():
+                step()
+        reset_sequences([User, Post, PostComment, Article])
+        return self.manifest()
+
+    def manifest(self):
+        return {'scale': self.scale, 'seed': self.seed, 'config': self.config, 'counts': self.counts}
+
+    def bulk(self, model, objs):
+        total = 0
+        for batch in chunked(objs, BATCH_SIZE):
+            model.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            total += len(batch)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + total
+        self.log(f"  {model._meta.label}: {total}")
+        return total
+
+    def create_users(self):
+        n = self.config['users']
+        password = make_password(PASSWORD)
+        start = next_pk(User)
+        self.user_ids = list(range(start, start + n))
+        self.bulk(User, (
+            User(
+                pk=pk, username=f"bench_user_{i:06d}", email=f"bench_user_{i:06d}@example.com",
+                password=password, bio=sentence(self.rng, 2), last_active=self.now,
+            )
+            for i, pk in enumerate(self.user_ids)
+        ))
+        self.bulk(Token, (
+            Token(key=f"{pk:040x}", user_id=pk) for pk in self.user_ids
+        ))
+        # Low user index means more popular and more active
+        self.popularity = WeightedSampler(n)
+
+    def create_follows(self):
+        """Power-law follow graph: out-degrees and target popularity follow Zipf."""
+        rng = self.rng
+
+        def follows():
+            for index, follower in enumerate(self.user_ids):
+                degree = min(MAX_FOLLOWING, int(rng.paretovariate(1.2)) + rng.randint(0, 3))
+                for target in self.popularity.sample_distinct(rng, degree + 1):
+                    if target != index:
+                        yield Follow(follower_id=follower, followed_id=self.user_ids[target])
+
+        self.bulk(Follow, follows())
+
+    def create_categories(self):
+        self.post_category_ids = [
+            PostCategory.objects.create(name=name, slug=f"bench-{i}").pk
+            for i, name in enumerate(POST_CATEGORIES)
+        ]
+        # Categories go through save() so their materialized paths are built
+        self.wiki_category_ids = []
+        for root_name, children in WIKI_CATEGORIES.items():
+            root = Category.objects.create(name=root_name)
+            self.wiki_category_ids.append(root.pk)
+            for child in children:
+                self.wiki_category_ids.append(Category.objects.create(name=child, parent=root).pk)
+        self.counts['wiki.Category'] = len(self.wiki_category_ids)
+
+    def create_tags(self):
+        self.bulk(Tag, (Tag(name=word, slug=f"bench-tag-{i}") for i, word in enumerate(VOCABULARY)))
+        self.bulk(PostTag, (PostTag(name=word, slug=f"bench-tag-{i}") for i, word in enumerate(VOCABULARY)))
+        self.tag_ids = list(Tag.objects.values_list('pk', flat=True))
+        self.post_tag_ids = list(PostTag.objects.values_list('pk', flat=True))
+
+    def random_author(self):
+        return self.user_ids[self.popularity.sample(self.rng)]
+
+    def create_posts(self):
+        rng = self.rng
+        start = next_pk(Post)
+        self.post_ids = list(range(start, start + self.config['posts']))
+        self.bulk(Post, (
+            Post(
+                pk=pk, title=words(rng, rng.randint(3, 6)), content=paragraphs(rng, rng.randint(1, 4)),
+                author_id=self.random_author(), category_id=rng.choice(self.post_category_ids),
+                status='published', post_type=rng.choice(['discussion', 'question', 'announcement']),
+                is_pinned=rng.random() < 0.01, is_featured=rng.random() < 0.05,
+                views_count=int(rng.paretovariate(1.1) * 10), published_at=self.now,
+            )
+            for pk in self.post_ids
+        ))
+        through = Post.tags.through
+        self.bulk(through, (
+            through(post_id=pk, posttag_id=tag_id)
+            for pk in self.post_ids
+            for tag_id in rng.sample(self.post_tag_ids, rng.randint(0, 3))
+        ))
+
+    def create_comments(self):
+        """Threads mix top-level comments, replies and long reply chains."""
+        rng = self.rng
+        mean = self.config['comments_per_post']
+        self.comment_ids = []
+        pk = next_pk(PostComment)
+
+        def comments():
+            nonlocal pk
+            # Comment volume is skewed too: a few posts collect most replies
+            post_weights = WeightedSampler(len(self.post_ids))
+            hot = {self.post_ids[i] for i in post_weights.sample_distinct(rng, max(1, len(self.post_ids) // 50))}
+            for post_id in self.post_ids:
+                n = int(rng.expovariate(1.0 / mean))
+                if post_id in hot:
+                    n *= 10
+                thread = []
+                floor = 1
+                for i in range(n):
+                    parent = None
+                    if thread and rng.random() < REPLY_PROBABILITY:
+                        parent = thread[-1] if rng.random() < DEEP_REPLY_PROBABILITY else rng.choice(thread)
+                    else:
+                        floor += 1
+                    self.comment_ids.append(pk)
+                    thread.append(pk)
+                    yield PostComment(
+                        pk=pk, post_id=post_id, author_id=self.random_author(), parent_id=parent,
+                        floor=None if parent else floor, content=sentence(rng, rng.randint(1, 3)),
+                    )
+                    pk += 1
+
+        self.bulk(PostComment, comments())
+
+    def create_post_likes(self):
+        rng = self.rng
+        mean = self.config['likes_per_post']
+
+        def likes():
+            for post_id in self.post_ids:
+                for user in self.popularity.sample_distinct(rng, int(rng.expovariate(1.0 / mean))):
+                    yield PostLike(post_id=post_id, user_id=self.user_ids[user])
+
+        def comment_likes():
+            for comment_id in self.comment_ids:
+                if rng.random() < 0.2:
+                    for user in self.popularity.sample_distinct(rng, rng.randint(1, 3)):
+                        yield CommentLike(comment_id=comment_id, user_id=self.user_ids[user])
+
+        self.bulk(PostLike, likes())
+        self.bulk(CommentLike, comment_likes())
+
+    def create_articles(self):
+        rng = self.rng
+        slugs = SlugAllocator(Article.objects.values_list('slug', flat=True), fallback='article')
+        start = next_pk(Article)
+        self.article_ids = list(range(start, start + self.config['articles']))
+        self.article_slugs = []
+
+        def articles():
+            for pk in self.article_ids:
+                title = words(rng, rng.randint(2, 4))
+                slug = slugs.allocate(title)
+                self.article_slugs.append(slug)
+                yield Article(
+                    pk=pk, title=title, slug=slug, content=paragraphs(rng, rng.randint(2, 8), 6),
+                    summary=sentence(rng, 2), author_id=self.random_author(),
+                    category_id=rng.choice(self.wiki_category_ids), status='published',
+                    featured=rng.random() < 0.05, views_count=int(rng.paretovariate(1.1) * 20),
+                    published_at=self.now,
+                )
+
+        self.bulk(Article, articles())
+        through = Article.tags.through
+        self.bulk(through, (
+            through(article_id=pk, tag_id=tag_id)
+            for pk in self.article_ids
+            for tag_id in rng.sample(self.tag_ids, rng.randint(1, 4))
+        ))
+
+    def create_versions(self):
+        rng = self.rng
+        mean = self.config['versions_per_article']
+        self.bulk(ArticleVersion, (
+            ArticleVersion(
+                article_id=pk, title=words(rng, 3), content=paragraphs(rng, rng.randint(2, 6), 6),
+                version_number=number, author_id=self.random_author(),
+                change_description=sentence(rng, 1),
+            )
+            for pk in self.article_ids
+            for number in range(1, 2 + int(rng.expovariate(1.0 / mean)))
+        ))
+
+    def create_article_likes(self):
+        rng = self.rng
+        self.bulk(ArticleLike, (
+            ArticleLike(article_id=pk, user_id=self.user_ids[user])
+            for pk in self.article_ids
+            for user in self.popularity.sample_distinct(rng, rng.randint(0, 5))
+        ))
+
+    def refresh_counters(self):
+        """Recompute denormalized counters from the generated rows."""
+        def count_of(model, field, **filters):
+            return Coalesce(Subquery(
+                model.objects.filter(**{field: OuterRef('pk')}, **filters)
+                .values(field).annotate(n=Count('pk')).values('n')
+            ), 0)
+
+        # Generated ids are contiguous, so ranges avoid huge IN lists
+        User.objects.filter(pk__range=(self.user_ids[0], self.user_ids[-1])).update(
+            followers_count=count_of(Follow, 'followed'),
+            following_count=count_of(Follow, 'follower'),
+        )
+        highest_floor = (
+            PostComment.objects.filter(post=OuterRef('pk')).order_by()
+            .values('post').annotate(highest=Max('floor')).values('highest')
+        )
+        Post.objects.filter(pk__range=(self.post_ids[0], self.post_ids[-1])).update(
+            comments_count=count_of(PostComment, 'post'),
+            likes_count=count_of(PostLike, 'post'),
+            last_floor=Coalesce(Subquery(highest_floor), 1),
+        )
+        if self.comment_ids:
+            PostComment.objects.filter(pk__range=(self.comment_ids[0], self.comment_ids[-1])).update(
+                likes_count=count_of(CommentLike, 'comment'),
+            )
+        Article.objects.filter(pk__range=(self.article_ids[0], self.article_ids[-1])).update(
+            likes_count=count_of(ArticleLike, 'article'),
+        )
+        self.log('  counters refreshed')
@@ -0,0 +1,362 @@
+"""
+In-process concurrent load generator for the WSGI and ASGI applications.
+
+Virtual users replay a weighted mix of reads and writes against
+baidu_wiki.wsgi.application (one thread per user) or
+baidu_wiki.asgi.application (one asyncio task per user). Requests are fed
+to the apps directly, with no sockets or server, so the numbers reflect
+Django, the ORM and the database: lock contention on counter rows, SQLite
+write serialization and the single sync thread ASGI runs views on.
+
+After the run the harness reports error rates, latency percentiles per
+action, counter drift, session table growth and how many database
+connections were opened.
+"""
+
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.contrib.sessions.models import Session
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.db.models import Sum
+from django.db.models.functions import Length
+
+from baidu_wiki.db.pool import pool_stats
+from baidu_wiki.instrumentation import connection_stats
+
+from .drift import find_counter_drift
+from .generator import PASSWORD
+from .runner import Dataset, summarize
+
+DEFAULT_MIX = 'view=40,list=15,comments=15,like=10,comment=8,search=4,follow=6,login=2'
+
+
+def _json(data):
+    return json.dumps(data).encode()
+
+
+def _follow(d):
+    method = 'post' if d.rng.random() < 0.6 else 'delete'
+    return method, f"/api/auth/users/{d.user_id()}/follow/", None
+
+
+# Each action returns (method, path, JSON body or None); `auth` actions send
+# the virtual user's token
+ACTIONS = {
+    'view': (False, lambda d: ('get', f"/api/posts/posts/{d.post_id()}/", None)),
+    'list': (False, lambda d: ('get', '/api/posts/posts/', {'page': d.page()})),
+    'comments': (False, lambda d: ('get', '/api/posts/comments/', {'post': d.post_id()})),
+    'search': (False, lambda d: ('get', '/api/search/search/search/', {'q': d.word(), 'type': 'posts'})),
+    'like': (True, lambda d: ('post', f"/api/posts/posts/{d.post_id()}/like/", None)),
+    'comment': (True, lambda d: (
+        'post', '/api/posts/comments/', _json({'post': d.post_id(), 'content': f"{d.word()} 压测回复"}),
+    )),
+    'follow': (True, _follow),
+    'login': (False, lambda d: ('post', '/api/auth/login/', _json({'email': d.email, 'password': PASSWORD}))),
+}
+
+
+def parse_mix(value):
+    """Parse 'view=40,like=10' into a list of (action, weight)."""
+    mix = []
+    for part in value.split(','):
+        name, sep, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise ValueError(f"Unknown action '{name}', choose from {', '.join(ACTIONS)}.")
+        mix.append((name, float(weight) if sep else 1.0))
+    return mix
+
+
+class Recorder:
+    """Thread-safe collection of per-action samples."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.statuses = {}
+        self.exceptions = Counter()
+
+    def record(self, action, latency_ms, status):
+        with self.lock:
+            self.latencies.setdefault(action, []).append(latency_ms)
+            statuses = self.statuses.setdefault(action, {})
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def exception(self, exc):
+        message = str(exc).splitlines()[0][:120] if str(exc) else ''
+        with self.lock:
+            self.exceptions[f"{type(exc).__name__}: {message}"] += 1
+
+    def on_request_exception(self, sender, request=None, **kwargs):
+        exc = sys.exc_info()[1]
+        if exc is not None:
+            self.exception(exc)
+
+
+class VirtualUser:
+    """One simulated client: a generated user, its token and its own RNG."""
+
+    def __init__(self, index, dataset, mix, seed):
+        self.dataset = dataset.fork(seed * 100003 + index)
+        user = dataset.users[index % len(dataset.users)]
+        self.dataset.email = user[2]
+        self.token = user[1]
+        self.actions = [name for name, weight in mix]
+        self.weights = [weight for name, weight in mix]
+
+    def next_request(self):
+        action = self.dataset.rng.choices(self.actions, self.weights)[0]
+        auth, build = ACTIONS[action]
+        method, path, payload = build(self.dataset)
+        query, body = '', b''
+        if isinstance(payload, dict):
+            query = urlencode(payload)
+        elif payload is not None:
+            body = payload
+        headers = [(b'host', b'testserver')]
+        if body:
+            headers.append((b'content-type', b'application/json'))
+            headers.append((b'content-length', str(len(body)).encode()))
+        if auth:
+            headers.append((b'authorization', f"Token {self.token}".encode()))
+        return action, method.upper(), path, query, body, headers
+
+
+class WSGITransport:
+    name = 'wsgi'
+
+    def __init__(self):
+        from baidu_wiki.wsgi import application
+        self.application = application
+
+    def request(self, method, path, query, body, headers):
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers:
+            name = name.decode().upper().replace('-', '_')
+            key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f"HTTP_{name}"
+            environ[key] = value.decode()
+
+        status = []
+        result = self.application(environ, lambda s, h, exc_info=None: status.append(s))
+        try:
+            for chunk in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return int(status[0].split(' ', 1)[0])
+
+
+class ASGITransport:
+    name = 'asgi'
+
+    def __init__(self):
+        from baidu_wiki.asgi import application
+        self.application = application
+
+    async def request(self, method, path, query, body, headers):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': headers,
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        sent = False
+        disconnect = asyncio.Event()
+        status = []
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        try:
+            await self.application(scope, receive, send)
+        finally:
+            disconnect.set()
+        return status[0]
+
+
+def session_stats():
+    stats = Session.objects.aggregate(bytes=Sum(Length('session_data')))
+    return {'rows': Session.objects.count(), 'bytes': stats['bytes'] or 0}
+
+
+class LoadTest:
+    """
+    Run `users` virtual users for `duration` seconds against one transport.
+
+    `think_ms` adds a pause between requests of the same user; zero keeps
+    every user busy all the time, which is the worst case for contention.
+    """
+
+    def __init__(self, server='wsgi', users=16, duration=10.0, mix=DEFAULT_MIX, think_ms=0, seed=42):
+        self.transport = ASGITransport() if server == 'asgi' else WSGITransport()
+        self.users = users
+        self.duration = duration
+        self.mix = parse_mix(mix) if isinstance(mix, str) else mix
+        self.think = think_ms / 1000.0
+        self.seed = seed
+        self.recorder = Recorder()
+
+    def run(self):
+        dataset = Dataset(self.seed)
+        virtual_users = [VirtualUser(i, dataset, self.mix, self.seed) for i in range(self.users)]
+        drift_before = find_counter_drift()
+        sessions_before = session_stats()
+        connects_before = connection_stats.snapshot(0)['connects'].get('default', 0)
+
+        got_request_exception.connect(self.recorder.on_request_exception)
+        started = time.perf_counter()
+        try:
+            if self.transport.name == 'asgi':
+                asyncio.run(self.run_async(virtual_users))
+            else:
+                self.run_threads(virtual_users)
+        finally:
+            got_request_exception.disconnect(self.recorder.on_request_exception)
+        elapsed = time.perf_counter() - started
+        connects = connection_stats.snapshot(0)['connects'].get('default', 0) - connects_before
+
+        report = self.report(elapsed, drift_before, find_counter_drift(), sessions_before, session_stats())
+        pools = pool_stats()
+        report['connections'] = {
+            'connects': connects,
+            # With a pool most connects are reuses; only `created` hit the server
+            'opened': pools['default']['created'] if 'default' in pools else connects,
+            'connects_per_request': round(connects / report['totals']['requests'], 3)
+            if report['totals']['requests'] else None,
+            'conn_max_age': connections['default'].settings_dict['CONN_MAX_AGE'],
+            'pools': pools,
+        }
+        return report
+
+    def run_threads(self, virtual_users):
+        deadline = time.perf_counter() + self.duration
+
+        def worker(user):
+            try:
+                while time.perf_counter() < deadline:
+                    self.issue(user)
+                    if self.think:
+                        time.sleep(self.think)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in virtual_users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def issue(self, user):
+        action, *request = user.next_request()
+        started = time.perf_counter()
+        try:
+            status = self.transport.request(*request)
+        except Exception as exc:
+            self.recorder.exception(exc)
+            status = 599
+        self.recorder.record(action, (time.perf_counter() - started) * 1000, status)
+
+    async def run_async(self, virtual_users):
+        deadline = time.perf_counter() + self.duration
+
+        async def worker(user):
+            while time.perf_counter() < deadline:
+                action, *request = user.next_request()
+                started = time.perf_counter()
+                try:
+                    status = await self.transport.request(*request)
+                except Exception as exc:
+                    self.recorder.exception(exc)
+                    status = 599
+                self.recorder.record(action, (time.perf_counter() - started) * 1000, status)
+                await asyncio.sleep(self.think)
+
+        await asyncio.gather(*(worker(user) for user in virtual_users))
+
+    def report(self, elapsed, drift_before, drift_after, sessions_before, sessions_after):
+        actions = {}
+        total = errors = 0
+        for action, latencies in sorted(self.recorder.latencies.items()):
+            statuses = self.recorder.statuses[action]
+            stats = summarize(latencies, [], statuses, elapsed)
+            stats['server_errors'] = sum(n for code, n in statuses.items() if int(code) >= 500)
+            stats['error_rate'] = round(stats['server_errors'] / len(latencies), 4)
+            del stats['queries']
+            actions[action] = stats
+            total += len(latencies)
+            errors += stats['server_errors']
+
+        drift = {
+            label: dict(after, introduced_rows=after['rows'] - drift_before[label]['rows'])
+            for label, after in drift_after.items()
+        }
+        return {
+            'meta': {
+                'server': self.transport.name,
+                'users': self.users,
+                'duration_s': self.duration,
+                'elapsed_s': round(elapsed, 3),
+                'think_ms': self.think * 1000,
+                'mix': dict(self.mix),
+                'seed': self.seed,
+                'database': connections['default'].vendor,
+            },
+            'totals': {
+                'requests': total,
+                'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+                'server_errors': errors,
+                'error_rate': round(errors / total, 4) if total else None,
+            },
+            'actions': actions,
+            'exceptions': dict(self.recorder.exceptions.most_common()),
+            'counter_drift': drift,
+            'sessions': {
+                'before': sessions_before,
+                'after': sessions_after,
+                'rows_added': sessions_after['rows'] - sessions_before['rows'],
+                'bytes_added': sessions_after['bytes'] - sessions_before['bytes'],
+            },
+        }
@@ -0,0 +1,178 @@
+"""
+Benchmark of the private message inbox for a user with many conversations.
+
+Gives one user `conversations` one-to-one conversations of
+`messages_per_conversation` messages each, `unread_share` of them with
+unread messages, and times:
+
+* the first inbox page and a walk through the whole inbox, over the API;
+  each page is a range scan of the user's ConversationMember rows
+* the unread total (a SUM over the partial index of unread rows)
+* the queries the member index replaces: conversations ordered by
+  MAX(message created_at) with unread messages counted per conversation,
+  and the unread total counted over messages
+* sending a message, which updates both members' rows
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F, Max, Q
+from django.test import Client
+from django.utils import timezone
+
+from messaging import inbox
+from messaging.models import Conversation, ConversationMember, Message
+
+from .generator import next_pk, reset_sequences
+from .onlyop import stats, walk
+from .runner import QueryCounter
+
+User = get_user_model()
+
+BATCH = 5000
+PREFIX = 'inbox_bench_'
+
+
+def make_users(count):
+    existing = User.objects.filter(username__startswith=PREFIX).count()
+    for start in range(existing, count + 1, BATCH):
+        User.objects.bulk_create([
+            User(username=f"{PREFIX}{i}", email=f"{PREFIX}{i}@example.com")
+            for i in range(start, min(count + 1, start + BATCH))
+        ])
+    users = list(User.objects.filter(username__startswith=PREFIX).order_by('pk').values_list('pk', flat=True))
+    return users[0], users[1:count + 1]
+
+
+def fill(owner, peers, messages_per_conversation, unread_share, rng):
+    Conversation.objects.filter(members__user_id=owner).delete()
+    now = timezone.now()
+    conversation_pk, message_pk = next_pk(Conversation), next_pk(Message)
+    started = time.perf_counter()
+    for start in range(0, len(peers), BATCH):
+        conversations, members, messages = [], [], []
+        for peer in peers[start:start + BATCH]:
+            # Conversations last active over the past year
+            at = now - timedelta(minutes=rng.randint(1, 365 * 24 * 60))
+            unread = rng.randint(1, messages_per_conversation) if rng.random() < unread_share else 0
+            for n in range(messages_per_conversation):
+                # The peer wrote the last `unread` messages
+                sender = peer if n >= messages_per_conversation - unread or n % 2 else owner
+                messages.append(Message(
+                    pk=message_pk + n, conversation_id=conversation_pk, sender_id=sender,
+                    content=f"message {n}", created_at=at - timedelta(minutes=messages_per_conversation - n),
+                ))
+            last_at = messages[-1].created_at
+            read_at = messages[-1 - unread].created_at if unread < messages_per_conversation else at - timedelta(days=1)
+            conversations.append(Conversation(
+                pk=conversation_pk, key=inbox.direct_key(owner, peer), last_message_id=message_pk + n,
+                last_message_at=last_at, messages_count=messages_per_conversation,
+            ))
+            members += [
+                ConversationMember(conversation_id=conversation_pk, user_id=owner, peer_id=peer,
+                                   last_message_at=last_at, unread_count=unread, last_read_at=read_at),
+                ConversationMember(conversation_id=conversation_pk, user_id=peer, peer_id=owner,
+                                   last_message_at=last_at, last_read_at=last_at),
+            ]
+            conversation_pk += 1
+            message_pk += messages_per_conversation
+        with transaction.atomic():
+            Conversation.objects.bulk_create(conversations, batch_size=BATCH)
+            Message.objects.bulk_create(messages, batch_size=BATCH)
+            ConversationMember.objects.bulk_create(members, batch_size=BATCH)
+    reset_sequences([Conversation, Message, ConversationMember])
+    with connection.cursor() as cursor:
+        if connection.vendor in ('sqlite', 'postgresql'):
+            cursor.execute('ANALYZE')
+    return time.perf_counter() - started
+
+
+def timed(call, repeat):
+    samples, counter = [], QueryCounter()
+    for _ in range(repeat):
+        counter.count = 0
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            result = call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, {'ms': stats(samples), 'queries': counter.count}
+
+
+def naive_inbox(owner, count):
+    """Conversations by their latest message, unread counted from messages."""
+    return list(
+        Conversation.objects.filter(members__user_id=owner)
+        .annotate(
+            latest=Max('messages__created_at'),
+            unread=Count('messages', filter=Q(messages__created_at__gt=F('members__last_read_at'))
+                         & ~Q(messages__sender_id=owner)),
+        )
+        .order_by('-latest')[:count]
+    )
+
+
+def naive_unread_total(owner):
+    return Message.objects.filter(
+        conversation__members__user_id=owner,
+        created_at__gt=F('conversation__members__last_read_at'),
+    ).exclude(sender_id=owner).count()
+
+
+def run_messaging_benchmark(conversations=10000, messages_per_conversation=5, unread_share=0.05, page_size=20,
+                            sends=200, repeat=20, seed=42, reuse=False):
+    rng = random.Random(seed)
+    owner, peers = make_users(conversations)
+    fill_seconds = None
+    if not reuse or not ConversationMember.objects.filter(user_id=owner).exists():
+        fill_seconds = fill(owner, peers, messages_per_conversation, unread_share, rng)
+
+    client = Client()
+    client.force_login(User.objects.get(pk=owner))
+    url = '/api/messages/conversations/'
+    first_page, first_page_timing = timed(lambda: client.get(url, {'page_size': page_size}), repeat)
+    assert first_page.status_code == 200, first_page.status_code
+    whole_inbox = walk(
+        client, url, {'page_size': page_size},
+        next_of=lambda data: data['next'], keep=lambda row: True,
+    )
+    assert whole_inbox.pop('op_floors') == conversations
+    total, unread_timing = timed(lambda: inbox.unread_total(owner), repeat)
+    naive_page, naive_timing = timed(lambda: naive_inbox(owner, page_size), max(1, repeat // 4))
+    naive_total, naive_unread_timing = timed(lambda: naive_unread_total(owner), max(1, repeat // 4))
+    assert total == naive_total
+    assert [row['last_message_at'] for row in first_page.json()['results']] == [
+        timezone.localtime(c.latest).isoformat() for c in naive_page
+    ]
+
+    samples = []
+    for conversation_id in rng.sample(
+        list(ConversationMember.objects.filter(user_id=owner).values_list('conversation_id', flat=True)),
+        min(sends, conversations),
+    ):
+        started = time.perf_counter()
+        response = client.post(f"{url}{conversation_id}/messages/", {'content': 'bench reply'})
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 201, response.status_code
+
+    inbox_query = ConversationMember.objects.filter(user_id=owner, is_hidden=False).order_by('-last_message_at')
+    return {
+        'conversations': conversations,
+        'messages': Message.objects.filter(conversation__members__user_id=owner).count(),
+        'unread_conversations': ConversationMember.objects.filter(user_id=owner, unread_count__gt=0).count(),
+        'unread_messages': total,
+        'fill_seconds': round(fill_seconds, 1) if fill_seconds is not None else None,
+        'inbox_first_page': first_page_timing,
+        'inbox_walk': whole_inbox,
+        'unread_total': unread_timing,
+        'naive_inbox_first_page': naive_timing,
+        'naive_unread_total': naive_unread_timing,
+        'send_ms': stats(samples),
+        'inbox_plan': inbox_query[:page_size].explain(),
+        'naive_plan': Conversation.objects.filter(members__user_id=owner).annotate(
+            latest=Max('messages__created_at'),
+        ).order_by('-latest')[:page_size].explain(),
+    }
@@ -0,0 +1,138 @@
+"""
+Benchmark of reading a huge thread in 只看楼主 (only the OP) mode.
+
+Fills one thread with `floors` floors, `op_share` of them by the OP and the
+rest spread over other authors, with a few replies inside some floors. It
+then reads every floor the OP posted two ways:
+
+* through /only-op/, walking its cursor pages; each page reads only the
+  OP's rows from the (post, author, created_at) index, and the replies
+  shown inside them come from one prefetch query
+* the way clients had to before: paging through the whole thread with
+  ?post= and keeping the OP's floors, which reads every floor, plus a
+  COUNT(*) on each page
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.test import Client
+from django.utils import timezone
+
+from posts.models import Post, PostComment
+
+from .generator import next_pk, reset_sequences
+from .runner import QueryCounter, percentile
+from .tieba import make_authors
+
+BATCH = 5000
+TITLE = 'only-op bench'
+
+
+def stats(samples):
+    samples = sorted(samples)
+    return {
+        'mean': round(sum(samples) / len(samples), 3),
+        'p50': round(percentile(samples, 50), 3),
+        'p99': round(percentile(samples, 99), 3),
+    }
+
+
+def fill(floors, op_share, rng, authors):
+    Post.objects.filter(title=TITLE).delete()
+    op = authors[0]
+    started_at = timezone.now() - timedelta(days=30)
+    post = Post.objects.create(
+        title=TITLE, content='bench', author_id=op, status='published', last_floor=floors + 1,
+    )
+    comment_pk = next_pk(PostComment)
+    rows, replies = [], 0
+    started = time.perf_counter()
+    for floor in range(2, floors + 2):
+        at = started_at + timedelta(seconds=floor * 60)
+        floor_pk = comment_pk
+        rows.append(PostComment(
+            pk=floor_pk, post=post, author_id=op if rng.random() < op_share else rng.choice(authors[1:]),
+            content=f"floor {floor}", floor=floor, created_at=at,
+        ))
+        comment_pk += 1
+        # Some floors get a conversation (楼中楼) inside them
+        if rng.random() < 0.1:
+            for n in range(rng.randint(1, 8)):
+                rows.append(PostComment(
+                    pk=comment_pk, post=post, parent_id=floor_pk, author_id=rng.choice(authors),
+                    content=f"reply {n} in floor {floor}", created_at=at + timedelta(seconds=n + 1),
+                ))
+                comment_pk += 1
+                replies += 1
+        if len(rows) >= BATCH:
+            with transaction.atomic():
+                PostComment.objects.bulk_create(rows, batch_size=BATCH)
+            rows = []
+    with transaction.atomic():
+        PostComment.objects.bulk_create(rows, batch_size=BATCH)
+    reset_sequences([PostComment])
+    Post.objects.filter(pk=post.pk).update(comments_count=floors + replies)
+    with connection.cursor() as cursor:
+        if connection.vendor in ('sqlite', 'postgresql'):
+            cursor.execute('ANALYZE')
+    return post, time.perf_counter() - started
+
+
+def walk(client, url, params, next_of, keep):
+    """Follow a listing to its end; per-request latencies, queries and kept rows."""
+    latencies, queries, kept = [], [], 0
+    counter = QueryCounter()
+    while url:
+        counter.count = 0
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = client.get(url, params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+        queries.append(counter.count)
+        data = response.json()
+        kept += sum(1 for row in data['results'] if keep(row))
+        url, params = next_of(data), None
+    return {
+        'requests': len(latencies),
+        'total_ms': round(sum(latencies), 1),
+        'request_ms': stats(latencies),
+        'queries_per_request': max(queries),
+        'op_floors': kept,
+    }
+
+
+def run_onlyop_benchmark(floors=20000, op_share=0.05, page_size=30, seed=42, reuse=False):
+    rng = random.Random(seed)
+    authors = make_authors()
+    post = Post.objects.filter(title=TITLE).first() if reuse else None
+    fill_seconds = None
+    if post is None:
+        post, fill_seconds = fill(floors, op_share, rng, authors)
+
+    op_floors = PostComment.objects.filter(
+        post=post, author_id=post.author_id, parent__isnull=True, is_approved=True,
+    ).order_by('created_at')
+    client = Client()
+    only_op = walk(
+        client, f"/api/posts/posts/{post.pk}/only-op/", {'page_size': page_size},
+        next_of=lambda data: data['next'], keep=lambda row: True,
+    )
+    # Page-number pages carry absolute next links too
+    whole_thread = walk(
+        client, '/api/posts/comments/', {'post': post.pk, 'page_size': 100},
+        next_of=lambda data: data['next'], keep=lambda row: row['author']['id'] == post.author_id,
+    )
+    assert only_op['op_floors'] == whole_thread['op_floors'] == op_floors.count()
+    return {
+        'floors': post.last_floor - 1,
+        'op_floors': only_op['op_floors'],
+        'comments': PostComment.objects.filter(post=post).count(),
+        'fill_seconds': round(fill_seconds, 1) if fill_seconds is not None else None,
+        'query_plan': op_floors[:page_size].explain(),
+        'only_op': only_op,
+        'whole_thread': whole_thread,
+    }
@@ -0,0 +1,274 @@
+"""
+Drive the DRF endpoints through the Django test client and collect timings.
+
+Each scenario is a named request template. The runner samples concrete
+ids, slugs and search terms from the generated dataset with a seeded RNG,
+issues the requests in-process (no network, no server) and records wall
+latency, status codes and the number of SQL queries per request.
+"""
+
+import copy
+import json
+import platform
+import random
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+
+from posts.models import Post
+from wiki.models import Article, Category
+
+from .generator import VOCABULARY, WeightedSampler
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+
+
+class QueryCounter:
+    """Count queries on a connection via execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies_ms, queries, statuses, elapsed):
+    latencies_ms = sorted(latencies_ms)
+    errors = sum(n for code, n in statuses.items() if int(code) >= 400)
+    result = {
+        'requests': len(latencies_ms),
+        'errors': errors,
+        'status_codes': statuses,
+        'throughput_rps': round(len(latencies_ms) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(latencies_ms) / len(latencies_ms), 3) if latencies_ms else None,
+            'min': round(latencies_ms[0], 3) if latencies_ms else None,
+            'max': round(latencies_ms[-1], 3) if latencies_ms else None,
+        },
+        'queries': {
+            'mean': round(sum(queries) / len(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+    for q in PERCENTILES:
+        value = percentile(latencies_ms, q)
+        result['latency_ms'][f"p{q}"] = round(value, 3) if value is not None else None
+    return result
+
+
+class Dataset:
+    """Ids and slugs the scenarios sample from, read once from the database."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.post_ids = list(Post.objects.filter(status='published').order_by('pk').values_list('pk', flat=True))
+        self.article_slugs = list(
+            Article.objects.filter(status='published').order_by('pk').values_list('slug', flat=True)
+        )
+        self.category_ids = list(Category.objects.order_by('pk').values_list('pk', flat=True))
+        self.users = list(
+            User.objects.filter(username__startswith='bench_user_').order_by('pk')
+            .values_list('pk', 'auth_token__key', 'email')
+        )
+        if not self.post_ids or not self.article_slugs or not self.users:
+            raise RuntimeError('The benchmark database is empty; run `python -m benchmarks seed` first.')
+        # Traffic is skewed towards popular content just like the generated data
+        self.post_sampler = WeightedSampler(len(self.post_ids))
+        self.article_sampler = WeightedSampler(len(self.article_slugs))
+        self.user_sampler = WeightedSampler(len(self.users))
+
+    def fork(self, seed):
+        """Share the sampled ids but draw from an independent RNG."""
+        dataset = copy.copy(self)
+        dataset.rng = random.Random(seed)
+        return dataset
+
+    def post_id(self):
+        return self.post_ids[self.post_sampler.sample(self.rng)]
+
+    def article_slug(self):
+        return self.article_slugs[self.article_sampler.sample(self.rng)]
+
+    def user_id(self):
+        return self.users[self.user_sampler.sample(self.rng)][0]
+
+    def token(self):
+        return self.rng.choice(self.users)[1]
+
+    def word(self):
+        return self.rng.choice(VOCABULARY)
+
+    def page(self, pages=5):
+        return self.rng.randint(1, pages)
+
+
+class Scenario:
+    """
+    A named request template.
+
+    `path` and `data` are callables taking the Dataset so every iteration
+    can hit a different object. Authenticated scenarios use a random
+    generated user's token.
+    """
+
+    def __init__(self, name, path, method='get', data=None, auth=False, write=False):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.auth = auth
+        self.write = write
+
+    def request(self, client, dataset, token=None):
+        kwargs = {}
+        if self.data is not None:
+            kwargs['data'] = json.dumps(self.data(dataset))
+            kwargs['content_type'] = 'application/json'
+        if token:
+            kwargs['HTTP_AUTHORIZATION'] = f"Token {token}"
+        return getattr(client, self.method)(self.path(dataset), **kwargs)
+
+
+SCENARIOS = [
+    Scenario('post-list', lambda d: f"/api/posts/posts/?page={d.page()}"),
+    Scenario('post-list-auth', lambda d: f"/api/posts/posts/?page={d.page()}", auth=True),
+    Scenario('post-detail', lambda d: f"/api/posts/posts/{d.post_id()}/"),
+    Scenario('post-comments', lambda d: f"/api/posts/comments/?post={d.post_id()}"),
+    Scenario('post-comments-auth', lambda d: f"/api/posts/comments/?post={d.post_id()}", auth=True),
+    Scenario('post-stats', lambda d: '/api/posts/stats/'),
+    Scenario('article-list', lambda d: f"/api/wiki/articles/?page={d.page()}"),
+    Scenario('article-detail', lambda d: f"/api/wiki/articles/{d.article_slug()}/"),
+    Scenario('article-versions', lambda d: f"/api/wiki/versions/?article={d.article_slug()}"),
+    Scenario('category-tree', lambda d: '/api/wiki/categories/tree/'),
+    Scenario('search-all', lambda d: f"/api/search/search/search/?q={d.word()}"),
+    Scenario('search-posts', lambda d: f"/api/search/search/search/?q={d.word()}&type=posts"),
+    Scenario('autocomplete', lambda d: f"/api/search/search/autocomplete/?q={d.word()}"),
+    Scenario('user-detail', lambda d: f"/api/auth/users/{d.user_id()}/"),
+    Scenario('user-followers', lambda d: f"/api/auth/users/{d.user_id()}/followers/"),
+    Scenario(
+        'comment-create', lambda d: '/api/posts/comments/', method='post', auth=True, write=True,
+        data=lambda d: {'post': d.post_id(), 'content': f"{d.word()}{d.word()} 基准测试回复"},
+    ),
+    Scenario('post-like', lambda d: f"/api/posts/posts/{d.post_id()}/like/", method='post', auth=True, write=True),
+]
+
+
+def select_scenarios(names=None, include_writes=True):
+    selected = [scenario for scenario in SCENARIOS if include_writes or not scenario.write]
+    if names:
+        unknown = set(names) - {scenario.name for scenario in SCENARIOS}
+        if unknown:
+            raise ValueError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        selected = [scenario for scenario in selected if scenario.name in names]
+    return selected
+
+
+def run_scenario(scenario, dataset, iterations, warmup):
+    # Server errors are reported as 500s instead of aborting the whole run
+    client = Client(raise_request_exception=False)
+    counter = QueryCounter()
+    latencies, queries, statuses = [], [], {}
+
+    for i in range(warmup):
+        scenario.request(client, dataset, dataset.token() if scenario.auth else None)
+
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        for i in range(iterations):
+            token = dataset.token() if scenario.auth else None
+            counter.count = 0
+            request_started = time.perf_counter()
+            response = scenario.request(client, dataset, token)
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            queries.append(counter.count)
+            code = str(response.status_code)
+            statuses[code] = statuses.get(code, 0) + 1
+    elapsed = time.perf_counter() - started
+    return summarize(latencies, queries, statuses, elapsed)
+
+
+def run(scenarios, iterations=200, warmup=20, seed=42, manifest=None, stdout=None):
+    """Run every scenario and return the JSON-serializable report."""
+    dataset = Dataset(seed)
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = run_scenario(scenario, dataset, iterations, warmup)
+        if stdout is not None:
+            stats = results[scenario.name]
+            latency = stats['latency_ms']
+            stdout.write(
+                f"  {scenario.name:<20} {stats['throughput_rps']:>9.1f} req/s  "
+                f"p50 {latency['p50']:>8.2f}  p95 {latency['p95']:>8.2f}  p99 {latency['p99']:>8.2f} ms  "
+                f"queries {stats['queries']['mean']:>6.2f}  errors {stats['errors']}\n"
+            )
+            stdout.flush()
+
+    return {
+        'meta': {
+            'timestamp': timezone.now().isoformat(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'seed': seed,
+            'dataset': manifest,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+        },
+        'scenarios': results,
+    }
+
+
+COMPARED_METRICS = [
+    ('throughput_rps', lambda s: s['throughput_rps'], True),
+    ('p50_ms', lambda s: s['latency_ms']['p50'], False),
+    ('p95_ms', lambda s: s['latency_ms']['p95'], False),
+    ('p99_ms', lambda s: s['latency_ms']['p99'], False),
+    ('queries', lambda s: s['queries']['mean'], False),
+]
+
+
+def compare(baseline, candidate, threshold=0.1):
+    """
+    Compare two reports scenario by scenario.
+
+    Returns (rows, regressions) where each row is (scenario, metric, old,
+    new, relative change). A change counts as a regression when it moves in
+    the wrong direction by more than `threshold`; the mean query count
+    regresses when it grows by a whole query or more.
+    """
+    rows, regressions = [], []
+    for name, new in candidate['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            continue
+        for metric, get, higher_is_better in COMPARED_METRICS:
+            before, after = get(old), get(new)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            rows.append((name, metric, before, after, change))
+            if metric == 'queries':
+                worse = after - before >= 1
+            else:
+                worse = -change > threshold if higher_is_better else change > threshold
+            if worse:
+                regressions.append((name, metric, before, after, change))
+    return rows, regressions
@@ -0,0 +1,69 @@
+"""
+Settings for benchmark runs.
+
+Uses the project settings with a throwaway SQLite database, local-memory
+cache and in-memory channel layer so a run needs no external services and
+measures the application rather than Redis round trips. Set BENCH_DB to
+reuse a generated dataset between runs.
+"""
+
+import os
+import tempfile
+import warnings
+
+from baidu_wiki.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+# BENCH_CONN_MAX_AGE and BENCH_DB_POOL select the connection strategy that
+# `python -m benchmarks connections` compares
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB', os.path.join(tempfile.gettempdir(), 'baidu_wiki_bench.sqlite3')),
+        'CONN_MAX_AGE': int(os.environ.get('BENCH_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+if os.environ.get('BENCH_DB_POOL'):
+    DATABASES['default'].update(
+        ENGINE='baidu_wiki.db.backends.sqlite3',
+        CONN_MAX_AGE=0,
+        POOL={'MAX_SIZE': int(os.environ['BENCH_DB_POOL'])},
+    )
+
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
+
+# Write endpoints are throttled per user; the load harness would mostly
+# measure 429s. BENCH_THROTTLE=1 keeps the throttles.
+if not os.environ.get('BENCH_THROTTLE'):
+    REST_FRAMEWORK = dict(REST_FRAMEWORK, DEFAULT_THROTTLE_CLASSES=[])
+
+# Generated users all share one password; hashing it with PBKDF2 per login
+# would dominate the auth scenarios
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        'django': {'level': 'ERROR'},
+        'baidu_wiki': {'level': 'ERROR'},
+    },
+}
+
+# WhiteNoise complains about a missing STATIC_ROOT for every new handler
+warnings.filterwarnings('ignore', message='No directory at', module='django.core.handlers.base')
@@ -0,0 +1,88 @@
+"""
+Benchmark of slug allocation.
+
+Creates `count` articles with the same title, optionally from several
+threads with a database connection each. Every article goes through
+Article.save(), so this measures the real create path: counter increment,
+existence check and insert. All the slugs must be unique.
+
+The articles and their slug counter are deleted afterwards unless `keep`
+is set.
+"""
+
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from wiki.models import Article, SlugCounter
+
+from .runner import QueryCounter
+
+User = get_user_model()
+
+TITLE = '百度百科 测试词条'
+
+
+def run_slugs_benchmark(count=10000, threads=1, title=TITLE, keep=False):
+    author, _ = User.objects.get_or_create(
+        username='slug_bench', defaults={'email': 'slug_bench@example.com'},
+    )
+    created_ids = []
+    errors = []
+    counters = []
+    lock = threading.Lock()
+
+    def worker(n):
+        counter = QueryCounter()
+        ids = []
+        try:
+            with connection.execute_wrapper(counter):
+                for _ in range(n):
+                    article = Article(title=title, content='benchmark', author=author)
+                    article.save()
+                    ids.append(article.pk)
+        except Exception as exc:  # reported, not raised, so every thread finishes
+            errors.append(repr(exc))
+        finally:
+            with lock:
+                created_ids.extend(ids)
+                counters.append(counter.count)
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
+
+    per_thread = [count // threads + (1 if i < count % threads else 0) for i in range(threads)]
+    started = time.perf_counter()
+    if threads == 1:
+        worker(count)
+    else:
+        pool = [threading.Thread(target=worker, args=(n,)) for n in per_thread]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    try:
+        slugs = list(Article.objects.filter(pk__in=created_ids).values_list('slug', flat=True))
+    finally:
+        if not keep:
+            Article.objects.filter(pk__in=created_ids).delete()
+            SlugCounter.objects.filter(scope=Article._meta.label_lower).delete()
+
+    created = len(created_ids)
+    unique = len(set(slugs))
+    return {
+        'title': title,
+        'threads': threads,
+        'articles': created,
+        'passed': not errors and created == count and unique == len(slugs),
+        'seconds': round(elapsed, 3),
+        'ms_per_article': round(elapsed / max(created, 1) * 1000, 3),
+        'articles_per_second': round(created / elapsed, 1) if elapsed else None,
+        'queries_per_article': round(sum(counters) / max(created, 1), 2),
+        'unique_slugs': unique,
+        'sample': sorted(slugs)[:3],
+        'errors': errors[:10],
+    }
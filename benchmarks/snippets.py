@@ -0,0 +1,144 @@
+"""
+Benchmark of search responses with snippets against whole-content hits.
+
+Searches the generated dataset for `queries` words of the generator's
+VOCABULARY and requests one page of results from:
+
+* the search view, which fetches id and sort keys for every hit and loads
+  and serializes only the articles and posts on the page, with highlighted
+  snippets instead of their content
+* LegacySearchViewSet, the search as it was before: every hit loaded and
+  serialized with its whole content, then sorted and paginated
+
+and reports response size, latency and queries for both. Both must return
+the same hits in the same order.
+"""
+
+import random
+import time
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIRequestFactory
+
+from search.serializers import ArticleSearchSerializer, PostSearchSerializer, SearchQuerySerializer
+from search.views import SearchViewSet
+from wiki.models import Article
+
+from .generator import VOCABULARY, DatasetGenerator
+from .onlyop import stats
+from .runner import QueryCounter
+
+URL = '/api/search/search/search/'
+
+
+class LegacyArticleSerializer(ArticleSearchSerializer):
+    highlighted_title = None
+    snippets = None
+
+    class Meta(ArticleSearchSerializer.Meta):
+        fields = [
+            'id', 'title', 'content', 'type', 'url', 'author',
+            'category', 'tags', 'created_at', 'views_count', 'likes_count'
+        ]
+
+
+class LegacyPostSerializer(PostSearchSerializer):
+    highlighted_title = None
+    snippets = None
+
+    class Meta(PostSearchSerializer.Meta):
+        fields = [
+            'id', 'title', 'content', 'type', 'url', 'author',
+            'category', 'created_at', 'views_count', 'likes_count', 'comments_count'
+        ]
+
+
+class LegacySearchViewSet(SearchViewSet):
+    """The search action before snippets: every hit serialized with its content."""
+
+    def search(self, request):
+        query_serializer = SearchQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query_data = query_serializer.validated_data
+        query, search_type = query_data['q'], query_data['type']
+        context = {'request': request}
+        results = []
+        if search_type in ['all', 'articles']:
+            articles = self.search_articles(query, query_data).select_related('author', 'category')
+            results += LegacyArticleSerializer(articles.prefetch_related('tags'), many=True, context=context).data
+        if search_type in ['all', 'posts']:
+            posts = self.search_posts(query, query_data).select_related('author', 'category')
+            results += LegacyPostSerializer(posts, many=True, context=context).data
+        if search_type in ['all', 'users']:
+            results += self.search_users(query, query_data)
+        if search_type in ['all', 'categories']:
+            results += self.search_categories(query, query_data)
+        if search_type in ['all', 'tags']:
+            results += self.search_tags(query, query_data)
+        results = self.sort_results(results, query_data['sort_by'])
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(results, request)
+        return paginator.get_paginated_response({'results': page, 'total_results': len(results), 'query': query})
+
+
+def measure(view, params, repeat):
+    factory = APIRequestFactory()
+    samples, counter = [], QueryCounter()
+    for _ in range(repeat):
+        counter.count = 0
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = view(factory.get(URL, params))
+            response.render()
+        samples.append((time.perf_counter() - started) * 1000)
+    assert response.status_code == 200, response.status_code
+    hits = [(hit['type'], hit['id']) for hit in response.data['results']['results']]
+    return hits, samples, len(response.content), counter.count
+
+
+def run_snippets_benchmark(scale='small', queries=10, page_size=20, sort_by='relevance', repeat=5, seed=42,
+                           reuse=False, stdout=None, **overrides):
+    if not reuse or not Article.objects.filter(status='published').exists():
+        call_command('flush', verbosity=0, interactive=False)
+        DatasetGenerator(scale, seed, stdout=stdout, **overrides).generate()
+
+    views = {
+        'snippets': SearchViewSet.as_view({'get': 'search'}),
+        'full_content': LegacySearchViewSet.as_view({'get': 'search'}),
+    }
+    rng = random.Random(seed)
+    report = {name: {'ms': [], 'bytes': [], 'queries': []} for name in views}
+    per_query = []
+    for word in rng.sample(VOCABULARY, min(queries, len(VOCABULARY))):
+        params = {'q': word, 'page_size': page_size, 'sort_by': sort_by}
+        row = {'q': word}
+        pages = {}
+        for name, view in views.items():
+            pages[name], samples, size, count = measure(view, params, repeat)
+            report[name]['ms'] += samples
+            report[name]['bytes'].append(size)
+            report[name]['queries'].append(count)
+            row[name] = {'bytes': size, 'p50_ms': stats(samples)['p50']}
+        assert pages['snippets'] == pages['full_content'], word
+        row['hits_on_page'] = len(pages['snippets'])
+        per_query.append(row)
+
+    summary = {
+        name: {
+            'ms': stats(rows['ms']),
+            'mean_bytes': round(sum(rows['bytes']) / len(rows['bytes'])),
+            'max_queries': max(rows['queries']),
+        }
+        for name, rows in report.items()
+    }
+    legacy, current = summary['full_content'], summary['snippets']
+    return {
+        'articles': Article.objects.filter(status='published').count(),
+        'page_size': page_size,
+        'sort_by': sort_by,
+        **summary,
+        'bytes_saved': round(1 - current['mean_bytes'] / legacy['mean_bytes'], 3),
+        'speedup_p50': round(legacy['ms']['p50'] / current['ms']['p50'], 2),
+        'queries': per_query,
+    }
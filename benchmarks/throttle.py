@@ -0,0 +1,105 @@
+"""
+Microbenchmark of the throttle hot path.
+
+Times allow_request() for the throttles DRF runs on every request, against
+DRF's own cache-backed UserRateThrottle for comparison. Every case spreads
+calls over `keys` distinct users, so buckets are neither all hot nor all
+cold. Pass a Redis URL to also time the Lua bucket script over the network.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework import throttling as drf_throttling
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+
+from baidu_wiki.throttling import (
+    IPRateThrottle, LocalBuckets, RedisBuckets, UserRateThrottle, limiter, parse_rate,
+)
+
+from .runner import percentile
+
+User = get_user_model()
+
+
+class FakeView:
+    """Just enough of a view for throttles: an action and its scopes."""
+
+    def __init__(self, action, throttle_scopes):
+        self.action = action
+        self.throttle_scopes = throttle_scopes
+
+
+class DRFUserRateThrottle(drf_throttling.UserRateThrottle):
+    scope = 'like'
+
+
+def time_calls(call, iterations):
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter_ns()
+        call(i)
+        samples.append(time.perf_counter_ns() - started)
+    samples.sort()
+    return {
+        'calls': iterations,
+        'mean_us': round(sum(samples) / len(samples) / 1000, 3),
+        'p50_us': round(percentile(samples, 50) / 1000, 3),
+        'p99_us': round(percentile(samples, 99) / 1000, 3),
+    }
+
+
+def build_requests(keys):
+    factory = APIRequestFactory()
+    requests = []
+    for pk in range(1, keys + 1):
+        request = factory.post('/api/posts/posts/1/like/', REMOTE_ADDR=f"10.0.{pk // 256 % 256}.{pk % 256}")
+        request.user = User(pk=pk, email=f"u{pk}@example.com")
+        requests.append(request)
+    return requests
+
+
+def run_throttle_benchmark(iterations=100000, keys=1000, redis_url=None):
+    # Generous rates so the benchmark measures bookkeeping, not rejections
+    rates = dict(api_settings.DEFAULT_THROTTLE_RATES, like='1000000/s', like_ip='1000000/s')
+    api_settings.DEFAULT_THROTTLE_RATES.clear()
+    api_settings.DEFAULT_THROTTLE_RATES.update(rates)
+    DRFUserRateThrottle.THROTTLE_RATES = rates
+
+    requests = build_requests(keys)
+    scoped = FakeView('like', {'like': 'like'})
+    unscoped = FakeView('list', {'like': 'like'})
+    throttles = [UserRateThrottle(), IPRateThrottle()]
+    drf_throttle = DRFUserRateThrottle()
+    capacity, refill = parse_rate(rates['like'])
+    buckets = LocalBuckets()
+    limiter.local.clear()
+    cache.clear()
+
+    def check(view):
+        def call(i):
+            request = requests[i % keys]
+            for throttle in throttles:
+                throttle.allow_request(request, view)
+        return call
+
+    cases = {
+        'local-buckets.consume': lambda i: buckets.consume(f"like:u{i % keys}", capacity, refill),
+        'unscoped-view (2 throttles)': check(unscoped),
+        'scoped-view (2 throttles)': check(scoped),
+        'drf.UserRateThrottle (cache)': lambda i: drf_throttle.allow_request(requests[i % keys], scoped),
+    }
+    if redis_url:
+        import redis
+        redis_buckets = RedisBuckets(redis.Redis.from_url(redis_url))
+        cases['redis-buckets.consume'] = lambda i: redis_buckets.consume(
+            f"bench:like:u{i % keys}", capacity, refill,
+        )
+
+    report = {'iterations': iterations, 'keys': keys, 'cases': {}}
+    for name, call in cases.items():
+        time_calls(call, min(iterations, 1000))
+        report['cases'][name] = time_calls(call, iterations)
+    return report
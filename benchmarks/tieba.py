@@ -0,0 +1,150 @@
+"""
+Benchmark of a forum with a very large number of threads.
+
+Fills one Tieba with `posts` threads (a few pinned, some hidden), spread
+over a set of authors and with random last_reply_at times. It then times
+the forum listing endpoint from the first to the deepest served page,
+next to a plain COUNT(*) of the forum's visible threads, which the
+listing avoids by paginating on Tieba.posts_count. A second part times
+the "forums I joined" list for a member of `joined` forums, cold and from
+the cache.
+"""
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.utils import timezone
+
+from posts.models import Post
+from tieba.membership import forget_joined, get_joined
+from tieba.models import Tieba, TiebaMembership
+from tieba.views import ForumPostPagination
+
+from .runner import QueryCounter, percentile
+
+User = get_user_model()
+
+BATCH = 5000
+AUTHORS = 1000
+
+
+def stats(samples):
+    samples = sorted(samples)
+    return {
+        'mean': round(sum(samples) / len(samples), 3),
+        'p50': round(percentile(samples, 50), 3),
+        'p99': round(percentile(samples, 99), 3),
+    }
+
+
+def make_authors():
+    existing = list(User.objects.filter(username__startswith='tieba_bench_').values_list('pk', flat=True))
+    if len(existing) >= AUTHORS:
+        return existing[:AUTHORS]
+    User.objects.bulk_create(
+        [User(email=f"tieba_bench_{i}@example.com", username=f"tieba_bench_{i}") for i in range(len(existing), AUTHORS)],
+        batch_size=BATCH,
+    )
+    return list(User.objects.filter(username__startswith='tieba_bench_').values_list('pk', flat=True))
+
+
+def fill_forum(posts, rng, authors, stdout):
+    owner = authors[0]
+    Tieba.objects.filter(name='benchmark').delete()
+    tieba = Tieba.objects.create(name='benchmark', owner_id=owner, members_count=1)
+    TiebaMembership.objects.create(tieba=tieba, user_id=owner, role='owner')
+
+    now = timezone.now()
+    started = time.perf_counter()
+    for start in range(0, posts, BATCH):
+        rows = []
+        for i in range(start, min(posts, start + BATCH)):
+            created = now - timedelta(seconds=rng.randrange(365 * 86400))
+            rows.append(Post(
+                title=f"thread {i}", content='bench', author_id=rng.choice(authors), tieba=tieba,
+                status='published', is_approved=rng.random() > 0.01, is_pinned=i < 5,
+                created_at=created, last_reply_at=created + timedelta(seconds=rng.randrange(86400)),
+            ))
+        with transaction.atomic():
+            Post.objects.bulk_create(rows)
+        if stdout and (start // BATCH) % 20 == 0:
+            stdout.write(f"  stored {min(posts, start + BATCH)}/{posts} threads\n")
+    Tieba.objects.filter(pk=tieba.pk).update(posts_count=posts)
+    tieba.posts_count = posts
+    return tieba, time.perf_counter() - started
+
+
+def time_listing(client, tieba, pages, requests):
+    report = {}
+    counter = QueryCounter()
+    for page in pages:
+        latencies = []
+        for _ in range(requests):
+            counter.count = 0
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                response = client.get(f"/api/tieba/tiebas/{tieba.pk}/posts/", {'page': page})
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+        report[f"page_{page}"] = dict(stats(latencies), queries=counter.count)
+    return report
+
+
+def time_joined(authors, joined, requests, rng):
+    member = authors[-1]
+    TiebaMembership.objects.filter(user_id=member).delete()
+    Tieba.objects.filter(name__startswith='joined-bench-').delete()
+    tiebas = Tieba.objects.bulk_create(
+        [Tieba(name=f"joined-bench-{i}", owner_id=authors[0]) for i in range(joined)]
+    )
+    if tiebas[0].pk is None:
+        tiebas = list(Tieba.objects.filter(name__startswith='joined-bench-'))
+    TiebaMembership.objects.bulk_create(
+        [TiebaMembership(tieba=tieba, user_id=member, role=rng.choice(['member', 'moderator'])) for tieba in tiebas]
+    )
+
+    cold, warm = [], []
+    for _ in range(requests):
+        forget_joined(member)
+        started = time.perf_counter()
+        get_joined(member)
+        cold.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        get_joined(member)
+        warm.append((time.perf_counter() - started) * 1000)
+    return {'forums': joined, 'uncached_ms': stats(cold), 'cached_ms': stats(warm)}
+
+
+def run_tieba_benchmark(posts=1000000, requests=20, joined=200, seed=42, reuse=False, stdout=None):
+    rng = random.Random(seed)
+    cache.clear()
+    authors = make_authors()
+    tieba = Tieba.objects.filter(name='benchmark').first() if reuse else None
+    fill_seconds = None
+    if tieba is None:
+        tieba, fill_seconds = fill_forum(posts, rng, authors, stdout)
+
+    visible = Post.objects.filter(tieba=tieba, status='published', is_approved=True)
+    listing = visible.order_by('-is_pinned', '-last_reply_at')
+    count_ms = []
+    for _ in range(max(1, requests // 4)):
+        started = time.perf_counter()
+        visible.count()
+        count_ms.append((time.perf_counter() - started) * 1000)
+
+    # The deepest page the listing serves; OFFSET walks everything before it
+    last_page = max(2, min(tieba.posts_count // 20, ForumPostPagination.max_pages))
+    client = Client()
+    return {
+        'posts': tieba.posts_count,
+        'fill_seconds': round(fill_seconds, 1) if fill_seconds is not None else None,
+        'query_plan': listing[:20].explain(),
+        'listing_ms': time_listing(client, tieba, sorted({1, 10, 100, last_page}), requests),
+        'count_star_ms': stats(count_ms),
+        'joined': time_joined(authors, joined, requests, rng),
+    }
@@ -0,0 +1,93 @@
+"""
+Throughput of the sensitive word filter.
+
+Builds an automaton from `words` random CJK words and scans `megabytes` of
+generated post text with a few of them planted, disguised with full-width
+forms, traditional characters and inserted spaces. Normalization and the
+automaton scan are timed separately, against the naive `word in text` loop
+over the same normalized text. Everything runs in memory; the word list is
+not written to the database.
+"""
+
+import random
+import time
+
+from posts.wordfilter import Automaton, normalize
+
+from .generator import paragraphs
+
+DISGUISES = (
+    lambda word: ' '.join(word),
+    lambda word: '*'.join(word),
+    lambda word: word.replace('赌', '賭').replace('钱', '錢'),
+    lambda word: ''.join(chr(ord(c) + 0xFEE0) if '!' <= c <= '~' else c for c in word),
+)
+
+
+def random_words(rng, count):
+    words = {'赌钱', 'vpn'}
+    while len(words) < count:
+        words.add(''.join(chr(rng.randrange(0x4E00, 0x9FA5)) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def build_text(rng, megabytes, words, planted):
+    chunks, size = [], 0
+    target = int(megabytes * 1024 * 1024)
+    while size < target:
+        chunk = paragraphs(rng, 2)
+        if rng.random() < planted:
+            word = rng.choice(words[:50])
+            chunk += rng.choice(DISGUISES)(word)
+        chunks.append(chunk)
+        size += len(chunk.encode())
+    return ''.join(chunks), size
+
+
+def timed(call, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_wordfilter_benchmark(words=5000, megabytes=4.0, naive_words=None, repeat=3, seed=42):
+    rng = random.Random(seed)
+    word_list = random_words(rng, words)
+    text, size = build_text(rng, megabytes, word_list, planted=0.05)
+    mb = size / (1024 * 1024)
+
+    normalize('')  # build the translation table outside the timings
+    started = time.perf_counter()
+    automaton = Automaton({normalize(word): 'block' for word in word_list})
+    build_seconds = time.perf_counter() - started
+
+    normalize_seconds, normalized = timed(lambda: normalize(text), repeat)
+    scan_seconds, matches = timed(lambda: sum(1 for _ in automaton.search(normalized)), repeat)
+
+    # The naive loop is slow enough to time on a subset and scale up
+    naive_words = min(naive_words or words, words)
+    subset = [normalize(word) for word in word_list[:naive_words]]
+    naive_seconds, naive_hits = timed(lambda: sum(1 for word in subset if word in normalized), 1)
+    naive_seconds *= words / naive_words
+
+    def throughput(seconds):
+        return round(mb / seconds, 2) if seconds else None
+
+    return {
+        'words': words,
+        'automaton_states': len(automaton.goto),
+        'build_seconds': round(build_seconds, 3),
+        'text_mb': round(mb, 2),
+        'matches': matches,
+        'mb_per_second': {
+            'normalize': throughput(normalize_seconds),
+            'automaton_scan': throughput(scan_seconds),
+            'normalize_and_scan': throughput(normalize_seconds + scan_seconds),
+            'naive_in_loop': throughput(naive_seconds),
+        },
+        'naive_words_timed': naive_words,
+    }
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from .models import Conversation, ConversationMember, Message
+
+
+class ConversationMemberInline(admin.TabularInline):
+    model = ConversationMember
+    extra = 0
+    raw_id_fields = ['user', 'peer']
+    readonly_fields = ['last_message_at', 'unread_count', 'last_read_at', 'joined_at']
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'messages_count', 'last_message_at', 'created_at']
+    search_fields = ['key']
+    raw_id_fields = ['last_message']
+    readonly_fields = ['messages_count', 'last_message_at', 'created_at']
+    inlines = [ConversationMemberInline]
+
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ['conversation', 'sender', 'created_at']
+    search_fields = ['content', 'sender__username']
+    raw_id_fields = ['conversation', 'sender']
+    readonly_fields = ['created_at']
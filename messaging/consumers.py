@@ -0,0 +1,42 @@
+"""
+Websocket delivery of private messages.
+
+A signed-in user's sockets join their group (inbox.user_group), which
+messaging/inbox.py sends to once a message or a read commits. Messages
+are sent over HTTP, where they are validated and throttled; the socket
+only pushes events down:
+
+    {"type": "unread", "unread": 3}                   on connect
+    {"type": "message.new", "conversation": 7, "message": {...}, "unread": 1}
+    {"type": "message.read", "conversation": 7}       read on another device
+"""
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from . import inbox
+
+
+class MessageConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes new messages and read markers to the user's open sockets."""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+        self.group = inbox.user_group(user.pk)
+        await self.channel_layer.group_add(self.group, self.channel_name)
+        await self.accept()
+        unread = await database_sync_to_async(inbox.unread_total)(user.pk)
+        await self.send_json({'type': 'unread', 'unread': unread})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group'):
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def message_new(self, event):
+        await self.send_json(event)
+
+    async def message_read(self, event):
+        await self.send_json(event)
@@ -0,0 +1,132 @@
+"""
+Private messages (私信): conversations, inboxes and unread counts.
+
+Each participant has a ConversationMember row that is their inbox entry.
+Sending a message copies its time to every member row and increments the
+recipients' unread_count in the same transaction, so:
+
+- "my conversations", latest first, is a range scan of the user's visible
+  rows on (user, -last_message_at), paged with a cursor, instead of a
+  MAX(created_at) over every message of every conversation they are in;
+- a conversation's unread count is a column read, and the user's total is
+  a SUM over only the rows with unread messages (a partial index), never a
+  COUNT over messages.
+
+Once the transaction commits, the new message is pushed to the members'
+channel layer groups, which every websocket the user has open joined
+(messaging/consumers.py). Delivery is best effort: a recipient who is
+offline, or a channel layer that is down, still finds the message in
+their inbox on the next load.
+"""
+
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Conversation, ConversationMember, Message
+from .serializers import MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def direct_key(user_id, other_id):
+    low, high = sorted((user_id, other_id))
+    return f"direct:{low}:{high}"
+
+
+def user_group(user_id):
+    """Channel layer group of a user's open websockets."""
+    return f"messages.user.{user_id}"
+
+
+def open_direct(user, other):
+    """
+    The one-to-one conversation between two users; returns (member, created).
+
+    `member` is the caller's inbox row. A new conversation shows in the
+    other user's inbox only once it has a message.
+    """
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(key=direct_key(user.pk, other.pk))
+        if created:
+            ConversationMember.objects.bulk_create([
+                ConversationMember(conversation=conversation, user=user, peer=other),
+                ConversationMember(conversation=conversation, user=other, peer=user, is_hidden=True),
+            ])
+        else:
+            ConversationMember.objects.filter(conversation=conversation, user=user).update(is_hidden=False)
+    member = ConversationMember.objects.select_related('peer', 'conversation__last_message').get(
+        conversation=conversation, user=user,
+    )
+    return member, created
+
+
+def send(conversation, sender, content):
+    """Add a message, update every member's inbox row and deliver it after commit."""
+    with transaction.atomic():
+        message = Message.objects.create(conversation=conversation, sender=sender, content=content)
+        now = message.created_at
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message=message, last_message_at=now, messages_count=F('messages_count') + 1,
+        )
+        members = ConversationMember.objects.filter(conversation=conversation)
+        members.exclude(user=sender).update(
+            last_message_at=now, unread_count=F('unread_count') + 1, is_hidden=False,
+        )
+        # Sending implies having read everything before it
+        members.filter(user=sender).update(last_message_at=now, unread_count=0, last_read_at=now, is_hidden=False)
+        unread = dict(members.values_list('user_id', 'unread_count'))
+    payload = dict(MessageSerializer(message).data)
+    transaction.on_commit(lambda: deliver({
+        user_id: {
+            'type': 'message.new',
+            'conversation': conversation.pk,
+            'message': payload,
+            'unread': count,
+        }
+        for user_id, count in unread.items()
+    }))
+    return message
+
+
+def mark_read(member):
+    """Clear a member's unread count; tells their other devices."""
+    now = timezone.now()
+    updated = ConversationMember.objects.filter(pk=member.pk, unread_count__gt=0).update(
+        unread_count=0, last_read_at=now,
+    )
+    member.unread_count, member.last_read_at = 0, now
+    if updated:
+        transaction.on_commit(lambda: deliver({
+            member.user_id: {'type': 'message.read', 'conversation': member.conversation_id},
+        }))
+    return member
+
+
+def hide(member):
+    """Remove a conversation from the user's inbox until its next message."""
+    ConversationMember.objects.filter(pk=member.pk).update(is_hidden=True, unread_count=0, last_read_at=timezone.now())
+
+
+def unread_total(user_id):
+    """Unread messages over all of a user's conversations."""
+    return (
+        ConversationMember.objects.filter(user_id=user_id, unread_count__gt=0)
+        .aggregate(total=Sum('unread_count'))['total'] or 0
+    )
+
+
+def deliver(events):
+    """Send {user_id: event} to the users' open websockets."""
+    layer = get_channel_layer()
+    if layer is None:
+        return
+    try:
+        for user_id, event in events.items():
+            async_to_sync(layer.group_send)(user_group(user_id), event)
+    except Exception as exc:
+        logger.warning('Could not deliver messages over the channel layer: %s', exc)
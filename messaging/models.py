@@ -0,0 +1,90 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class Conversation(models.Model):
+    """A private conversation (私信) between users."""
+    
+    # 'direct:<lower user id>:<higher user id>' for one-to-one
+    # conversations, so each pair of users has exactly one
+    key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    last_message = models.ForeignKey('Message', on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='+')
+    last_message_at = models.DateTimeField(default=timezone.now)
+    messages_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('conversation')
+        verbose_name_plural = _('conversations')
+        ordering = ['-last_message_at']
+    
+    def __str__(self):
+        return self.key or f"Conversation {self.pk}"
+
+
+class ConversationMember(models.Model):
+    """
+    A participant's row for a conversation: their inbox entry.
+    
+    last_message_at is copied from the conversation on every message so a
+    user's inbox is a range scan of their visible rows on (user,
+    -last_message_at), and unread_count is incremented as messages arrive
+    instead of counted.
+    See messaging/inbox.py.
+    """
+    
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='members')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_memberships')
+    # The other participant of a one-to-one conversation, so the inbox
+    # shows who it is with without looking at the other member rows
+    peer = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    last_message_at = models.DateTimeField(default=timezone.now)
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    # Removed from the inbox until the next message arrives
+    is_hidden = models.BooleanField(default=False)
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('conversation member')
+        verbose_name_plural = _('conversation members')
+        ordering = ['-last_message_at']
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_member'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at'], condition=Q(is_hidden=False),
+                         name='conversation_member_inbox'),
+            # Only conversations with unread messages, for the unread total
+            models.Index(fields=['user', 'unread_count'], condition=Q(unread_count__gt=0),
+                         name='conversation_member_unread'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} in {self.conversation}"
+
+
+class Message(models.Model):
+    """A message in a conversation."""
+    
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages')
+    sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
+    content = models.TextField(_('content'), max_length=2000)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = _('message')
+        verbose_name_plural = _('messages')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['conversation', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.sender}: {self.content[:50]}"
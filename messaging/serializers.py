@@ -0,0 +1,46 @@
+from rest_framework import serializers
+from django.contrib.auth import get_user_model
+from posts.serializers import UserSimpleSerializer, check_words
+from .models import ConversationMember, Message
+
+User = get_user_model()
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    """A message in a conversation's history."""
+    
+    class Meta:
+        model = Message
+        fields = ['id', 'conversation', 'sender', 'content', 'created_at']
+        read_only_fields = ['id', 'conversation', 'sender', 'created_at']
+    
+    def validate_content(self, value):
+        value = value.strip()
+        if not value:
+            raise serializers.ValidationError('Message cannot be empty.')
+        check_words(value)
+        return value
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """A conversation as it shows in the user's inbox."""
+    
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    peer = UserSimpleSerializer(read_only=True)
+    last_message = MessageSerializer(source='conversation.last_message', read_only=True)
+    
+    class Meta:
+        model = ConversationMember
+        fields = ['id', 'peer', 'last_message', 'last_message_at', 'unread_count', 'last_read_at']
+        read_only_fields = fields
+
+
+class ConversationCreateSerializer(serializers.Serializer):
+    """Open the conversation with another user."""
+    
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.filter(is_active=True))
+    
+    def validate_user(self, value):
+        if value == self.context['request'].user:
+            raise serializers.ValidationError('You cannot message yourself.')
+        return value
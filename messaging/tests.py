@@ -0,0 +1,46 @@
+from rest_framework.test import APIClient
+
+from baidu_wiki.testing import QueryBudgetTestCase, assert_query_budget, create_users, rows_over_budget
+
+from . import inbox
+from .views import ConversationViewSet
+
+
+class ConversationQueryBudgetTests(QueryBudgetTestCase):
+    """Inbox endpoints stay within their query_budgets however many conversations there are."""
+
+    rows = rows_over_budget(ConversationViewSet)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, = create_users('reader', 1)
+        cls.members = []
+        for i, other in enumerate(create_users('friend', cls.rows)):
+            member, created = inbox.open_direct(cls.user, other)
+            for n in range(cls.rows):
+                inbox.send(member.conversation, other, f'Message {n} from friend {i}')
+            cls.members.append(member)
+        cls.conversation = cls.members[0].conversation
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_conversation_list(self):
+        response = assert_query_budget(self.client, 'get', '/api/messages/conversations/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conversation_retrieve(self):
+        response = assert_query_budget(self.client, 'get', f'/api/messages/conversations/{self.conversation.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_conversation_messages(self):
+        response = assert_query_budget(
+            self.client, 'get', f'/api/messages/conversations/{self.conversation.pk}/messages/'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_unread(self):
+        response = assert_query_budget(self.client, 'get', '/api/messages/conversations/unread/')
+        self.assertEqual(response.status_code, 200)
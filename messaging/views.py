@@ -0,0 +1,100 @@
+from rest_framework import mixins, viewsets, status, permissions
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from django.shortcuts import get_object_or_404
+from . import inbox
+from .models import ConversationMember, Message
+from .serializers import ConversationSerializer, ConversationCreateSerializer, MessageSerializer
+
+
+class InboxPagination(CursorPagination):
+    """The user's conversations, latest message first."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-last_message_at'
+
+
+class MessageHistoryPagination(CursorPagination):
+    """
+    A conversation's messages, newest first.
+    
+    A cursor keeps each page an index range scan on (conversation,
+    -created_at) however far back the user scrolls, and new messages
+    arriving meanwhile do not shift the pages already loaded.
+    """
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+class ConversationViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.DestroyModelMixin,
+                          viewsets.GenericViewSet):
+    """The user's private conversations (私信) and their messages."""
+    
+    serializer_class = ConversationSerializer
+    pagination_class = InboxPagination
+    permission_classes = [permissions.IsAuthenticated]
+    # Cursor pagination fixes the ordering
+    filter_backends = []
+    lookup_field = 'conversation_id'
+    lookup_url_kwarg = 'pk'
+    query_budgets = {'list': 2, 'retrieve': 2, 'messages': 3, 'unread': 2}
+    throttle_scopes = {'create': 'follow', 'send_message': 'message'}
+    
+    def get_queryset(self):
+        """The user's inbox rows; hidden conversations only by id."""
+        queryset = ConversationMember.objects.filter(user=self.request.user).select_related(
+            'peer', 'conversation__last_message',
+        )
+        if self.action == 'list':
+            queryset = queryset.filter(is_hidden=False)
+        return queryset
+    
+    def create(self, request):
+        """Open (or reopen) the conversation with another user."""
+        serializer = ConversationCreateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        member, created = inbox.open_direct(request.user, serializer.validated_data['user'])
+        return Response(
+            self.get_serializer(member).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+    
+    def perform_destroy(self, instance):
+        """Remove the conversation from the inbox; it comes back with the next message."""
+        inbox.hide(instance)
+    
+    @action(detail=True, methods=['get'])
+    def messages(self, request, pk=None):
+        """The conversation's messages, newest first."""
+        member = get_object_or_404(ConversationMember, conversation_id=pk, user=request.user)
+        paginator = MessageHistoryPagination()
+        page = paginator.paginate_queryset(
+            Message.objects.filter(conversation_id=member.conversation_id), request, view=self
+        )
+        return paginator.get_paginated_response(MessageSerializer(page, many=True).data)
+    
+    @messages.mapping.post
+    def send_message(self, request, pk=None):
+        """Send a message to the conversation."""
+        member = get_object_or_404(
+            ConversationMember.objects.select_related('conversation'), conversation_id=pk, user=request.user
+        )
+        serializer = MessageSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        message = inbox.send(member.conversation, request.user, serializer.validated_data['content'])
+        return Response(MessageSerializer(message).data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        """Mark the conversation read."""
+        member = inbox.mark_read(self.get_object())
+        return Response(self.get_serializer(member).data)
+    
+    @action(detail=False, methods=['get'])
+    def unread(self, request):
+        """Unread messages over all the user's conversations."""
+        return Response({'unread': inbox.unread_total(request.user.pk)})
@@ -2,8 +2,9 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     PostCategory, Post, PostLike, PostComment, CommentLike, 
-    PostShare, PostReport, PostTag
+    PostShare, PostReport, PostTag, ModerationItem, SensitiveWord
 )
+from .wordfilter import bump_version
 
 
 @admin.register(PostCategory)
@@ -167,4 +168,26 @@ class PostReportAdmin(admin.ModelAdmin):
 class PostTagAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug']
     search_fields = ['name']
-    prepopulated_fields = {'slug': ('name',)}
\ No newline at end of file
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(ModerationItem)
+class ModerationItemAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'status', 'reports_count', 'reporters_count', 'priority', 'is_hidden', 'last_reported_at']
+    list_filter = ['status', 'is_hidden', 'flag_reason']
+    ordering = ['-priority']
+    raw_id_fields = ['post', 'comment', 'resolved_by']
+    readonly_fields = ['first_reported_at', 'last_reported_at']
+
+
+@admin.register(SensitiveWord)
+class SensitiveWordAdmin(admin.ModelAdmin):
+    list_display = ['word', 'level', 'is_active', 'created_at']
+    list_filter = ['level', 'is_active']
+    list_editable = ['level', 'is_active']
+    search_fields = ['word']
+    
+    def delete_queryset(self, request, queryset):
+        # Bulk deletes skip SensitiveWord.delete()
+        super().delete_queryset(request, queryset)
+        bump_version()
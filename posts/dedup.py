@@ -0,0 +1,187 @@
+"""
+Near-duplicate detection for posts and comments.
+
+Content is normalized (NFKC, lower case, punctuation and whitespace
+removed) and cut into overlapping character shingles, which works for
+Chinese text without word segmentation. A MinHash signature of NUM_PERM
+slots estimates the Jaccard similarity of two shingle sets. It is built
+by one permutation hashing, so each shingle is hashed once, not NUM_PERM
+times, and a 2000-character comment takes about 2 ms. The signature
+is split into BANDS bands of ROWS slots, and each band hashes to a
+FingerprintBand row. Two texts with similarity s share at least one band
+with probability 1 - (1 - s**ROWS)**BANDS: 0.99 at s=0.7 but only 0.12 at
+s=0.3. A lookup is therefore one indexed IN query over BANDS keys, however
+many fingerprints are stored. The few candidates it returns are then
+compared slot by slot.
+
+Only fingerprints from the last DEDUP_WINDOW_HOURS are matched;
+prune_content_fingerprints deletes older ones, and forget_content() those
+of deleted posts and comments.
+"""
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ContentFingerprint, FingerprintBand
+
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Long posts are fingerprinted on their first MAX_CHARS characters
+MAX_CHARS = 2000
+MAX_CANDIDATES = 50
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_MIX = _rng.randrange(1, _PRIME)
+# Every bin minimum is below this, so a borrowed one offset by its distance
+# stays unique to that distance
+_BIN_RANGE = _PRIME // NUM_PERM + 1
+_PACK = struct.Struct(f'<{NUM_PERM}Q')
+_STRIP = re.compile(r'[\W_]+', re.UNICODE)
+
+
+def normalize(text):
+    return _STRIP.sub('', unicodedata.normalize('NFKC', text or '').lower())[:MAX_CHARS]
+
+
+def shingles(text):
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text):
+    """
+    MinHash signature (tuple of NUM_PERM ints) of normalized text.
+
+    Each shingle hash falls in one of NUM_PERM bins and each bin keeps its
+    minimum. An empty bin borrows the minimum of the next bin that has one,
+    offset by the distance, so similar texts fill their empty bins alike.
+    """
+    hashes = {zlib.crc32(shingle.encode()) * _MIX % _PRIME for shingle in shingles(text)}
+    if not hashes:
+        return None
+    bins = [None] * NUM_PERM
+    for h in hashes:
+        slot, value = h % NUM_PERM, h // NUM_PERM
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    signature = []
+    for slot in range(NUM_PERM):
+        distance = 0
+        while bins[(slot + distance) % NUM_PERM] is None:
+            distance += 1
+        signature.append(bins[(slot + distance) % NUM_PERM] + distance * _BIN_RANGE)
+    return tuple(signature)
+
+
+def band_keys(signature):
+    """Signed 64-bit key for each band, so they fit a BigIntegerField."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f'<I{ROWS}Q', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def pack(signature):
+    return _PACK.pack(*signature)
+
+
+def unpack(data):
+    return _PACK.unpack(bytes(data))
+
+
+@dataclass
+class Screening:
+    """Result of checking a text: its signature and the closest recent match."""
+
+    signature: tuple = None
+    kind: str = None
+    object_id: int = None
+    similarity: float = 0.0
+    # Set by callers that also run other checks, e.g. the word filter
+    needs_review: bool = False
+
+    @property
+    def is_duplicate(self):
+        return self.object_id is not None
+
+
+def dedup_settings():
+    return (
+        getattr(settings, 'DEDUP_THRESHOLD', 0.7),
+        getattr(settings, 'DEDUP_WINDOW_HOURS', 72),
+        getattr(settings, 'DEDUP_MIN_LENGTH', 20),
+    )
+
+
+def find_duplicate(content, exclude=None):
+    """
+    Fingerprint content and look for a recent near-duplicate; `exclude` is
+    the (kind, object id) of an edited post or comment, so it is not
+    matched against its own previous version.
+    """
+    threshold, window_hours, min_length = dedup_settings()
+    text = normalize(content)
+    if len(text) < min_length:
+        return Screening()
+    signature = minhash(text)
+    result = Screening(signature=signature)
+
+    candidates = (
+        ContentFingerprint.objects
+        .filter(bands__band__in=band_keys(signature),
+                created_at__gte=timezone.now() - timedelta(hours=window_hours))
+        .distinct()
+    )
+    if exclude is not None:
+        candidates = candidates.exclude(kind=exclude[0], object_id=exclude[1])
+    candidates = candidates.values_list('kind', 'object_id', 'signature')[:MAX_CANDIDATES]
+    for kind, object_id, stored in candidates:
+        score = similarity(signature, unpack(stored))
+        if score >= threshold and score > result.similarity:
+            result.kind, result.object_id, result.similarity = kind, object_id, score
+    return result
+
+
+def index_content(kind, obj, signature, replace=False):
+    """Store the fingerprint of a saved post or comment; replace=True after an edit."""
+    if replace:
+        ContentFingerprint.objects.filter(kind=kind, object_id=obj.pk).delete()
+    if signature is None:
+        return None
+    fingerprint = ContentFingerprint.objects.create(
+        kind=kind, object_id=obj.pk, author_id=obj.author_id, signature=pack(signature),
+    )
+    FingerprintBand.objects.bulk_create(
+        FingerprintBand(fingerprint=fingerprint, band=key) for key in band_keys(signature)
+    )
+    return fingerprint
+
+
+def forget_content(kind, object_ids):
+    """Delete the fingerprints of deleted posts or comments, so they stop matching."""
+    ContentFingerprint.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def dedup_action():
+    """'reject' refuses duplicates; 'flag' saves them unapproved for moderators."""
+    return getattr(settings, 'DEDUP_ACTION', 'flag')
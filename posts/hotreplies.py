@@ -0,0 +1,95 @@
+"""
+Hot replies (神回复): the most liked comments of a thread, shown above it.
+
+Sorting a post's comments by likes_count on every view reads all of them,
+so each post keeps a capped sorted set of its most liked comments instead
+(baidu_wiki/sortedset.py). A like writes the comment's new count into the
+set, O(log K) for a set of K, and viewing the post reads the top of it.
+
+The set holds HOT_REPLIES_CANDIDATES comments, more than the
+HOT_REPLIES_COUNT shown. A comment that drops out is re-added with its
+full count by its next like; it is only missed if comments above it lose
+enough likes to fall below it, which the spare candidates make rare.
+Sets expire after HOT_REPLIES_TTL and are then rebuilt from the database,
+so any such drift (or a like lost while Redis was down) is reconciled;
+reconcile_hot_replies rebuilds recently active threads in bulk.
+
+Rebuilding is one query on the (post, -likes_count) index. A marker
+member keeps the set of a thread without hot replies from reading as
+missing, and so from being rebuilt on every view.
+"""
+
+from django.conf import settings
+
+from baidu_wiki.sortedset import sorted_sets
+
+from .models import PostComment
+
+MARKER = '-'
+
+
+def get_settings():
+    return (
+        getattr(settings, 'HOT_REPLIES_COUNT', 3),
+        getattr(settings, 'HOT_REPLIES_CANDIDATES', 20),
+        getattr(settings, 'HOT_REPLIES_MIN_LIKES', 3),
+        getattr(settings, 'HOT_REPLIES_TTL', 60 * 60),
+    )
+
+
+def hot_key(post_id):
+    return f"hot_replies:{post_id}"
+
+
+def rebuild(post_id):
+    """Refill a post's set from the database; returns the candidate ids."""
+    _, candidates, min_likes, ttl = get_settings()
+    rows = (
+        PostComment.objects.filter(post_id=post_id, is_approved=True, likes_count__gte=min_likes)
+        .order_by('-likes_count', 'pk').values_list('pk', 'likes_count')[:candidates]
+    )
+    scores = {str(pk): likes for pk, likes in rows}
+    sorted_sets.replace(hot_key(post_id), dict(scores, **{MARKER: -1}), limit=candidates + 1, ttl=ttl)
+    return [int(pk) for pk in scores]
+
+
+def record_likes(comment):
+    """Put a comment's new likes_count into its post's set, if the set is loaded."""
+    _, candidates, min_likes, _ = get_settings()
+    key = hot_key(comment.post_id)
+    if comment.is_approved and comment.likes_count >= min_likes:
+        # A missing set is rebuilt on the next view; adding to it here would
+        # make one comment look like the whole set
+        if sorted_sets.exists(key):
+            sorted_sets.add(key, {str(comment.pk): comment.likes_count}, limit=candidates + 1)
+    else:
+        sorted_sets.remove(key, str(comment.pk))
+
+
+def forget(post_id, *comment_ids):
+    """Drop deleted or hidden comments from a post's set."""
+    sorted_sets.remove(hot_key(post_id), *[str(pk) for pk in comment_ids])
+
+
+def hot_replies(post_id, queryset=None):
+    """
+    The post's hot replies, most liked first, loaded through `queryset`.
+
+    Comments that were deleted or hidden since they entered the set are
+    dropped from it.
+    """
+    count, _, min_likes, _ = get_settings()
+    key = hot_key(post_id)
+    if not sorted_sets.exists(key):
+        rebuild(post_id)
+    ids = [int(member) for member, score in sorted_sets.top(key, count) if member != MARKER and score >= min_likes]
+    if not ids:
+        return []
+    if queryset is None:
+        queryset = PostComment.objects.select_related('author')
+    comments = queryset.filter(pk__in=ids, is_approved=True).in_bulk()
+    stale = [pk for pk in ids if pk not in comments]
+    if stale:
+        forget(post_id, *stale)
+    # The database count is authoritative for display order
+    return sorted(comments.values(), key=lambda comment: (-comment.likes_count, comment.pk))
@@ -0,0 +1,58 @@
+from posts.models import Post
+from wiki.bulk import BaseExportCommand, keyset_chunks
+
+FIELDS = [
+    'title', 'content', 'author__username', 'author__email', 'category__slug',
+    'status', 'post_type', 'is_pinned', 'is_featured', 'views_count',
+    'likes_count', 'comments_count', 'created_at', 'published_at',
+]
+
+
+class Command(BaseExportCommand):
+    """Stream-export community posts in the format read by import_posts."""
+
+    help = 'Stream-export community posts to JSONL or CSV.'
+    label = 'posts'
+    fieldnames = [
+        'id', 'title', 'content', 'author', 'category', 'tags', 'status',
+        'post_type', 'is_pinned', 'is_featured', 'views_count', 'likes_count',
+        'comments_count', 'created_at', 'published_at',
+    ]
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--status', default=None, help='Only export posts with this status.')
+
+    def iter_chunks(self, chunk_size):
+        queryset = Post.objects.all()
+        if self.options['status']:
+            queryset = queryset.filter(status=self.options['status'])
+
+        through = Post.tags.through
+        for rows in keyset_chunks(queryset, chunk_size, FIELDS):
+            tags = {}
+            for post_id, name in through.objects.filter(
+                post_id__in=[row['pk'] for row in rows]
+            ).values_list('post_id', 'posttag__name'):
+                tags.setdefault(post_id, []).append(name)
+
+            yield [
+                {
+                    'id': row['pk'],
+                    'title': row['title'],
+                    'content': row['content'],
+                    'author': row['author__username'] or row['author__email'],
+                    'category': row['category__slug'],
+                    'tags': tags.get(row['pk'], []),
+                    'status': row['status'],
+                    'post_type': row['post_type'],
+                    'is_pinned': row['is_pinned'],
+                    'is_featured': row['is_featured'],
+                    'views_count': row['views_count'],
+                    'likes_count': row['likes_count'],
+                    'comments_count': row['comments_count'],
+                    'created_at': row['created_at'],
+                    'published_at': row['published_at'],
+                }
+                for row in rows
+            ]
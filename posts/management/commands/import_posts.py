@@ -0,0 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Post, PostCategory, PostTag
+from wiki.bulk import (
+    AuthorCache, BaseImportCommand, bulk_create_with_pks,
+    parse_bool, parse_date, parse_tags,
+)
+from wiki.tagging import resolve_tags
+
+User = get_user_model()
+
+UPDATE_FIELDS = [
+    'title', 'content', 'author', 'category', 'status', 'post_type',
+    'is_pinned', 'is_featured', 'published_at', 'updated_at',
+]
+STATUSES = {choice for choice, label in Post.STATUS_CHOICES}
+TYPES = {choice for choice, label in Post.TYPE_CHOICES}
+
+
+class Command(BaseImportCommand):
+    """
+    Stream-import community posts from JSONL or CSV.
+
+    Each record may contain: id, title, content, author (username or email),
+    category (post category slug), tags, status, post_type, is_pinned,
+    is_featured and published_at. Records carrying an id that already exists
+    are skipped unless --update-existing is given.
+    """
+
+    help = 'Stream-import community posts from a JSONL or CSV dump.'
+    label = 'posts'
+
+    def prepare(self):
+        self.authors = AuthorCache(User, self.options['default_author'])
+        self.categories = dict(PostCategory.objects.values_list('slug', 'id'))
+        self.explicit_ids = False
+
+    def finish(self):
+        # Rows inserted with explicit ids leave the pk sequence behind on PostgreSQL
+        if self.explicit_ids:
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Post]):
+                    cursor.execute(sql)
+
+    def get_category_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self.categories:
+            category, created = PostCategory.objects.get_or_create(slug=slug, defaults={'name': slug})
+            self.categories[slug] = category.id
+        return self.categories[slug]
+
+    def import_chunk(self, records):
+        now = timezone.now()
+        stats = {'created': 0, 'updated': 0, 'skipped': 0}
+
+        self.authors.load(record.get('author') for record in records)
+
+        explicit = {int(record['id']) for record in records if str(record.get('id') or '').isdigit()}
+        existing = set(Post.objects.filter(pk__in=explicit).values_list('pk', flat=True)) if explicit else set()
+
+        to_create, to_update, tagged = [], [], []
+        for record in records:
+            title = (record.get('title') or '').strip()
+            author_id = self.authors.get(record.get('author'))
+            if not title or author_id is None:
+                stats['skipped'] += 1
+                continue
+
+            status = record.get('status') or 'draft'
+            if status not in STATUSES:
+                status = 'draft'
+            post_type = record.get('post_type') or 'discussion'
+            if post_type not in TYPES:
+                post_type = 'discussion'
+            published_at = parse_date(record.get('published_at'))
+            if status == 'published' and not published_at:
+                published_at = now
+
+            post = Post(
+                title=title[:200],
+                content=record.get('content') or '',
+                author_id=author_id,
+                category_id=self.get_category_id(record.get('category')),
+                status=status,
+                post_type=post_type,
+                is_pinned=parse_bool(record.get('is_pinned', False)),
+                is_featured=parse_bool(record.get('is_featured', False)),
+                published_at=published_at,
+                closed_at=now if status == 'closed' else None,
+            )
+
+            pk = str(record.get('id') or '')
+            if pk.isdigit() and int(pk) in existing:
+                if not self.options['update_existing']:
+                    stats['skipped'] += 1
+                    continue
+                existing.discard(int(pk))
+                post.pk = int(pk)
+                post.updated_at = now
+                to_update.append(post)
+            else:
+                if pk.isdigit():
+                    post.pk = int(pk)
+                    self.explicit_ids = True
+                to_create.append(post)
+
+            if 'tags' in record:
+                tagged.append((post, parse_tags(record.get('tags'))))
+
+        if to_create:
+            bulk_create_with_pks(Post, to_create, 'pk')
+        if to_update:
+            # INSERT ... ON CONFLICT DO UPDATE is far cheaper than bulk_update's CASE WHEN
+            Post.objects.bulk_create(
+                to_update, update_conflicts=True,
+                unique_fields=['id'], update_fields=UPDATE_FIELDS,
+            )
+        self.apply_tags(tagged, {post.pk for post in to_update})
+
+        stats['created'] = len(to_create)
+        stats['updated'] = len(to_update)
+        return stats
+
+    def apply_tags(self, tagged, updated_ids):
+        """Replace tags for the chunk with one delete and one bulk insert."""
+        through = Post.tags.through
+        retagged = [post.pk for post, names in tagged if post.pk in updated_ids]
+        if retagged:
+            through.objects.filter(post_id__in=retagged).delete()
+
+        names = {name for post, post_names in tagged for name in post_names}
+        if not names:
+            return
+        tag_ids = {tag.name: tag.pk for tag in resolve_tags(PostTag, names)}
+        through.objects.bulk_create(
+            [
+                through(post_id=post.pk, posttag_id=tag_ids[name])
+                for post, post_names in tagged
+                for name in dict.fromkeys(post_names)
+                if name in tag_ids
+            ],
+            ignore_conflicts=True,
+        )
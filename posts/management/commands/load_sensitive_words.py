@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts.models import SensitiveWord
+from posts.wordfilter import bump_version
+
+
+class Command(BaseCommand):
+    """
+    Bulk-load sensitive words from a text file, one word per line.
+
+    Blank lines and lines starting with # are skipped. A line may carry a
+    level after a tab or comma ("word,review"); otherwise --level applies.
+    Existing words get the new level and are re-activated.
+    """
+
+    help = 'Load sensitive words from a text file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--level', choices=['block', 'review'], default='block')
+        parser.add_argument('--replace', action='store_true',
+                            help='Deactivate words that are not in the file.')
+
+    def handle(self, *args, **options):
+        levels = {choice for choice, label in SensitiveWord.LEVEL_CHOICES}
+        words = {}
+        try:
+            with open(options['path'], encoding='utf-8') as handle:
+                for line in handle:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    word, _, level = line.replace('\t', ',').partition(',')
+                    level = level.strip() or options['level']
+                    if level not in levels:
+                        raise CommandError(f"Unknown level '{level}' for '{word}'.")
+                    words[word.strip()[:100]] = level
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with transaction.atomic():
+            existing = {w.word: w for w in SensitiveWord.objects.filter(word__in=words)}
+            changed = []
+            for word, level in words.items():
+                row = existing.get(word)
+                if row and (row.level != level or not row.is_active):
+                    row.level, row.is_active = level, True
+                    changed.append(row)
+            SensitiveWord.objects.bulk_update(changed, ['level', 'is_active'], batch_size=1000)
+            created = SensitiveWord.objects.bulk_create(
+                [SensitiveWord(word=word, level=level) for word, level in words.items() if word not in existing],
+                batch_size=1000,
+            )
+            deactivated = 0
+            if options['replace']:
+                deactivated = SensitiveWord.objects.filter(is_active=True).exclude(word__in=words).update(is_active=False)
+        # bulk operations skip SensitiveWord.save()
+        bump_version()
+        self.stdout.write(
+            f"Loaded {len(words)} words: {len(created)} new, {len(changed)} updated, {deactivated} deactivated"
+        )
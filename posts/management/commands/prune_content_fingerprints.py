@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import ContentFingerprint
+
+
+class Command(BaseCommand):
+    """Delete fingerprints that fell out of the duplicate-detection window."""
+
+    help = 'Delete content fingerprints older than DEDUP_WINDOW_HOURS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None,
+                            help='Keep this many hours instead of DEDUP_WINDOW_HOURS.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        hours = options['hours'] or getattr(settings, 'DEDUP_WINDOW_HOURS', 72)
+        cutoff = timezone.now() - timedelta(hours=hours)
+        old = ContentFingerprint.objects.filter(created_at__lt=cutoff)
+
+        deleted = 0
+        while True:
+            # Small batches keep each transaction (and its cascade to bands) short
+            ids = list(old.values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            ContentFingerprint.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+        self.stdout.write(f"Deleted {deleted} fingerprints older than {hours}h")
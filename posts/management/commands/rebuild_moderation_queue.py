@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.moderation import flag_for_review, record_report
+from posts.models import ModerationItem, PostReport
+
+
+class Command(BaseCommand):
+    """
+    Rebuild open moderation items from pending reports.
+
+    The queue is normally kept up to date as reports come in; this is for
+    reports filed before it existed, or after editing reports by hand.
+    Content flagged by the automatic checks is queued again as well.
+    """
+
+    help = 'Rebuild the moderation queue from pending reports.'
+
+    def handle(self, *args, **options):
+        pending = PostReport.objects.filter(status__in=['pending', 'reviewed']).select_related(
+            'reporter', 'post', 'comment',
+        ).order_by('pk')
+
+        count = 0
+        with transaction.atomic():
+            flagged = list(
+                ModerationItem.objects.filter(status='open').exclude(flag_reason='')
+                .select_related('post', 'comment')
+            )
+            ModerationItem.objects.filter(status='open').delete()
+            for item in flagged:
+                flag_for_review(item.post or item.comment, item.flag_reason)
+            for report in pending.iterator():
+                target = report.post or report.comment
+                if target is None:
+                    continue
+                report.item_id = record_report(report.reporter, target, report.report_type, count=False)
+                report.save(update_fields=['item'])
+                count += 1
+
+        items = ModerationItem.objects.filter(status='open').count()
+        self.stdout.write(f"Queued {count} pending reports into {items} items")
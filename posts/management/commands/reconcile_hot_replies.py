@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.hotreplies import MARKER, get_settings, hot_key, rebuild
+from posts.models import Post
+from baidu_wiki.sortedset import sorted_sets
+
+
+class Command(BaseCommand):
+    """Rebuild the hot replies sets of recently active threads from the database."""
+
+    help = 'Reconcile hot replies (神回复) of threads with replies in the last --hours.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24)
+        parser.add_argument('--post', type=int, action='append', help='Only these post ids.')
+
+    def handle(self, *args, **options):
+        count = get_settings()[0]
+        posts = Post.objects.filter(status='published')
+        if options['post']:
+            posts = posts.filter(pk__in=options['post'])
+        else:
+            posts = posts.filter(last_reply_at__gte=timezone.now() - timedelta(hours=options['hours']))
+
+        rebuilt = drifted = 0
+        for post_id in posts.values_list('pk', flat=True).iterator():
+            before = [member for member, _ in sorted_sets.top(hot_key(post_id), count + 1) if member != MARKER]
+            after = rebuild(post_id)
+            rebuilt += 1
+            # Only sets that existed can have drifted
+            if before and set(before[:count]) != {str(pk) for pk in after[:count]}:
+                drifted += 1
+        self.stdout.write(f"Rebuilt hot replies of {rebuilt} posts; {drifted} had drifted")
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_post_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='reported_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ModerationItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('resolved', 'Resolved'), ('dismissed', 'Dismissed')], default='open', max_length=20)),
+                ('reports_count', models.PositiveIntegerField(default=0)),
+                ('report_score', models.FloatField(default=0)),
+                ('virality', models.FloatField(default=0)),
+                ('priority', models.FloatField(default=0)),
+                ('is_hidden', models.BooleanField(default=False)),
+                ('first_reported_at', models.DateTimeField(auto_now_add=True)),
+                ('last_reported_at', models.DateTimeField(auto_now_add=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='moderation_items', to='posts.postcomment')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='moderation_items', to='posts.post')),
+                ('resolved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'moderation item',
+                'verbose_name_plural': 'moderation items',
+                'ordering': ['-priority'],
+            },
+        ),
+        migrations.AddField(
+            model_name='postreport',
+            name='item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='posts.moderationitem'),
+        ),
+        migrations.AddIndex(
+            model_name='moderationitem',
+            index=models.Index(fields=['status', '-priority'], name='posts_moder_status_fc7f11_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='moderationitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('post',), name='unique_open_moderation_post'),
+        ),
+        migrations.AddConstraint(
+            model_name='moderationitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'open')), fields=('comment',), name='unique_open_moderation_comment'),
+        ),
+    ]
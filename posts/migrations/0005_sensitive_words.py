@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_content_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensitiveWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=100, unique=True, verbose_name='word')),
+                ('level', models.CharField(choices=[('block', 'Block'), ('review', 'Hold for review')], default='block', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'sensitive word',
+                'verbose_name_plural': 'sensitive words',
+                'ordering': ['word'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:55
+
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_last_reply_at(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostComment = apps.get_model('posts', 'PostComment')
+    latest = (
+        PostComment.objects.filter(post=OuterRef('pk'))
+        .values('post').annotate(latest=Max('created_at')).values('latest')
+    )
+    Post.objects.update(last_reply_at=Coalesce(Subquery(latest), F('created_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tieba', '0001_initial'),
+        ('posts', '0005_sensitive_words'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='last_reply_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_last_reply_at, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='post',
+            name='tieba',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='posts', to='tieba.tieba'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'published')), fields=['tieba', '-is_pinned', '-last_reply_at'], name='post_tieba_listing'),
+        ),
+    ]
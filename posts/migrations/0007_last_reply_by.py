@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def backfill_last_reply(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostComment = apps.get_model('posts', 'PostComment')
+    latest = PostComment.objects.filter(post=OuterRef('pk'), is_approved=True).order_by('-created_at', '-pk')
+    Post.objects.update(
+        last_reply_at=Coalesce(Subquery(latest.values('created_at')[:1]), F('created_at')),
+        last_reply_by=Subquery(latest.values('author')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0006_post_tieba_last_reply_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='last_reply_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_last_reply, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'published')), fields=['category', '-is_pinned', '-last_reply_at'], name='post_category_active'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_approved', True), ('status', 'published')), fields=['-is_pinned', '-last_reply_at'], name='post_active'),
+        ),
+    ]
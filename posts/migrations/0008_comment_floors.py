@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:13
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def number_floors(apps, schema_editor):
+    """Number existing top-level comments 2, 3, ... per post in posting order."""
+    Post = apps.get_model('posts', 'Post')
+    PostComment = apps.get_model('posts', 'PostComment')
+    top_level = PostComment.objects.filter(parent__isnull=True).order_by('post_id', 'created_at', 'pk')
+    batch, post_id, floor = [], None, 1
+    for comment in top_level.only('pk', 'post_id').iterator(chunk_size=5000):
+        if comment.post_id != post_id:
+            post_id, floor = comment.post_id, 1
+        floor += 1
+        comment.floor = floor
+        batch.append(comment)
+        if len(batch) >= 5000:
+            PostComment.objects.bulk_update(batch, ['floor'])
+            batch = []
+    PostComment.objects.bulk_update(batch, ['floor'])
+    highest = (
+        PostComment.objects.filter(post=OuterRef('pk')).order_by()
+        .values('post').annotate(highest=Max('floor')).values('highest')
+    )
+    Post.objects.update(last_floor=Coalesce(Subquery(highest), 1))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_last_reply_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='last_floor',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='postcomment',
+            name='floor',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(number_floors, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='postcomment',
+            constraint=models.UniqueConstraint(fields=('post', 'floor'), name='unique_comment_floor'),
+        ),
+    ]
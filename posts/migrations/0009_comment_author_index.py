@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_comment_floors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', 'author', 'created_at'], name='posts_postc_post_id_938834_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_comment_author_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='postcomment',
+            index=models.Index(fields=['post', '-likes_count'], name='posts_postc_post_id_b76261_idx'),
+        ),
+    ]
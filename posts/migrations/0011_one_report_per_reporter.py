@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:53
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def dedupe_reports(apps, schema_editor):
+    """Dismiss repeat active reports by the same user, and count each open item's reporters."""
+    PostReport = apps.get_model('posts', 'PostReport')
+    ModerationItem = apps.get_model('posts', 'ModerationItem')
+    active = PostReport.objects.filter(status__in=['pending', 'reviewed'])
+    for target in ('post', 'comment'):
+        repeats = (
+            active.filter(**{f"{target}__isnull": False}).order_by()
+            .values('reporter', target).annotate(first=Min('pk'), reports=Count('pk')).filter(reports__gt=1)
+        )
+        for row in repeats.iterator():
+            active.filter(reporter=row['reporter'], **{target: row[target]}).exclude(pk=row['first']).update(
+                status='dismissed',
+            )
+    for item in ModerationItem.objects.filter(status='open').annotate(
+        reporters=Count('reports__reporter', distinct=True),
+    ).iterator():
+        ModerationItem.objects.filter(pk=item.pk).update(reporters_count=item.reporters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_comment_likes_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moderationitem',
+            name='reporters_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(dedupe_reports, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='postreport',
+            constraint=models.UniqueConstraint(condition=models.Q(('post__isnull', False), ('status__in', ['pending', 'reviewed'])), fields=('reporter', 'post'), name='unique_active_post_report'),
+        ),
+        migrations.AddConstraint(
+            model_name='postreport',
+            constraint=models.UniqueConstraint(condition=models.Q(('comment__isnull', False), ('status__in', ['pending', 'reviewed'])), fields=('reporter', 'comment'), name='unique_active_comment_report'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_one_report_per_reporter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='moderationitem',
+            name='flag_reason',
+            field=models.CharField(blank=True, choices=[('duplicate', 'Near-duplicate'), ('words', 'Sensitive words')], max_length=20),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 
@@ -50,6 +51,9 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     category = models.ForeignKey(PostCategory, on_delete=models.SET_NULL, 
                                  null=True, blank=True, related_name='posts')
+    tieba = models.ForeignKey('tieba.Tieba', on_delete=models.CASCADE,
+                              null=True, blank=True, related_name='posts')
+    tags = models.ManyToManyField('PostTag', blank=True, related_name='posts')
     
     # Status and type
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
@@ -59,6 +63,7 @@ class Post(models.Model):
     is_pinned = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
     is_approved = models.BooleanField(default=True)
+    reported_count = models.PositiveIntegerField(default=0)
     
     # Statistics
     views_count = models.PositiveIntegerField(default=0)
@@ -71,6 +76,13 @@ class Post(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
     closed_at = models.DateTimeField(null=True, blank=True)
+    # Latest approved reply (creation time until the first one); listings
+    # sort on it. Maintained by posts/replies.py.
+    last_reply_at = models.DateTimeField(default=timezone.now)
+    last_reply_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='+')
+    # Highest floor handed out; the post itself is floor 1
+    last_floor = models.PositiveIntegerField(default=1)
     
     class Meta:
         verbose_name = _('post')
@@ -81,6 +93,24 @@ class Post(models.Model):
             models.Index(fields=['author', 'created_at']),
             models.Index(fields=['category', 'created_at']),
             models.Index(fields=['is_pinned', 'created_at']),
+            # Forum listing: pinned threads first, then by latest reply.
+            # Partial, so hidden and draft posts don't bloat it.
+            models.Index(
+                fields=['tieba', '-is_pinned', '-last_reply_at'],
+                name='post_tieba_listing',
+                condition=models.Q(status='published', is_approved=True),
+            ),
+            # ?order=active, with and without a category filter
+            models.Index(
+                fields=['category', '-is_pinned', '-last_reply_at'],
+                name='post_category_active',
+                condition=models.Q(status='published', is_approved=True),
+            ),
+            models.Index(
+                fields=['-is_pinned', '-last_reply_at'],
+                name='post_active',
+                condition=models.Q(status='published', is_approved=True),
+            ),
         ]
     
     def __str__(self):
@@ -134,6 +164,9 @@ class PostComment(models.Model):
                               null=True, blank=True, related_name='replies')
     
     content = models.TextField(max_length=2000)
+    # Floor (楼层) of a top-level comment, allocated from Post.last_floor;
+    # replies inside a floor have none
+    floor = models.PositiveIntegerField(null=True, blank=True)
     
     # Moderation
     is_approved = models.BooleanField(default=True)
@@ -152,6 +185,14 @@ class PostComment(models.Model):
         indexes = [
             models.Index(fields=['post', 'created_at']),
             models.Index(fields=['author', 'created_at']),
+            # 只看楼主: one author's comments in a thread, in reply order
+            models.Index(fields=['post', 'author', 'created_at']),
+            # Rebuilding a thread's hot replies (神回复)
+            models.Index(fields=['post', '-likes_count']),
+        ]
+        constraints = [
+            # Also the index behind jumping to a floor
+            models.UniqueConstraint(fields=['post', 'floor'], name='unique_comment_floor'),
         ]
     
     def __str__(self):
@@ -199,6 +240,10 @@ class PostShare(models.Model):
         return f"{self.user} shared {self.post}"
 
 
+# Reports still waiting for a moderator
+ACTIVE_REPORT_STATUSES = ['pending', 'reviewed']
+
+
 class PostReport(models.Model):
     """Report model for posts and comments."""
     
@@ -220,6 +265,10 @@ class PostReport(models.Model):
     report_type = models.CharField(max_length=20, choices=REPORT_TYPES)
     description = models.TextField(max_length=1000, blank=True)
     
+    # Queue entry aggregating all open reports on the same target
+    item = models.ForeignKey('ModerationItem', on_delete=models.SET_NULL, null=True, blank=True,
+                             related_name='reports')
+    
     # Moderation status
     status = models.CharField(max_length=20, choices=[
         ('pending', _('Pending')),
@@ -240,6 +289,19 @@ class PostReport(models.Model):
         indexes = [
             models.Index(fields=['status', 'created_at']),
         ]
+        # One report per user and target until it has been dealt with
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reporter', 'post'],
+                condition=models.Q(post__isnull=False, status__in=ACTIVE_REPORT_STATUSES),
+                name='unique_active_post_report',
+            ),
+            models.UniqueConstraint(
+                fields=['reporter', 'comment'],
+                condition=models.Q(comment__isnull=False, status__in=ACTIVE_REPORT_STATUSES),
+                name='unique_active_comment_report',
+            ),
+        ]
     
     def __str__(self):
         target = self.post or self.comment
@@ -254,6 +316,135 @@ class PostReport(models.Model):
             raise ValidationError('Cannot set both post and comment.')
 
 
+class ModerationItem(models.Model):
+    """
+    One moderation queue entry per reported post or comment.
+    
+    Counters and the priority are updated incrementally as reports arrive;
+    see posts/moderation.py.
+    """
+    
+    STATUS_CHOICES = [
+        ('open', _('Open')),
+        ('resolved', _('Resolved')),
+        ('dismissed', _('Dismissed')),
+    ]
+    
+    FLAG_CHOICES = [
+        ('duplicate', _('Near-duplicate')),
+        ('words', _('Sensitive words')),
+    ]
+    
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='moderation_items')
+    comment = models.ForeignKey(PostComment, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='moderation_items')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    
+    # Aggregates over the item's reports
+    reports_count = models.PositiveIntegerField(default=0)
+    # Distinct users; each one's weight counts once towards report_score
+    reporters_count = models.PositiveIntegerField(default=0)
+    report_score = models.FloatField(default=0)
+    virality = models.FloatField(default=0)
+    priority = models.FloatField(default=0)
+    is_hidden = models.BooleanField(default=False)
+    # Why the automatic checks held the target back, if they did
+    flag_reason = models.CharField(max_length=20, choices=FLAG_CHOICES, blank=True)
+    
+    first_reported_at = models.DateTimeField(auto_now_add=True)
+    last_reported_at = models.DateTimeField(auto_now_add=True)
+    resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='+')
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('moderation item')
+        verbose_name_plural = _('moderation items')
+        ordering = ['-priority']
+        indexes = [
+            models.Index(fields=['status', '-priority']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['post'], condition=models.Q(status='open'),
+                                    name='unique_open_moderation_post'),
+            models.UniqueConstraint(fields=['comment'], condition=models.Q(status='open'),
+                                    name='unique_open_moderation_comment'),
+        ]
+    
+    def __str__(self):
+        target = self.post or self.comment
+        return f"{target} ({self.reports_count} reports, priority {self.priority:.1f})"
+
+
+class ContentFingerprint(models.Model):
+    """MinHash signature of a post or comment, used to spot near-duplicates."""
+    
+    KIND_CHOICES = [
+        ('post', _('Post')),
+        ('comment', _('Comment')),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    signature = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class FingerprintBand(models.Model):
+    """One LSH band key of a fingerprint; see posts/dedup.py."""
+    
+    fingerprint = models.ForeignKey(ContentFingerprint, on_delete=models.CASCADE, related_name='bands')
+    band = models.BigIntegerField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'fingerprint']),
+        ]
+
+
+class SensitiveWord(models.Model):
+    """Word matched by the content filter; see posts/wordfilter.py."""
+    
+    LEVEL_CHOICES = [
+        ('block', _('Block')),
+        ('review', _('Hold for review')),
+    ]
+    
+    word = models.CharField(_('word'), max_length=100, unique=True)
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES, default='block')
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('sensitive word')
+        verbose_name_plural = _('sensitive words')
+        ordering = ['word']
+    
+    def __str__(self):
+        return self.word
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from .wordfilter import bump_version
+        bump_version()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .wordfilter import bump_version
+        bump_version()
+        return result
+
+
 class PostTag(models.Model):
     """Tag for posts."""
     
@@ -0,0 +1,191 @@
+"""
+Moderation queue for reported posts and comments.
+
+Every report is folded into the open ModerationItem of its target:
+
+    weight   = SEVERITY[report_type] * reporter_weight(reporter)
+    priority = sum(weight) * (1 + virality(target))
+
+Both are applied with F() expressions in a single UPDATE, so concurrent
+reports never lose an increment and nothing re-counts the reports. A user
+has at most one active report per target (a constraint on PostReport), and
+their weight counts once per item even if a moderator closed their earlier
+report while the item stayed open. When an item's score first reaches
+MODERATION_AUTO_HIDE_SCORE with at least MODERATION_AUTO_HIDE_REPORTERS
+distinct reporters, a conditional UPDATE hides the target
+(is_approved=False), so no single account can hide content on its own.
+Only the request that flips the flag does any extra work.
+
+Content that the word filter or the near-duplicate check saves
+unapproved is queued by flag_for_review(), as a hidden item whose score
+is FLAG_SEVERITY of its flag_reason, so moderators see it alongside the
+reported content.
+
+Resolving or dismissing a batch of items updates the items, and all of
+their reports, with one statement each. Dismissing also un-hides targets
+that were hidden, automatically or when they were flagged.
+"""
+
+import math
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ModerationItem, Post, PostComment, PostReport
+
+SEVERITY = {
+    'hate_speech': 4.0,
+    'harassment': 3.0,
+    'inappropriate': 2.0,
+    'misinformation': 2.0,
+    'spam': 1.0,
+    'other': 0.5,
+}
+
+# Score of content held back by the automatic checks, by flag_reason
+FLAG_SEVERITY = {
+    'duplicate': SEVERITY['spam'],
+    'words': SEVERITY['inappropriate'],
+}
+
+# Report status applied to an item's reports when it is closed
+REPORT_STATUS = {'resolved': 'resolved', 'dismissed': 'dismissed'}
+
+
+def auto_hide_score():
+    return getattr(settings, 'MODERATION_AUTO_HIDE_SCORE', 12.0)
+
+
+def auto_hide_reporters():
+    return getattr(settings, 'MODERATION_AUTO_HIDE_REPORTERS', 3)
+
+
+def reporter_weight(user):
+    """1 for new accounts, growing slowly with reputation up to 3."""
+    from users.models import UserProfile
+
+    reputation = UserProfile.objects.filter(user=user).values_list('reputation', flat=True).first() or 0
+    return min(3.0, 1.0 + math.log10(1 + reputation) / 2)
+
+
+def virality(target):
+    """How far the target has spread; scales the priority of its reports."""
+    if isinstance(target, Post):
+        reach = target.views_count / 10 + target.likes_count + 2 * target.comments_count + 3 * target.shares_count
+    else:
+        reach = target.likes_count
+    return round(math.log1p(reach), 3)
+
+
+def _target_filter(target):
+    return {'post': target} if isinstance(target, Post) else {'comment': target}
+
+
+def record_report(reporter, target, report_type, count=True):
+    """
+    Fold a new report into the target's open queue item and return the item id.
+
+    count=False leaves the target's reported_count alone, for reports that
+    were already counted.
+    """
+    lookup = _target_filter(target)
+    # A reporter already counted on the open item adds a report but no weight
+    repeat = PostReport.objects.filter(reporter=reporter, item__status='open', **lookup).exists()
+    weight = 0.0 if repeat else SEVERITY.get(report_type, 1.0) * reporter_weight(reporter)
+    reach = virality(target)
+    items = ModerationItem.objects.filter(status='open', **lookup)
+    changes = {
+        'reports_count': F('reports_count') + 1,
+        'reporters_count': F('reporters_count') + (0 if repeat else 1),
+        'report_score': F('report_score') + weight,
+        'virality': reach,
+        # SET expressions read the pre-update row, so repeat the increment
+        'priority': (F('report_score') + weight) * (1 + reach),
+        'last_reported_at': timezone.now(),
+    }
+
+    with transaction.atomic():
+        if not items.update(**changes):
+            try:
+                with transaction.atomic():
+                    ModerationItem.objects.create(
+                        reports_count=1, reporters_count=1, report_score=weight, virality=reach,
+                        priority=weight * (1 + reach), **lookup,
+                    )
+            except IntegrityError:
+                # Another report opened the item first
+                items.update(**changes)
+        item_id = items.values_list('pk', flat=True).get()
+
+        if count:
+            type(target).objects.filter(pk=target.pk).update(reported_count=F('reported_count') + 1)
+
+        # Only the report that crosses the threshold matches here
+        if ModerationItem.objects.filter(
+            pk=item_id, is_hidden=False, report_score__gte=auto_hide_score(),
+            reporters_count__gte=auto_hide_reporters(),
+        ).update(is_hidden=True):
+            type(target).objects.filter(pk=target.pk).update(is_approved=False)
+    return item_id
+
+
+def flag_for_review(target, reason):
+    """Queue a post or comment that was saved unapproved by the automatic checks."""
+    weight = FLAG_SEVERITY[reason]
+    reach = virality(target)
+    lookup = _target_filter(target)
+    items = ModerationItem.objects.filter(status='open', **lookup)
+    changes = {
+        'flag_reason': reason,
+        'is_hidden': True,
+        'report_score': F('report_score') + weight,
+        'virality': reach,
+        'priority': (F('report_score') + weight) * (1 + reach),
+        'last_reported_at': timezone.now(),
+    }
+    with transaction.atomic():
+        if not items.update(**changes):
+            try:
+                with transaction.atomic():
+                    ModerationItem.objects.create(
+                        flag_reason=reason, is_hidden=True, report_score=weight, virality=reach,
+                        priority=weight * (1 + reach), **lookup,
+                    )
+            except IntegrityError:
+                items.update(**changes)
+        return items.values_list('pk', flat=True).get()
+
+
+def close_items(item_ids, status, moderator, notes=''):
+    """Resolve or dismiss open items and all of their reports; returns the number closed."""
+    if status not in REPORT_STATUS:
+        raise ValueError(f"Unknown moderation status '{status}'.")
+
+    now = timezone.now()
+    with transaction.atomic():
+        open_ids = list(
+            ModerationItem.objects.select_for_update()
+            .filter(pk__in=item_ids, status='open')
+            .values_list('pk', flat=True)
+        )
+        if not open_ids:
+            return 0
+
+        ModerationItem.objects.filter(pk__in=open_ids).update(
+            status=status, resolved_by=moderator, resolved_at=now,
+        )
+        report_changes = {'status': REPORT_STATUS[status], 'updated_at': now}
+        if notes:
+            report_changes['moderator_notes'] = notes
+        PostReport.objects.filter(item_id__in=open_ids).exclude(
+            status__in=['resolved', 'dismissed'],
+        ).update(**report_changes)
+
+        if status == 'dismissed':
+            # False alarm: show hidden targets again
+            hidden = {'moderation_items__pk__in': open_ids, 'moderation_items__is_hidden': True}
+            Post.objects.filter(**hidden).update(is_approved=True)
+            PostComment.objects.filter(**hidden).update(is_approved=True)
+    return len(open_ids)
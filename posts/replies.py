@@ -0,0 +1,108 @@
+"""
+Thread activity: keeping Post.last_reply_at/last_reply_by current.
+
+Sorting threads by their latest reply with Max('comments__created_at')
+aggregates the whole comments table on every listing, so the latest reply
+is denormalized onto the post instead, and listings read it from an index.
+
+A new reply bumps its thread with a single UPDATE. The counter is an F()
+increment, and the reply time only moves forward (Greatest), so replies
+committing out of order never move a thread back or lose a count. Replies
+held for moderation don't bump the thread; that is how spam would get to
+the top of a forum.
+
+Deleting a reply re-reads the newest remaining approved reply, one
+indexed query on (post, created_at).
+
+Floors (楼层) come from Post.last_floor: the UPDATE that increments it
+locks the post row until the comment's transaction ends, so concurrent
+replies get consecutive floors without a MAX()+1 race. A rolled-back
+reply rolls its increment back too, leaving no gap. Pages are runs of
+FLOORS_PER_PAGE floors (floor 1, the post itself, opens page 1), so the
+page of any floor is arithmetic, and loading it is a range scan on the
+(post, floor) unique index instead of an OFFSET.
+"""
+
+from django.db import connection
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.db.transaction import TransactionManagementError
+
+from .models import Post, PostComment
+
+FLOORS_PER_PAGE = 30
+
+
+def allocate_floor(post_id):
+    """Next floor of a post; call inside the transaction that saves the comment."""
+    if not connection.in_atomic_block:
+        raise TransactionManagementError('allocate_floor() must run inside transaction.atomic().')
+    Post.objects.filter(pk=post_id).update(last_floor=F('last_floor') + 1)
+    return Post.objects.filter(pk=post_id).values_list('last_floor', flat=True).get()
+
+
+def floor_page(floor):
+    """(page number, first floor, last floor) of the page holding a floor."""
+    page = (max(floor, 1) - 1) // FLOORS_PER_PAGE + 1
+    first = (page - 1) * FLOORS_PER_PAGE + 1
+    return page, first, first + FLOORS_PER_PAGE - 1
+
+
+def top_level_floor(comment):
+    """Floor a comment is shown under: its own, or its top-level ancestor's."""
+    while comment.floor is None and comment.parent_id:
+        comment = PostComment.objects.only('floor', 'parent_id').get(pk=comment.parent_id)
+    return comment.floor
+
+
+def record_reply(comment):
+    """Count a new reply and bump its thread."""
+    changes = {'comments_count': F('comments_count') + 1}
+    if comment.is_approved:
+        changes.update(
+            last_reply_at=Greatest('last_reply_at', Value(comment.created_at)),
+            # SET expressions read the pre-update row, so this compares
+            # against the old last_reply_at
+            last_reply_by=Case(
+                When(last_reply_at__lte=comment.created_at, then=Value(comment.author_id)),
+                default=F('last_reply_by'),
+                output_field=BigIntegerField(),
+            ),
+        )
+    Post.objects.filter(pk=comment.post_id).update(**changes)
+
+
+def repair_last_reply(post_id):
+    """Point the thread at its newest remaining approved reply, or its own creation."""
+    latest = (
+        PostComment.objects.filter(post_id=post_id, is_approved=True)
+        .order_by('-created_at', '-pk')
+        .values('created_at', 'author_id')
+        .first()
+    )
+    if latest:
+        changes = {'last_reply_at': latest['created_at'], 'last_reply_by': latest['author_id']}
+    else:
+        changes = {'last_reply_at': F('created_at'), 'last_reply_by': None}
+    Post.objects.filter(pk=post_id).update(**changes)
+
+
+def subtree_ids(comment):
+    """Ids of a comment and every reply under it, one query per level."""
+    ids, level = [comment.pk], [comment.pk]
+    while level:
+        level = list(PostComment.objects.filter(parent_id__in=level).values_list('pk', flat=True))
+        ids.extend(level)
+    return ids
+
+
+def delete_reply(comment):
+    """Delete a reply with its sub-replies, fixing the count and latest reply."""
+    post_id = comment.post_id
+    deleted = comment.delete()[1].get(PostComment._meta.label, 0)
+    Post.objects.filter(pk=post_id).update(comments_count=Case(
+        When(comments_count__gte=deleted, then=F('comments_count') - deleted),
+        default=Value(0),
+    ))
+    # Any reply in the deleted subtree may have been the latest one
+    repair_last_reply(post_id)
@@ -1,13 +1,52 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from wiki.tagging import set_tags
+from .dedup import dedup_action, find_duplicate, index_content
+from .moderation import flag_for_review
+from .wordfilter import check_text
 from .models import (
     PostCategory, Post, PostLike, PostComment, CommentLike, 
-    PostShare, PostReport, PostTag
+    PostShare, PostReport, PostTag, ModerationItem, ACTIVE_REPORT_STATUSES
 )
 
 User = get_user_model()
 
 
+def check_words(*texts):
+    """Run the sensitive word filter; raises on blocked words."""
+    words = check_text(*texts)
+    if words.blocked:
+        raise serializers.ValidationError(_('Contains words that are not allowed.'))
+    return words
+
+
+def screen_content(value, exclude=None):
+    """
+    Check content for blocked words and recent near-duplicates.
+    
+    Raises on blocked words, and on duplicates when DEDUP_ACTION is
+    'reject'. The returned screening has needs_review set when the content
+    should be saved unapproved. `exclude` is the (kind, id) of the post or
+    comment being edited.
+    """
+    words = check_words(value)
+    screening = find_duplicate(value, exclude)
+    if screening.is_duplicate and dedup_action() == 'reject':
+        raise serializers.ValidationError(_('This looks like a copy of recently posted content.'))
+    screening.needs_review = screening.is_duplicate or bool(words.review)
+    return screening
+
+
+def review_reason(screening=None, title_words=None):
+    """Why new or edited content has to wait for a moderator (a flag_reason), or None."""
+    if screening is not None and screening.is_duplicate:
+        return 'duplicate'
+    if (screening is not None and screening.needs_review) or (title_words is not None and title_words.review):
+        return 'words'
+    return None
+
+
 class PostCategorySerializer(serializers.ModelSerializer):
     """Serializer for post categories."""
     
@@ -42,16 +81,18 @@ class PostListSerializer(serializers.ModelSerializer):
     
     author = UserSimpleSerializer(read_only=True)
     category = PostCategorySerializer(read_only=True)
+    last_reply_by = UserSimpleSerializer(read_only=True)
     excerpt = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'excerpt', 'author', 'category', 'status', 
+            'id', 'title', 'excerpt', 'author', 'category', 'tieba', 'status', 
             'post_type', 'is_pinned', 'is_featured', 'views_count', 
-            'likes_count', 'comments_count', 'created_at', 'published_at'
+            'likes_count', 'comments_count', 'created_at', 'published_at',
+            'last_reply_at', 'last_reply_by'
         ]
-        read_only_fields = ['id', 'created_at', 'published_at']
+        read_only_fields = ['id', 'created_at', 'published_at', 'last_reply_at']
     
     def get_excerpt(self, obj):
         """Generate excerpt from content."""
@@ -63,18 +104,20 @@ class PostDetailSerializer(serializers.ModelSerializer):
     
     author = UserSimpleSerializer(read_only=True)
     category = PostCategorySerializer(read_only=True)
+    last_reply_by = UserSimpleSerializer(read_only=True)
     tags = PostTagSerializer(many=True, read_only=True)
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'content', 'author', 'category', 'tags',
+            'id', 'title', 'content', 'author', 'category', 'tieba', 'tags',
             'status', 'post_type', 'is_pinned', 'is_featured', 'is_approved',
             'views_count', 'likes_count', 'comments_count', 'shares_count',
-            'is_liked', 'created_at', 'updated_at', 'published_at', 'closed_at'
+            'is_liked', 'created_at', 'updated_at', 'published_at', 'closed_at',
+            'last_reply_at', 'last_reply_by'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'published_at', 'closed_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'published_at', 'closed_at', 'last_reply_at']
     
     def get_is_liked(self, obj):
         """Check if current user has liked this post."""
@@ -87,24 +130,101 @@ class PostDetailSerializer(serializers.ModelSerializer):
 class PostCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating posts."""
     
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        required=False,
+        default=list,
+        write_only=True
+    )
+    
     class Meta:
         model = Post
-        fields = ['title', 'content', 'category', 'post_type', 'status']
+        fields = ['title', 'content', 'category', 'tieba', 'tags', 'post_type', 'status']
+    
+    def validate_tieba(self, value):
+        """Closed forums take no posts; approval-only ones only from members."""
+        from tieba.membership import get_role
+        
+        if value is None:
+            return value
+        if value.status != 'active':
+            raise serializers.ValidationError(_('This tieba is closed.'))
+        request = self.context.get('request')
+        if value.join_policy == 'approval' and request and not get_role(request.user, value.pk):
+            raise serializers.ValidationError(_('Join this tieba before posting in it.'))
+        return value
+    
+    def validate_title(self, value):
+        """Reject blocked words; hold titles with review words."""
+        self.title_words = check_words(value)
+        return value
+    
+    def validate_content(self, value):
+        """Reject or flag sensitive words and near-duplicates of recent content."""
+        self.screening = screen_content(value)
+        return value
     
     def create(self, validated_data):
-        """Set the author to the current user."""
+        """Set the author to the current user and handle tags."""
+        tags_data = validated_data.pop('tags', [])
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             validated_data['author'] = request.user
-        return super().create(validated_data)
+        reason = review_reason(self.screening, self.title_words)
+        if reason:
+            validated_data['is_approved'] = False
+        
+        post = super().create(validated_data)
+        index_content('post', post, self.screening.signature)
+        if reason:
+            flag_for_review(post, reason)
+        
+        if tags_data:
+            set_tags(post, tags_data, PostTag)
+        
+        return post
 
 
 class PostUpdateSerializer(serializers.ModelSerializer):
     """Serializer for updating posts."""
     
+    tags = serializers.ListField(
+        child=serializers.CharField(max_length=50),
+        required=False,
+        write_only=True
+    )
+    
     class Meta:
         model = Post
-        fields = ['title', 'content', 'category', 'post_type', 'status']
+        fields = ['title', 'content', 'category', 'tags', 'post_type', 'status']
+    
+    def validate_title(self, value):
+        """Edits are screened like new posts."""
+        self.title_words = check_words(value)
+        return value
+    
+    def validate_content(self, value):
+        """Edits are screened like new posts, except against the post itself."""
+        self.screening = screen_content(value, exclude=('post', self.instance.pk))
+        return value
+    
+    def update(self, instance, validated_data):
+        """Update tags if provided, touching only the ones that changed."""
+        tags_data = validated_data.pop('tags', None)
+        screening = getattr(self, 'screening', None)
+        reason = review_reason(screening, getattr(self, 'title_words', None))
+        if reason:
+            validated_data['is_approved'] = False
+        post = super().update(instance, validated_data)
+        if screening is not None:
+            index_content('post', post, screening.signature, replace=True)
+        if reason:
+            flag_for_review(post, reason)
+        
+        if tags_data is not None:
+            set_tags(post, tags_data, PostTag)
+        
+        return post
 
 
 class PostCommentSerializer(serializers.ModelSerializer):
@@ -117,32 +237,82 @@ class PostCommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = PostComment
         fields = [
-            'id', 'post', 'author', 'parent', 'content', 'is_approved',
+            'id', 'post', 'author', 'parent', 'floor', 'content', 'is_approved',
             'replies_count', 'likes_count', 'is_liked', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'floor', 'created_at', 'updated_at']
     
     def get_is_liked(self, obj):
         """Check if current user has liked this comment."""
+        liked = getattr(obj, 'user_liked', None)
+        if liked is not None:
+            return liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.likes.filter(user=request.user).exists()
         return False
 
 
+class AuthorFloorSerializer(PostCommentSerializer):
+    """A floor in an author-filtered thread, with the first replies inside it."""
+    
+    first_replies = PostCommentSerializer(many=True, read_only=True)
+    
+    class Meta(PostCommentSerializer.Meta):
+        fields = PostCommentSerializer.Meta.fields + ['first_replies']
+
+
+class PostCommentUpdateSerializer(PostCommentSerializer):
+    """Serializer for editing a comment: only its content, screened like a new one."""
+    
+    class Meta(PostCommentSerializer.Meta):
+        read_only_fields = [field for field in PostCommentSerializer.Meta.fields if field != 'content']
+    
+    def validate_content(self, value):
+        """Reject or flag sensitive words and near-duplicates, except of the comment itself."""
+        self.screening = screen_content(value, exclude=('comment', self.instance.pk))
+        return value
+    
+    def update(self, instance, validated_data):
+        """Unapprove flagged edits and replace the comment's fingerprint."""
+        screening = getattr(self, 'screening', None)
+        reason = review_reason(screening)
+        if reason:
+            validated_data['is_approved'] = False
+        comment = super().update(instance, validated_data)
+        if screening is not None:
+            index_content('comment', comment, screening.signature, replace=True)
+        if reason:
+            flag_for_review(comment, reason)
+        return comment
+
+
 class PostCommentCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating post comments."""
     
     class Meta:
         model = PostComment
-        fields = ['post', 'parent', 'content']
+        fields = ['id', 'post', 'parent', 'floor', 'content']
+        read_only_fields = ['id', 'floor']
+    
+    def validate_content(self, value):
+        """Reject or flag sensitive words and near-duplicates of recent content."""
+        self.screening = screen_content(value)
+        return value
     
     def create(self, validated_data):
         """Set the author to the current user."""
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             validated_data['author'] = request.user
-        return super().create(validated_data)
+        reason = review_reason(self.screening)
+        if reason:
+            validated_data['is_approved'] = False
+        comment = super().create(validated_data)
+        index_content('comment', comment, self.screening.signature)
+        if reason:
+            flag_for_review(comment, reason)
+        return comment
 
 
 class PostLikeSerializer(serializers.ModelSerializer):
@@ -220,6 +390,13 @@ class PostReportCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Either post or comment must be provided.")
         if data.get('post') and data.get('comment'):
             raise serializers.ValidationError("Cannot provide both post and comment.")
+        request = self.context.get('request')
+        if request and request.user.is_authenticated:
+            target = {'post': data['post']} if data.get('post') else {'comment': data['comment']}
+            if PostReport.objects.filter(
+                reporter=request.user, status__in=ACTIVE_REPORT_STATUSES, **target
+            ).exists():
+                raise serializers.ValidationError("You have already reported this.")
         return data
     
     def create(self, validated_data):
@@ -230,6 +407,37 @@ class PostReportCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class ModerationItemSerializer(serializers.ModelSerializer):
+    """Serializer for moderation queue entries."""
+    
+    target_type = serializers.SerializerMethodField()
+    target_summary = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ModerationItem
+        fields = [
+            'id', 'post', 'comment', 'target_type', 'target_summary', 'status',
+            'reports_count', 'reporters_count', 'report_score', 'virality', 'priority', 'is_hidden', 'flag_reason',
+            'first_reported_at', 'last_reported_at', 'resolved_by', 'resolved_at'
+        ]
+        read_only_fields = fields
+    
+    def get_target_type(self, obj):
+        return 'post' if obj.post_id else 'comment'
+    
+    def get_target_summary(self, obj):
+        if obj.post_id:
+            return obj.post.title
+        return obj.comment.content[:100]
+
+
+class ModerationActionSerializer(serializers.Serializer):
+    """Serializer for bulk resolve/dismiss requests."""
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
+    notes = serializers.CharField(required=False, allow_blank=True, max_length=1000, default='')
+
+
 class PostStatsSerializer(serializers.Serializer):
     """Serializer for post statistics."""
     
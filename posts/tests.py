@@ -0,0 +1,170 @@
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from baidu_wiki.testing import (
+    TEST_CACHES, QueryBudgetTestCase, assert_query_budget, create_users, rows_over_budget,
+)
+from users import reputation
+from users.models import UserProfile
+
+from .dedup import minhash, normalize, similarity
+from .models import ContentFingerprint, Post, PostCategory, PostComment, PostLike, PostTag, SensitiveWord
+from .views import PostCommentViewSet, PostStatsViewSet, PostViewSet
+from .wordfilter import check_text
+
+
+class PostQueryBudgetTests(QueryBudgetTestCase):
+    """Posts endpoints stay within their query_budgets however many rows they list."""
+
+    rows = rows_over_budget(PostViewSet, PostCommentViewSet, PostStatsViewSet)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users('poster', 3)
+        category = PostCategory.objects.create(name='General', slug='general')
+        tags = [PostTag.objects.create(name=f'tag{i}', slug=f'tag{i}') for i in range(2)]
+        cls.posts = []
+        for i in range(cls.rows):
+            post = Post.objects.create(
+                title=f'Thread {i}', content=f'Opening post number {i}.', author=cls.users[i % 3],
+                category=category, status='published', is_approved=True,
+            )
+            post.tags.set(tags)
+            cls.posts.append(post)
+        cls.post = cls.posts[0]
+        for i in range(cls.rows):
+            author = cls.users[i % 3]
+            floor = PostComment.objects.create(post=cls.post, author=author, content=f'Floor {i}')
+            PostComment.objects.create(post=cls.post, author=author, parent=floor, content=f'Reply {i}')
+        for author in cls.users:
+            PostLike.objects.create(post=cls.post, user=author)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1])
+
+    def test_post_list(self):
+        response = assert_query_budget(self.client, 'get', '/api/posts/posts/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_retrieve(self):
+        response = assert_query_budget(self.client, 'get', f'/api/posts/posts/{self.post.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_only_op(self):
+        response = assert_query_budget(self.client, 'get', f'/api/posts/posts/{self.post.pk}/only-op/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_list(self):
+        response = assert_query_budget(self.client, 'get', f'/api/posts/comments/?post={self.post.pk}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_stats(self):
+        response = assert_query_budget(self.client, 'get', '/api/posts/stats/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_post_list(self):
+        self.client.force_authenticate(None)
+        response = assert_query_budget(self.client, 'get', '/api/posts/posts/')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class PostLikeTests(TestCase):
+    """Likes are counted in SQL and credited to the post's author."""
+
+    def setUp(self):
+        self.author, self.liker = create_users('liked', 2)
+        self.post = Post.objects.create(
+            title='Liked', content='A post to like.', author=self.author, status='published', is_approved=True,
+        )
+        reputation.record(self.author.pk, 'article')
+        reputation.record(self.author.pk, 'post')
+        self.client = APIClient()
+
+    def like(self):
+        self.client.force_authenticate(self.liker)
+        return self.client.post(f'/api/posts/posts/{self.post.pk}/like/')
+
+    def reputation(self):
+        return UserProfile.objects.get(user=self.author).reputation
+
+    def test_like_and_unlike(self):
+        self.assertEqual(self.like().data['likes_count'], 1)
+        earned = reputation.points('article') + reputation.points('post')
+        self.assertEqual(self.reputation(), earned + reputation.points('post_like'))
+        self.assertEqual(self.like().data['likes_count'], 0)
+        self.assertEqual(self.reputation(), earned)
+
+    def test_delete_takes_back_the_likes_given(self):
+        self.like()
+        # A count that drifted before likes were counted in SQL
+        Post.objects.filter(pk=self.post.pk).update(likes_count=6)
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.delete(f'/api/posts/posts/{self.post.pk}/').status_code, 204)
+        self.assertEqual(self.reputation(), reputation.points('article'))
+
+
+@override_settings(CACHES=TEST_CACHES, WORD_FILTER_RELOAD_INTERVAL=0)
+class WordFilterTests(TestCase):
+    """Spelling tricks match a listed word, whole Latin words only."""
+
+    @classmethod
+    def setUpTestData(cls):
+        SensitiveWord.objects.create(word='sex')
+        SensitiveWord.objects.create(word='赌博')
+
+    def test_spelled_out_words_match(self):
+        for text in ['s e x', 'S.E.X', 's-e-x 片', '赌 博', '赌*博']:
+            self.assertTrue(check_text(text).blocked, text)
+
+    def test_words_do_not_run_together(self):
+        for text in ['Is Expensive', 'Essex', 'a sexton', 's e x y']:
+            self.assertFalse(check_text(text), text)
+
+
+class MinHashTests(SimpleTestCase):
+
+    text = '这家店的牛肉面真的很好吃，汤头浓郁，面条劲道，价格也公道，周末排队的人特别多。' * 8
+
+    def test_near_duplicates_are_similar(self):
+        edited = self.text.replace('牛肉面', '羊肉面', 2) + '速来'
+        self.assertGreaterEqual(similarity(minhash(normalize(self.text)), minhash(normalize(edited))), 0.7)
+
+    def test_unrelated_texts_are_not(self):
+        other = '今天下午去图书馆借了三本关于宋代历史的书，准备周末在家慢慢读完再写读书笔记。' * 8
+        self.assertLess(similarity(minhash(normalize(self.text)), minhash(normalize(other))), 0.3)
+
+
+@override_settings(CACHES=TEST_CACHES, DEDUP_ACTION='flag')
+class DeletedContentTests(TestCase):
+    """Deleted posts and comments stop matching as duplicates."""
+
+    content = 'A long enough opening post about the new bridge over the river, with photos.'
+
+    def setUp(self):
+        self.author, = create_users('dup', 1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def create_post(self):
+        response = self.client.post(
+            '/api/posts/posts/', {'title': 'Bridge', 'content': self.content, 'status': 'published'}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return Post.objects.latest('pk')
+
+    def test_deleted_post_is_forgotten(self):
+        original = self.create_post()
+        self.assertFalse(self.create_post().is_approved)
+        response = self.client.post('/api/posts/comments/', {
+            'post': original.pk, 'content': 'A reply long enough to be fingerprinted as well.',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        comment = PostComment.objects.latest('pk')
+        self.assertTrue(ContentFingerprint.objects.filter(kind='comment', object_id=comment.pk).exists())
+
+        self.assertEqual(self.client.delete(f'/api/posts/posts/{original.pk}/').status_code, 204)
+        self.assertFalse(ContentFingerprint.objects.filter(kind='post', object_id=original.pk).exists())
+        self.assertFalse(ContentFingerprint.objects.filter(kind='comment', object_id=comment.pk).exists())
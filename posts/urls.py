@@ -12,6 +12,7 @@ router.register(r'post-likes', views.PostLikeViewSet, basename='postlike')
 router.register(r'comment-likes', views.CommentLikeViewSet, basename='commentlike')
 router.register(r'shares', views.PostShareViewSet, basename='postshare')
 router.register(r'reports', views.PostReportViewSet, basename='postreport')
+router.register(r'moderation', views.ModerationQueueViewSet, basename='moderation')
 router.register(r'tags', views.PostTagViewSet, basename='posttag')
 router.register(r'stats', views.PostStatsViewSet, basename='poststats')
 
@@ -1,13 +1,26 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from django.db.models import Count, Q
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, Sum, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
 from .models import (
     PostCategory, Post, PostLike, PostComment, CommentLike, 
-    PostShare, PostReport, PostTag
+    PostShare, PostReport, PostTag, ModerationItem
+)
+from tieba.models import Tieba
+from users import reputation
+from users.leaderboards import post_scope
+from .dedup import forget_content
+from .hotreplies import hot_replies, record_likes
+from .moderation import close_items, record_report
+from .replies import (
+    FLOORS_PER_PAGE, allocate_floor, delete_reply, floor_page, record_reply, subtree_ids, top_level_floor,
 )
 from .serializers import *
 
@@ -21,6 +34,56 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 100
 
 
+# Replies shown inside each floor of an author-filtered thread
+REPLY_PREVIEW = 5
+
+
+class ThreadCursorPagination(CursorPagination):
+    """
+    Cursor pages of a thread in reply order.
+    
+    Each page seeks past the last created_at it served, so the deepest
+    page of a long thread costs the same as the first; there is no COUNT(*)
+    and no OFFSET walking the skipped comments.
+    """
+    page_size = 30
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'created_at'
+    
+    def get_ordering(self, request, queryset, view):
+        # Fixed, whatever ?ordering the view's OrderingFilter would accept
+        return (self.ordering,)
+
+
+def annotate_liked(comments, request):
+    """Resolve is_liked for every comment in the same query."""
+    if request.user.is_authenticated:
+        comments = comments.annotate(user_liked=Exists(
+            CommentLike.objects.filter(comment=OuterRef('pk'), user=request.user)
+        ))
+    return comments
+
+
+def floor_page_response(request, post, floor, **extra):
+    """The page of approved top-level comments that holds a floor."""
+    page, first, last = floor_page(floor)
+    comments = PostComment.objects.filter(
+        post=post, parent__isnull=True, is_approved=True, floor__range=(first, last),
+    ).select_related('author').order_by('floor')
+    serializer = PostCommentSerializer(annotate_liked(comments, request), many=True, context={'request': request})
+    return Response({
+        'post': post.pk,
+        'floor': floor,
+        'page': page,
+        'floors_per_page': FLOORS_PER_PAGE,
+        'last_floor': post.last_floor,
+        'pages': floor_page(post.last_floor)[0],
+        **extra,
+        'results': serializer.data,
+    })
+
+
 class PostCategoryViewSet(viewsets.ModelViewSet):
     """ViewSet for post categories."""
     
@@ -40,8 +103,10 @@ class PostCategoryViewSet(viewsets.ModelViewSet):
 class PostViewSet(viewsets.ModelViewSet):
     """ViewSet for posts."""
     
-    queryset = Post.objects.select_related('author', 'category').prefetch_related('tags')
+    queryset = Post.objects.select_related('author', 'category', 'last_reply_by').prefetch_related('tags')
     pagination_class = StandardResultsSetPagination
+    query_budgets = {'list': 5, 'retrieve': 8, 'only_op': 3}
+    throttle_scopes = {'like': 'like'}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -55,13 +120,18 @@ class PostViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter queryset based on request parameters."""
-        queryset = self.queryset.filter(status='published')
+        queryset = self.queryset.filter(status='published', is_approved=True)
         
         # Filter by category
         category_id = self.request.query_params.get('category')
         if category_id:
             queryset = queryset.filter(category_id=category_id)
         
+        # Filter by forum
+        tieba_id = self.request.query_params.get('tieba')
+        if tieba_id:
+            queryset = queryset.filter(tieba_id=tieba_id)
+        
         # Filter by author
         author_id = self.request.query_params.get('author')
         if author_id:
@@ -79,8 +149,12 @@ class PostViewSet(viewsets.ModelViewSet):
                 Q(title__icontains=search) | Q(content__icontains=search)
             )
         
-        # Order by pinned first, then by creation date
-        queryset = queryset.order_by('-is_pinned', '-created_at')
+        # Order by pinned first, then by creation date, or by latest reply
+        # with ?order=active
+        if self.request.query_params.get('order') == 'active':
+            queryset = queryset.order_by('-is_pinned', '-last_reply_at')
+        else:
+            queryset = queryset.order_by('-is_pinned', '-created_at')
         
         return queryset
     
@@ -90,32 +164,73 @@ class PostViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
     
+    def retrieve(self, request, *args, **kwargs):
+        """Post detail, with its hot replies (神回复) in the same response."""
+        post = self.get_object()
+        comments = annotate_liked(PostComment.objects.select_related('author'), request)
+        replies = PostCommentSerializer(hot_replies(post.pk, comments), many=True, context=self.get_serializer_context())
+        return Response(dict(self.get_serializer(post).data, hot_replies=replies.data))
+    
     def perform_create(self, serializer):
         """Set author and handle published_at."""
-        post = serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            if post.tieba_id:
+                Tieba.objects.filter(pk=post.tieba_id).update(posts_count=F('posts_count') + 1)
+            reputation.record(post.author_id, 'post', scope=post_scope(post.category_id))
         if post.status == 'published' and not post.published_at:
             post.published_at = timezone.now()
             post.save()
     
+    def perform_destroy(self, instance):
+        """Keep the forum's post count and its authors' reputation in step."""
+        with transaction.atomic():
+            if instance.tieba_id:
+                Tieba.objects.filter(pk=instance.tieba_id, posts_count__gt=0).update(
+                    posts_count=F('posts_count') - 1
+                )
+            # The comments go with the post, whoever wrote them
+            scope = post_scope(instance.category_id)
+            comments = PostComment.objects.filter(post=instance)
+            reputation.take_back('comment', reputation.authors_of(comments), scope, reputation.recent_of(
+                comments, CommentLike.objects.filter(comment__post=instance), 'comment__author_id',
+            ))
+            # The likes themselves, not likes_count, which may have drifted
+            likes = instance.likes.count()
+            reputation.take_back('post', {instance.author_id: (1, likes)}, scope, reputation.recent_of(
+                Post.objects.filter(pk=instance.pk), PostLike.objects.filter(post=instance), 'post__author_id',
+            ))
+            # Deleted content must not go on matching as a duplicate
+            forget_content('post', [instance.pk])
+            forget_content('comment', comments.values('pk'))
+            instance.delete()
+    
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """Like or unlike a post."""
         post = self.get_object()
-        like, created = PostLike.objects.get_or_create(
-            post=post, 
-            user=request.user
-        )
-        
-        if not created:
-            # Unlike if already liked
-            like.delete()
-            post.likes_count = max(0, post.likes_count - 1)
-            message = 'Post unliked'
-        else:
-            post.likes_count += 1
-            message = 'Post liked'
-        
-        post.save(update_fields=['likes_count'])
+        with transaction.atomic():
+            like, created = PostLike.objects.get_or_create(
+                post=post, 
+                user=request.user
+            )
+            
+            if not created:
+                # Unlike if already liked
+                like.delete()
+                change = Greatest(F('likes_count') - 1, Value(0))
+                message = 'Post unliked'
+            else:
+                change = F('likes_count') + 1
+                message = 'Post liked'
+            
+            # Counted in SQL so concurrent likes don't overwrite each other
+            Post.objects.filter(pk=post.pk).update(likes_count=change)
+            post.refresh_from_db(fields=['likes_count'])
+            reputation.record_like(
+                post.author_id, 'post', 1 if created else -1, post_scope(post.category_id),
+                earned_at=like.created_at,
+            )
         return Response({'message': message, 'likes_count': post.likes_count})
     
     @action(detail=True, methods=['post'])
@@ -125,6 +240,34 @@ class PostViewSet(viewsets.ModelViewSet):
         post.increment_views()
         return Response({'views_count': post.views_count})
     
+    @action(detail=True, methods=['get'], url_path=r'floors/(?P<floor>\d+)')
+    def floor(self, request, pk=None, floor=None):
+        """Jump to floor N: the page of floors that contains it."""
+        post = self.get_object()
+        if int(floor) > post.last_floor:
+            return Response({'error': 'No such floor.'}, status=status.HTTP_404_NOT_FOUND)
+        return floor_page_response(request, post, int(floor))
+    
+    @action(detail=True, methods=['get'], url_path='only-op')
+    def only_op(self, request, pk=None):
+        """只看楼主: the floors the OP (or ?author=) posted, each with its first replies."""
+        # Not get_object(): get_queryset() reads ?author= as a post filter
+        post = get_object_or_404(Post, pk=pk, status='published', is_approved=True)
+        author_id = request.query_params.get('author', str(post.author_id))
+        if not author_id.isdigit():
+            return Response({'error': 'Invalid author.'}, status=status.HTTP_400_BAD_REQUEST)
+        replies = PostComment.objects.filter(is_approved=True).select_related('author').order_by('created_at')
+        floors = PostComment.objects.filter(
+            post=post, author_id=author_id, parent__isnull=True, is_approved=True,
+        ).select_related('author').prefetch_related(
+            # Sliced per floor, in the same single query
+            Prefetch('replies', queryset=annotate_liked(replies, request)[:REPLY_PREVIEW], to_attr='first_replies'),
+        )
+        paginator = ThreadCursorPagination()
+        page = paginator.paginate_queryset(annotate_liked(floors, request), request, view=self)
+        serializer = AuthorFloorSerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
+    
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """Get featured posts."""
@@ -152,11 +295,15 @@ class PostCommentViewSet(viewsets.ModelViewSet):
     queryset = PostComment.objects.select_related('author', 'post', 'parent')
     serializer_class = PostCommentSerializer
     pagination_class = StandardResultsSetPagination
+    query_budgets = {'list': 5}
+    throttle_scopes = {'create': 'comment', 'like': 'like'}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
         if self.action == 'create':
             return PostCommentCreateSerializer
+        elif self.action in ['update', 'partial_update']:
+            return PostCommentUpdateSerializer
         return PostCommentSerializer
     
     def get_queryset(self):
@@ -168,6 +315,11 @@ class PostCommentViewSet(viewsets.ModelViewSet):
         if post_id:
             queryset = queryset.filter(post_id=post_id)
         
+        # Filter by author, e.g. one user's comments in a thread
+        author_id = self.request.query_params.get('author')
+        if author_id:
+            queryset = queryset.filter(author_id=author_id)
+        
         # Filter by parent (for replies)
         parent_id = self.request.query_params.get('parent')
         if parent_id:
@@ -175,8 +327,18 @@ class PostCommentViewSet(viewsets.ModelViewSet):
         else:
             # Only top-level comments by default
             queryset = queryset.filter(parent__isnull=True)
+            
+            # Start at a floor, in floor order
+            floor = self.request.query_params.get('floor')
+            if floor and floor.isdigit():
+                queryset = queryset.filter(floor__gte=int(floor)).order_by('floor')
+        
+        # Resolve is_liked for the whole page in the same query
+        queryset = annotate_liked(queryset, self.request)
         
-        return queryset.order_by('created_at')
+        if not queryset.query.order_by:
+            queryset = queryset.order_by('created_at')
+        return queryset
     
     def get_permissions(self):
         """Set permissions based on action."""
@@ -184,41 +346,67 @@ class PostCommentViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated()]
         return [permissions.AllowAny()]
     
+    @action(detail=True, methods=['get'])
+    def page(self, request, pk=None):
+        """The floor page a comment (or the floor it replies in) is on."""
+        comment = get_object_or_404(
+            PostComment.objects.select_related('post'), pk=pk, is_approved=True,
+        )
+        floor = top_level_floor(comment)
+        if floor is None:
+            return Response({'error': 'Comment has no floor.'}, status=status.HTTP_404_NOT_FOUND)
+        return floor_page_response(request, comment.post, floor, comment=comment.pk)
+    
     def perform_create(self, serializer):
-        """Set author and update post comment count."""
-        comment = serializer.save(author=self.request.user)
-        
-        # Update post comment count
-        post = comment.post
-        post.comments_count += 1
-        post.save(update_fields=['comments_count'])
+        """Set author, number the floor, count the reply and bump its thread."""
+        with transaction.atomic():
+            floor = None
+            if serializer.validated_data.get('parent') is None:
+                floor = allocate_floor(serializer.validated_data['post'].pk)
+            comment = serializer.save(author=self.request.user, floor=floor)
+            record_reply(comment)
+            reputation.record(comment.author_id, 'comment', scope=post_scope(comment.post.category_id))
     
     def perform_destroy(self, instance):
-        """Update post comment count when deleting."""
-        post = instance.post
-        post.comments_count = max(0, post.comments_count - 1)
-        post.save(update_fields=['comments_count'])
-        instance.delete()
+        """Update post comment count, latest reply and reputation when deleting."""
+        with transaction.atomic():
+            ids = subtree_ids(instance)
+            subtree = PostComment.objects.filter(pk__in=ids)
+            reputation.take_back(
+                'comment', reputation.authors_of(subtree), post_scope(instance.post.category_id),
+                reputation.recent_of(subtree, CommentLike.objects.filter(comment__in=subtree), 'comment__author_id'),
+            )
+            forget_content('comment', ids)
+            delete_reply(instance)
     
     @action(detail=True, methods=['post'])
     def like(self, request, pk=None):
         """Like or unlike a comment."""
         comment = self.get_object()
-        like, created = CommentLike.objects.get_or_create(
-            comment=comment, 
-            user=request.user
-        )
-        
-        if not created:
-            # Unlike if already liked
-            like.delete()
-            comment.likes_count = max(0, comment.likes_count - 1)
-            message = 'Comment unliked'
-        else:
-            comment.likes_count += 1
-            message = 'Comment liked'
-        
-        comment.save(update_fields=['likes_count'])
+        with transaction.atomic():
+            like, created = CommentLike.objects.get_or_create(
+                comment=comment, 
+                user=request.user
+            )
+            
+            if not created:
+                # Unlike if already liked
+                like.delete()
+                change = Greatest(F('likes_count') - 1, Value(0))
+                message = 'Comment unliked'
+            else:
+                change = F('likes_count') + 1
+                message = 'Comment liked'
+            
+            # The UPDATE holds the comment's row until commit, so concurrent
+            # likes reach the hot replies set in the order they counted
+            PostComment.objects.filter(pk=comment.pk).update(likes_count=change)
+            comment.refresh_from_db(fields=['likes_count'])
+            record_likes(comment)
+            reputation.record_like(
+                comment.author_id, 'comment', 1 if created else -1, post_scope(comment.post.category_id),
+                earned_at=like.created_at,
+            )
         return Response({'message': message, 'likes_count': comment.likes_count})
 
 
@@ -315,6 +503,7 @@ class PostReportViewSet(viewsets.ModelViewSet):
     queryset = PostReport.objects.select_related('reporter', 'post', 'comment')
     serializer_class = PostReportSerializer
     pagination_class = StandardResultsSetPagination
+    throttle_scopes = {'create': 'report'}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -344,16 +533,57 @@ class PostReportViewSet(viewsets.ModelViewSet):
         return [permissions.IsAuthenticated()]
     
     def perform_create(self, serializer):
-        """Set reporter and update reported count."""
-        report = serializer.save(reporter=self.request.user)
-        
-        # Update reported count on target
-        if report.post:
-            report.post.reported_count += 1
-            report.post.save(update_fields=['reported_count'])
-        elif report.comment:
-            report.comment.reported_count += 1
-            report.comment.save(update_fields=['reported_count'])
+        """Set reporter and add the report to the moderation queue."""
+        data = serializer.validated_data
+        target = data.get('post') or data.get('comment')
+        try:
+            with transaction.atomic():
+                item_id = record_report(self.request.user, target, data['report_type'])
+                serializer.save(reporter=self.request.user, item_id=item_id)
+        except IntegrityError:
+            # A concurrent duplicate got past the serializer's check
+            raise ValidationError({'non_field_errors': ["You have already reported this."]})
+
+
+class ModerationQueueViewSet(viewsets.ReadOnlyModelViewSet):
+    """Staff queue of reported posts and comments, highest priority first."""
+    
+    queryset = ModerationItem.objects.select_related('post', 'comment')
+    serializer_class = ModerationItemSerializer
+    pagination_class = StandardResultsSetPagination
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get_queryset(self):
+        """Open items by default; ?status=resolved|dismissed for closed ones."""
+        status_filter = self.request.query_params.get('status', 'open')
+        queryset = self.queryset.filter(status=status_filter)
+        
+        target_type = self.request.query_params.get('type')
+        if target_type == 'post':
+            queryset = queryset.filter(post__isnull=False)
+        elif target_type == 'comment':
+            queryset = queryset.filter(comment__isnull=False)
+        
+        return queryset.order_by('-priority', 'pk')
+    
+    def close(self, request, status_value):
+        serializer = ModerationActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        closed = close_items(
+            serializer.validated_data['ids'], status_value, request.user,
+            notes=serializer.validated_data['notes'],
+        )
+        return Response({'closed': closed})
+    
+    @action(detail=False, methods=['post'])
+    def resolve(self, request):
+        """Resolve items and all of their reports; hidden targets stay hidden."""
+        return self.close(request, 'resolved')
+    
+    @action(detail=False, methods=['post'])
+    def dismiss(self, request):
+        """Dismiss items and their reports, un-hiding auto-hidden targets."""
+        return self.close(request, 'dismissed')
 
 
 class PostTagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -378,19 +608,21 @@ class PostStatsViewSet(viewsets.ViewSet):
     """ViewSet for post statistics."""
     
     permission_classes = [permissions.AllowAny]
+    query_budgets = {'list': 8}
     
     def list(self, request):
         """Get overall post statistics."""
         total_posts = Post.objects.filter(status='published').count()
         total_comments = PostComment.objects.filter(is_approved=True).count()
         total_likes = PostLike.objects.count()
-        total_views = Post.objects.aggregate(total_views=models.Sum('views_count'))['total_views'] or 0
+        total_views = Post.objects.aggregate(total_views=Sum('views_count'))['total_views'] or 0
         
         # Get popular posts (by views)
-        popular_posts = Post.objects.filter(status='published').order_by('-views_count')[:5]
+        published = Post.objects.filter(status='published').select_related('author', 'category', 'last_reply_by')
+        popular_posts = published.order_by('-views_count')[:5]
         
         # Get recent posts
-        recent_posts = Post.objects.filter(status='published').order_by('-created_at')[:5]
+        recent_posts = published.order_by('-created_at')[:5]
         
         data = {
             'total_posts': total_posts,
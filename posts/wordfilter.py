@@ -0,0 +1,267 @@
+"""
+Sensitive-word filter built on an Aho–Corasick automaton.
+
+Words and text go through the same normalization, so spelling tricks match
+the listed word:
+
+* NFKC folds full-width forms to half-width and compatibility characters
+  to their base form; ASCII is lower-cased
+* traditional characters are mapped to simplified ones (through OpenCC
+  when installed, otherwise a built-in table of common characters)
+* whitespace, punctuation, symbols and emoji become separators, and
+  zero-width characters are dropped. A separator is kept, as one space,
+  only between two ASCII letters or digits, so "赌 博", "赌*博" and
+  "赌​博" all match 赌博, but Latin words do not run together:
+  "Is Expensive" is "is expensive", not "isexpensive"
+* a run of single Latin letters or digits is joined into one word, so
+  "s e x" and "f.u.c.k" are spelled-out words and match
+
+An ASCII letter or digit at either end of a listed word must also be at a
+word boundary in the text, so "sex" does not match "Essex". Words made of
+CJK characters match anywhere.
+
+Normalization is one str.translate() call and three regex passes over the
+separators. The automaton then scans the
+text once, whatever the number of words, so cost grows with the text
+length rather than words x length.
+
+Words are SensitiveWord rows. Saving or deleting one bumps a version in the
+shared cache, and every process rebuilds its automaton within
+WORD_FILTER_RELOAD_INTERVAL seconds, without a restart.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    from opencc import OpenCC
+except ImportError:  # pragma: no cover - OpenCC is optional, fall back to the built-in table
+    OpenCC = None
+
+VERSION_KEY = 'wordfilter:version'
+
+# Traditional -> simplified for common characters, used without OpenCC
+_T2S_PAIRS = (
+    '與与 專专 業业 東东 絲丝 兩两 個个 為为 麗丽 樂乐 習习 書书 買买 亂乱 雲云 產产 們们 價价 '
+    '會会 傳传 體体 兒儿 黨党 關关 興兴 農农 幾几 擊击 劃划 則则 創创 別别 動动 區区 醫医 華华 '
+    '單单 賣卖 衛卫 廠厂 歷历 壓压 縣县 參参 發发 變变 號号 嗎吗 團团 國国 圖图 場场 聲声 處处 '
+    '頭头 獎奖 媽妈 學学 寶宝 實实 對对 導导 島岛 幣币 師师 帶带 幫帮 廣广 開开 張张 彈弹 強强 '
+    '歸归 當当 錄录 從从 應应 態态 總总 愛爱 戲戏 據据 數数 時时 條条 來来 極极 樣样 權权 歡欢 '
+    '殺杀 氣气 漢汉 滿满 點点 熱热 燈灯 獨独 現现 畫画 監监 盜盗 確确 碼码 禮礼 離离 種种 積积 '
+    '穩稳 筆笔 簡简 紅红 級级 紙纸 線线 組组 細细 經经 結结 給给 絕绝 統统 網网 綠绿 編编 續续 '
+    '羅罗 聞闻 聯联 職职 聽听 腦脑 藥药 術术 見见 規规 視视 覺觉 觀观 計计 認认 討讨 讓让 議议 '
+    '記记 講讲 許许 論论 設设 證证 評评 識识 詞词 譯译 試试 話话 語语 說说 請请 讀读 課课 誰谁 '
+    '調调 談谈 謝谢 貝贝 負负 財财 責责 貨货 質质 販贩 貪贪 費费 賭赌 資资 賊贼 車车 轉转 輪轮 '
+    '輸输 邊边 達达 運运 過过 進进 還还 這这 連连 選选 郵邮 錯错 錢钱 鐵铁 銀银 長长 門门 問问 '
+    '間间 陽阳 陰阴 隊队 險险 難难 雞鸡 電电 靈灵 頁页 順顺 題题 類类 風风 飛飞 飯饭 館馆 馬马 '
+    '驗验 魚鱼 鳥鸟 黃黄 龍龙 槍枪 騙骗 慾欲 黴霉 務务 蘭兰 葉叶 員员 際际'
+)
+_T2S = {pair[0]: pair[1] for pair in _T2S_PAIRS.split()}
+
+# Emoji and pictographs, separators like punctuation
+_EXTRA_RANGES = (range(0x1F000, 0x1FB00),)
+
+# Separators left by the translation table: one space between ASCII
+# letters and digits, none anywhere else
+_WORD_GAP = re.compile(r'(?<=[0-9a-z]) +(?=[0-9a-z])')
+_OTHER_GAP = re.compile(r'(?<![0-9a-z]) | (?![0-9a-z])')
+# Single letters or digits one separator apart, a word spelled out
+_SPELLED = re.compile(r'(?<![0-9a-z])[0-9a-z](?: [0-9a-z])+(?![0-9a-z])')
+
+
+def _join(match):
+    return match.group().replace(' ', '')
+
+
+def _to_simplified():
+    if OpenCC is None:
+        return _T2S.get
+    converter = OpenCC('t2s')
+
+    def convert(char, default=None):
+        converted = converter.convert(char)
+        return converted if len(converted) == 1 and converted != char else default
+    return convert
+
+
+def build_translation_table():
+    """str.translate() table applying the whole normalization per character."""
+    to_simplified = _to_simplified()
+    table = {}
+    codepoints = [range(0x10000), *_EXTRA_RANGES]
+    for block in codepoints:
+        for codepoint in block:
+            char = chr(codepoint)
+            folded = unicodedata.normalize('NFKC', char).lower()
+            folded = ''.join(to_simplified(c, None) or c for c in folded)
+            folded = ''.join(c for c in folded if c.isalnum())
+            if not folded and (char.isspace() or unicodedata.category(char)[0] not in 'CM'):
+                # Whitespace, punctuation and symbols; control, format
+                # (zero-width) and combining characters are dropped
+                folded = ' '
+            if folded != char:
+                table[codepoint] = folded or None
+    return table
+
+
+_table = None
+_table_lock = threading.Lock()
+
+
+def normalize(text):
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = build_translation_table()
+    text = (text or '').translate(_table)
+    return _OTHER_GAP.sub('', _SPELLED.sub(_join, _WORD_GAP.sub(' ', text)))
+
+
+def _is_word_char(char):
+    return char.isascii() and char.isalnum()
+
+
+def at_boundary(text, end, word):
+    """Whether `word`, found ending at text[end], does not start or end inside a Latin word."""
+    start = end - len(word) + 1
+    if _is_word_char(word[0]) and start > 0 and _is_word_char(text[start - 1]):
+        return False
+    if _is_word_char(word[-1]) and end + 1 < len(text) and _is_word_char(text[end + 1]):
+        return False
+    return True
+
+
+class Automaton:
+    """Aho–Corasick automaton over normalized words."""
+
+    def __init__(self, words):
+        # words: {normalized word: level}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for word, level in words.items():
+            self._add(word, level)
+        self._link()
+
+    def _add(self, word, level):
+        state = 0
+        for char in word:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        self.output[state] = ((word, level),)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                if self.fail[next_state] == next_state:
+                    self.fail[next_state] = 0
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def search(self, text):
+        """Yield (end index, word, level) for every match in normalized text."""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                for word, level in output[state]:
+                    yield index, word, level
+
+
+@dataclass
+class FilterResult:
+    blocked: list = field(default_factory=list)
+    review: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.blocked or self.review)
+
+
+class WordFilter:
+    """Process-wide automaton, rebuilt when the shared version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.automaton = None
+        self.version = None
+        self.checked_at = 0.0
+
+    def load_words(self):
+        from .models import SensitiveWord
+
+        words = {}
+        for word, level in SensitiveWord.objects.filter(is_active=True).values_list('word', 'level'):
+            normalized = normalize(word)
+            # 'block' wins when two spellings normalize to the same word
+            if normalized and words.get(normalized) != 'block':
+                words[normalized] = level
+        return words
+
+    def current(self):
+        interval = getattr(settings, 'WORD_FILTER_RELOAD_INTERVAL', 10)
+        now = time.monotonic()
+        if self.automaton is not None and now - self.checked_at < interval:
+            return self.automaton
+        with self._lock:
+            if self.automaton is not None and now - self.checked_at < interval:
+                return self.automaton
+            try:
+                version = cache.get(VERSION_KEY)
+            except Exception:
+                version = self.version
+            if self.automaton is None or version != self.version:
+                self.automaton = Automaton(self.load_words())
+                self.version = version
+            self.checked_at = now
+        return self.automaton
+
+    def check(self, text):
+        result = FilterResult()
+        seen = set()
+        text = normalize(text)
+        for index, word, level in self.current().search(text):
+            if word not in seen and at_boundary(text, index, word):
+                seen.add(word)
+                (result.blocked if level == 'block' else result.review).append(word)
+        return result
+
+
+word_filter = WordFilter()
+
+
+def check_text(*texts):
+    """Match texts against the sensitive word list."""
+    result = FilterResult()
+    for text in texts:
+        found = word_filter.check(text)
+        result.blocked += found.blocked
+        result.review += found.review
+    return result
+
+
+def bump_version():
+    """Tell every process to rebuild its automaton."""
+    cache.set(VERSION_KEY, time.time_ns(), None)
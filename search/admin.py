@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import SearchHistory
+
+
+@admin.register(SearchHistory)
+class SearchHistoryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'updated_at']
+    search_fields = ['user__username']
+    raw_id_fields = ['user']
+    readonly_fields = ['updated_at']
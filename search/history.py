@@ -0,0 +1,215 @@
+"""
+Per-user search history (搜索历史).
+
+Each user keeps their SEARCH_HISTORY_SIZE most recent distinct queries,
+newest first; searching again for a query moves it to the front. The
+list lives in the cache as one string per user (the queries joined by
+SEPARATOR), so reading it is one cache get and it costs a few hundred
+bytes per user.
+
+Recording never touches the cache or the database on the request thread:
+record() queues the query and a background thread folds queued queries
+into the cached lists, then saves the lists that changed to SearchHistory
+rows every SEARCH_HISTORY_PERSIST_INTERVAL seconds, as users/activity.py
+does for last_active. Reads overlay the queries still in the queue, so a
+search shows up in the history straight away. A cache miss reloads the
+list from the database. With an interval of 0, record() writes both
+immediately.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+HISTORY_KEY = 'search_history:{}'
+SEPARATOR = '\x1f'
+MAX_QUERY_LENGTH = 100
+BATCH_SIZE = 500
+
+
+def normalize(query):
+    """Collapse whitespace; None for queries not worth remembering."""
+    query = ' '.join(str(query).split())[:MAX_QUERY_LENGTH]
+    return query.replace(SEPARATOR, '') or None
+
+
+def push(queries, query, size):
+    """`queries` with `query` moved (or added) to the front, capped at `size`."""
+    folded = query.casefold()
+    return [query, *(q for q in queries if q.casefold() != folded)][:size]
+
+
+def pack(queries):
+    return SEPARATOR.join(queries)
+
+
+def unpack(value):
+    return value.split(SEPARATOR) if value else []
+
+
+class HistoryRecorder:
+    """Queues searches and keeps the cached and saved histories up to date."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._dirty = set()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @property
+    def size(self):
+        return getattr(settings, 'SEARCH_HISTORY_SIZE', 20)
+
+    @property
+    def persist_interval(self):
+        return getattr(settings, 'SEARCH_HISTORY_PERSIST_INTERVAL', 30)
+
+    @property
+    def cache_ttl(self):
+        return getattr(settings, 'SEARCH_HISTORY_CACHE_TTL', 7 * 24 * 60 * 60)
+
+    def record(self, user_id, query):
+        """Add a search to the user's history without waiting for any I/O."""
+        query = normalize(query)
+        if query is None:
+            return
+        with self._lock:
+            self._queue.append((user_id, query))
+            if self.persist_interval > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='search-history', daemon=True)
+                self._thread.start()
+        if self.persist_interval <= 0:
+            self.flush()
+        else:
+            self._wake.set()
+
+    def recent(self, user_id):
+        """The user's history, newest first."""
+        value = cache.get(HISTORY_KEY.format(user_id))
+        if value is None:
+            queries = self._load(user_id)
+            cache.set(HISTORY_KEY.format(user_id), pack(queries), self.cache_ttl)
+        else:
+            queries = unpack(value)
+        with self._lock:
+            pending = [query for pk, query in self._queue if pk == user_id]
+        for query in pending:
+            queries = push(queries, query, self.size)
+        return queries
+
+    def forget(self, user_id, query=None):
+        """Remove one query, or with None the whole history, now."""
+        from .models import SearchHistory
+
+        with self._lock:
+            self._queue = deque(item for item in self._queue if item[0] != user_id)
+        if query is None:
+            queries = []
+        else:
+            folded = query.casefold()
+            queries = [q for q in self.recent(user_id) if q.casefold() != folded]
+        cache.set(HISTORY_KEY.format(user_id), pack(queries), self.cache_ttl)
+        SearchHistory.objects.update_or_create(user_id=user_id, defaults={'queries': queries})
+        with self._lock:
+            self._dirty.discard(user_id)
+        return queries
+
+    def _load(self, user_id):
+        from .models import SearchHistory
+
+        row = SearchHistory.objects.filter(user_id=user_id).values_list('queries', flat=True).first()
+        return row or []
+
+    def apply(self):
+        """Fold queued searches into the cached histories; returns the users changed."""
+        with self._lock:
+            queued, self._queue = self._queue, deque()
+        if not queued:
+            return 0
+        by_user = {}
+        for user_id, query in queued:
+            by_user.setdefault(user_id, []).append(query)
+        keys = {user_id: HISTORY_KEY.format(user_id) for user_id in by_user}
+        try:
+            cached = cache.get_many(keys.values())
+            updated = {}
+            for user_id, queries in by_user.items():
+                value = cached.get(keys[user_id])
+                history = unpack(value) if value is not None else self._load(user_id)
+                for query in queries:
+                    history = push(history, query, self.size)
+                updated[keys[user_id]] = pack(history)
+            cache.set_many(updated, self.cache_ttl)
+        except Exception:
+            # Keep the searches for the next attempt, ahead of newer ones
+            with self._lock:
+                self._queue.extendleft(reversed(queued))
+            raise
+        with self._lock:
+            self._dirty.update(by_user)
+        return len(by_user)
+
+    def persist(self):
+        """Save the histories changed since the last call; returns how many."""
+        from .models import SearchHistory
+
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return 0
+        user_ids = sorted(dirty)
+        try:
+            now = timezone.now()
+            for start in range(0, len(user_ids), BATCH_SIZE):
+                batch = user_ids[start:start + BATCH_SIZE]
+                cached = cache.get_many([HISTORY_KEY.format(user_id) for user_id in batch])
+                rows = [
+                    SearchHistory(user_id=user_id, queries=unpack(cached[HISTORY_KEY.format(user_id)]), updated_at=now)
+                    for user_id in batch if HISTORY_KEY.format(user_id) in cached
+                ]
+                SearchHistory.objects.bulk_create(
+                    rows, update_conflicts=True, unique_fields=['user'], update_fields=['queries', 'updated_at'],
+                )
+        except Exception:
+            logger.exception('Could not save the search history of %d users', len(dirty))
+            with self._lock:
+                self._dirty.update(dirty)
+            return 0
+        return len(dirty)
+
+    def flush(self):
+        """Apply the queue and save everything that changed."""
+        try:
+            self.apply()
+        except Exception:
+            logger.exception('Could not update cached search histories')
+        return self.persist()
+
+    def _run(self):
+        last_persist = time.monotonic()
+        while True:
+            self._wake.wait(self.persist_interval)
+            self._wake.clear()
+            try:
+                self.apply()
+                if time.monotonic() - last_persist >= self.persist_interval:
+                    last_persist = time.monotonic()
+                    self.persist()
+            except Exception:
+                logger.exception('Could not update cached search histories')
+            finally:
+                close_old_connections()
+
+
+recorder = HistoryRecorder()
+atexit.register(recorder.flush)
@@ -0,0 +1,20 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+
+class SearchHistory(models.Model):
+    """A user's recent searches (搜索历史), newest first; see search/history.py."""
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='search_history')
+    queries = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('search history')
+        verbose_name_plural = _('search histories')
+    
+    def __str__(self):
+        return f"Search history of {self.user}"
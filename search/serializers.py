@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from wiki.models import Article, Category, Tag
 from posts.models import Post, PostCategory
+from .snippets import highlight, snippets
 
 User = get_user_model()
 
@@ -11,7 +12,8 @@ class SearchResultSerializer(serializers.Serializer):
     
     id = serializers.CharField()
     title = serializers.CharField()
-    content = serializers.CharField()
+    highlighted_title = serializers.CharField(required=False)
+    snippets = serializers.ListField(child=serializers.CharField(), required=False)
     type = serializers.CharField()  # 'article', 'post', 'user', etc.
     url = serializers.CharField()
     score = serializers.FloatField(required=False)
@@ -25,7 +27,23 @@ class SearchResultSerializer(serializers.Serializer):
     likes_count = serializers.IntegerField(required=False)
 
 
-class ArticleSearchSerializer(serializers.ModelSerializer):
+class HighlightedSearchSerializer(serializers.ModelSerializer):
+    """
+    Base for hits with a body: the title and snippets of the body with the
+    query (context['query']) highlighted, instead of the whole content.
+    """
+    
+    highlighted_title = serializers.SerializerMethodField()
+    snippets = serializers.SerializerMethodField()
+    
+    def get_highlighted_title(self, obj):
+        return highlight(obj.title, self.context.get('query', ''))
+    
+    def get_snippets(self, obj):
+        return snippets(obj.content, self.context.get('query', ''))
+
+
+class ArticleSearchSerializer(HighlightedSearchSerializer):
     """Serializer for article search results."""
     
     author = serializers.SerializerMethodField()
@@ -37,7 +55,7 @@ class ArticleSearchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
         fields = [
-            'id', 'title', 'content', 'type', 'url', 'author', 
+            'id', 'title', 'highlighted_title', 'snippets', 'type', 'url', 'author',
             'category', 'tags', 'created_at', 'views_count', 'likes_count'
         ]
     
@@ -67,7 +85,7 @@ class ArticleSearchSerializer(serializers.ModelSerializer):
         return 'article'
 
 
-class PostSearchSerializer(serializers.ModelSerializer):
+class PostSearchSerializer(HighlightedSearchSerializer):
     """Serializer for post search results."""
     
     author = serializers.SerializerMethodField()
@@ -78,7 +96,7 @@ class PostSearchSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = [
-            'id', 'title', 'content', 'type', 'url', 'author', 
+            'id', 'title', 'highlighted_title', 'snippets', 'type', 'url', 'author',
             'category', 'created_at', 'views_count', 'likes_count', 'comments_count'
         ]
     
@@ -0,0 +1,189 @@
+"""
+Highlighted snippets for search hits (摘要).
+
+Search results show up to SEARCH_SNIPPET_FRAGMENTS fragments of at most
+SEARCH_SNIPPET_LENGTH characters from the place in the text that matches
+the query best, instead of the whole content. Matches are wrapped in
+<em>, and everything else is escaped, so a fragment can be inserted as
+HTML as it is.
+
+Query terms are CJK-aware. Chinese is written without spaces, so a query
+is split at whitespace and where it switches between CJK and other
+scripts: "python教程 入门" looks for "python", "教程" and "入门" as
+well as the whole query. A CJK term that does not occur at all falls
+back to its two-character pieces, which is how most Chinese words are
+built.
+
+The best fragment is the window that covers the most distinct terms, then
+the most matches, found with two pointers over the match positions. Its
+edges snap back to a sentence boundary when there is one nearby and
+never cut a Latin word in half.
+"""
+
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.html import escape, strip_tags
+
+CJK = re.compile(r'[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+')
+SENTENCE_END = '。！？；!?;\n'
+ELLIPSIS = '…'
+
+
+def snippet_length():
+    return getattr(settings, 'SEARCH_SNIPPET_LENGTH', 120)
+
+
+def snippet_fragments():
+    return getattr(settings, 'SEARCH_SNIPPET_FRAGMENTS', 2)
+
+
+def split_terms(query):
+    """(terms, fallback terms) of a query, longest first."""
+    terms, fallback = set(), set()
+    words = query.split()
+    if len(words) > 1:
+        terms.add(' '.join(words))
+    for word in words:
+        terms.add(word)
+        position = 0
+        for run in CJK.finditer(word):
+            latin = word[position:run.start()]
+            if len(latin) > 1:
+                terms.add(latin)
+            terms.add(run.group())
+            if len(run.group()) > 2:
+                fallback.update(run.group()[n:n + 2] for n in range(len(run.group()) - 1))
+            position = run.end()
+        if 0 < position < len(word) - 1:
+            terms.add(word[position:])
+    terms = {term.lower() for term in terms if len(term) > 1 or CJK.match(term)}
+    fallback = {term.lower() for term in fallback} - terms
+
+    def longest_first(items):
+        return sorted(items, key=lambda term: (-len(term), term))
+
+    return longest_first(terms), longest_first(fallback)
+
+
+@lru_cache(maxsize=256)
+def patterns(query):
+    """Compiled (terms, fallback) alternations for a query; either may be None."""
+    return tuple(
+        re.compile('|'.join(map(re.escape, terms)), re.IGNORECASE) if terms else None
+        for terms in split_terms(query)
+    )
+
+
+def find_matches(text, query):
+    """[(start, end, term)] of the query's terms in the text."""
+    primary, fallback = patterns(query)
+    matches = [(m.start(), m.end(), m.group().lower()) for m in primary.finditer(text)] if primary else []
+    if not matches and fallback is not None:
+        matches = [(m.start(), m.end(), m.group().lower()) for m in fallback.finditer(text)]
+    return matches
+
+
+def best_window(matches, length):
+    """Index range [i, j) of the matches in the best window of `length` characters."""
+    best, best_score = (0, 1), (0, 0)
+    counts = {}
+    j = 0
+    for i, (start, _, _) in enumerate(matches):
+        while j < len(matches) and matches[j][1] <= start + length:
+            counts[matches[j][2]] = counts.get(matches[j][2], 0) + 1
+            j += 1
+        score = (len(counts), j - i)
+        if score > best_score:
+            best, best_score = (i, j), score
+        term = matches[i][2]
+        counts[term] -= 1
+        if not counts[term]:
+            del counts[term]
+    return best
+
+
+def is_word_char(char):
+    return char.isascii() and char.isalnum()
+
+
+def inside_word(text, n):
+    return 0 < n < len(text) and is_word_char(text[n - 1]) and is_word_char(text[n])
+
+
+def place(text, first, last, length):
+    """Start and end of a fragment of at most `length` containing text[first:last]."""
+    slack = length // 5
+    # Some context before the first match, but never so much that the last is cut off
+    start = max(0, min(first - length // 4, len(text) - length), last - length)
+    for n in range(start, max(0, start - slack) - 1, -1):
+        if n == 0 or text[n - 1] in SENTENCE_END:
+            if last - n <= length:
+                start = n
+            break
+    end = min(len(text), start + length)
+    # Move the cuts out of words, but no further than the slack: a longer
+    # word (or no match at all) keeps the hard cut instead of losing the
+    # context, or the whole fragment, to it
+    n = start
+    while n < first and inside_word(text, n):
+        n += 1
+    if n - start <= slack:
+        start = n
+    n = end
+    while max(last, start) < n and inside_word(text, n):
+        n -= 1
+    if end - n <= slack:
+        end = n
+    for n in range(end, max(last, end - slack), -1):
+        if text[n - 1] in SENTENCE_END:
+            end = n
+            break
+    return start, end
+
+
+def render(text, start, end, matches):
+    """text[start:end], escaped, with the matches in it wrapped in <em>."""
+    parts, position = [], start
+    for match_start, match_end, _ in matches:
+        if match_start < position or match_end > end:
+            continue
+        parts += [escape(text[position:match_start]), '<em>', escape(text[match_start:match_end]), '</em>']
+        position = match_end
+    parts.append(escape(text[position:end]))
+    fragment = ''.join(parts).replace('\n', ' ').strip()
+    return (ELLIPSIS if start > 0 else '') + fragment + (ELLIPSIS if end < len(text) else '')
+
+
+def plain_text(content):
+    """Content without markup, with runs of spaces collapsed but line breaks kept."""
+    text = re.sub(r'\s*\n\s*', '\n', strip_tags(content or ''))
+    return re.sub(r'[^\S\n]+', ' ', text).strip()
+
+
+def snippets(content, query, length=None, fragments=None):
+    """Up to `fragments` highlighted fragments of the content, in document order."""
+    length = length or snippet_length()
+    fragments = fragments or snippet_fragments()
+    text = plain_text(content)
+    if not text:
+        return []
+    matches = find_matches(text, query)
+    if not matches:
+        return [render(text, *place(text, 0, 0, length), [])]
+
+    chosen, remaining = [], matches
+    while remaining and len(chosen) < fragments:
+        i, j = best_window(remaining, length)
+        start, end = place(text, remaining[i][0], remaining[j - 1][1], length)
+        chosen.append((start, end))
+        # Further fragments only for matches the ones so far do not show
+        remaining = [m for m in remaining if not any(s < m[1] and m[0] < e for s, e in chosen)]
+    return [render(text, start, end, matches) for start, end in sorted(chosen)]
+
+
+def highlight(text, query):
+    """The whole (short) text, escaped, with the query's terms in <em>."""
+    text = text or ''
+    return render(text, 0, len(text), find_matches(text, query))
@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase
+from rest_framework.test import APIClient
+
+from baidu_wiki.testing import QueryBudgetTestCase, assert_query_budget, create_users, rows_over_budget
+from posts.models import Post
+from wiki.models import Article
+
+from .snippets import ELLIPSIS, snippets
+from .views import SearchViewSet
+
+
+class SearchQueryBudgetTests(QueryBudgetTestCase):
+    """Search endpoints stay within their query_budgets however many hits they page."""
+
+    rows = rows_over_budget(SearchViewSet)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, = create_users('searcher', 1)
+        for i in range(cls.rows):
+            Article.objects.create(
+                title=f'Bridge article {i}', slug=f'bridge-{i}', content=f'How bridge {i} was built.',
+                author=cls.user, status='published',
+            )
+            Post.objects.create(
+                title=f'Bridge thread {i}', content=f'Crossing bridge {i} today.', author=cls.user,
+                status='published', is_approved=True,
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_search(self):
+        response = assert_query_budget(self.client, 'get', '/api/search/search/search/?q=bridge')
+        self.assertEqual(response.status_code, 200)
+
+    def test_history(self):
+        self.client.force_authenticate(self.user)
+        response = assert_query_budget(self.client, 'get', '/api/search/search/history/')
+        self.assertEqual(response.status_code, 200)
+
+
+class SnippetTests(SimpleTestCase):
+    """Fragments cut at word boundaries, falling back to a hard cut for overlong words."""
+
+    def test_cuts_between_words(self):
+        text = 'The quick brown fox jumps over the lazy dog. ' * 10
+        fragment = snippets(text, 'lazy', length=60)[0]
+        self.assertIn('<em>lazy</em>', fragment)
+        words = fragment.replace('<em>', '').replace('</em>', '').strip(ELLIPSIS).split()
+        self.assertLessEqual(set(words), set(text.split()))
+
+    def test_overlong_word_without_match_is_cut(self):
+        self.assertEqual(snippets('a' * 500, 'zz', length=120), ['a' * 120 + ELLIPSIS])
+
+    def test_overlong_word_after_match_keeps_context(self):
+        fragment = snippets('bridge ' + 'a' * 500, 'bridge', length=120)[0]
+        self.assertEqual(fragment, '<em>bridge</em> ' + 'a' * 113 + ELLIPSIS)
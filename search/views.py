@@ -1,4 +1,7 @@
 import time
+from datetime import datetime
+from urllib.parse import quote
+from django.conf import settings
 from django.db.models import Q
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets, status, permissions
@@ -7,10 +10,15 @@ from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
 from wiki.models import Article, Category, Tag
 from posts.models import Post, PostCategory
+from .history import recorder
 from .serializers import *
 
 User = get_user_model()
 
+# What is fetched for every matching article or post: enough to count,
+# sort and paginate the hits without loading their content
+HIT_FIELDS = ['id', 'created_at', 'views_count', 'likes_count']
+
 
 class SearchResultsPagination(PageNumberPagination):
     """Custom pagination for search results."""
@@ -24,6 +32,13 @@ class SearchViewSet(viewsets.ViewSet):
     
     permission_classes = [permissions.AllowAny]
     pagination_class = SearchResultsPagination
+    query_budgets = {'search': 10, 'history': 2}
+    
+    def get_permissions(self):
+        """Search history is per user."""
+        if self.action in ['history', 'clear_history']:
+            return [permissions.IsAuthenticated()]
+        return [permissions.AllowAny()]
     
     @action(detail=False, methods=['get'])
     def search(self, request):
@@ -41,6 +56,9 @@ class SearchViewSet(viewsets.ViewSet):
         query_data = query_serializer.validated_data
         search_query = query_data['q']
         search_type = query_data['type']
+        if request.user.is_authenticated:
+            # Queued; written to the history off the request thread
+            recorder.record(request.user.pk, search_query)
         
         # Initialize results
         all_results = []
@@ -52,15 +70,18 @@ class SearchViewSet(viewsets.ViewSet):
             'tags_count': 0,
         }
         
-        # Search articles
+        # Articles and posts are matched as light rows (id and sort keys);
+        # only the hits on the requested page are loaded with their content
         if search_type in ['all', 'articles']:
-            articles = self.search_articles(search_query, query_data)
+            articles = self.search_articles(search_query, query_data).values(*HIT_FIELDS)
+            articles = [{'type': 'article', **row} for row in articles]
             stats['articles_count'] = len(articles)
             all_results.extend(articles)
         
         # Search posts
         if search_type in ['all', 'posts']:
-            posts = self.search_posts(search_query, query_data)
+            posts = self.search_posts(search_query, query_data).values(*HIT_FIELDS)
+            posts = [{'type': 'post', **row} for row in posts]
             stats['posts_count'] = len(posts)
             all_results.extend(posts)
         
@@ -87,7 +108,7 @@ class SearchViewSet(viewsets.ViewSet):
         
         # Paginate results
         paginator = self.pagination_class()
-        page = paginator.paginate_queryset(all_results, request)
+        page = self.load_page(paginator.paginate_queryset(all_results, request), search_query)
         
         # Calculate search time
         search_time = time.time() - start_time
@@ -104,7 +125,7 @@ class SearchViewSet(viewsets.ViewSet):
         return paginator.get_paginated_response(response_data)
     
     def search_articles(self, query, query_data):
-        """Search articles."""
+        """Published articles matching the query and filters."""
         articles = Article.objects.filter(status='published')
         
         # Basic search
@@ -122,15 +143,10 @@ class SearchViewSet(viewsets.ViewSet):
         if query_data.get('author'):
             articles = articles.filter(author__username=query_data['author'])
         
-        # Select related for performance
-        articles = articles.select_related('author', 'category').prefetch_related('tags')
-        
-        # Serialize results
-        serializer = ArticleSearchSerializer(articles, many=True, context={'request': self.request})
-        return serializer.data
+        return articles
     
     def search_posts(self, query, query_data):
-        """Search posts."""
+        """Published posts matching the query and filters."""
         posts = Post.objects.filter(status='published')
         
         # Basic search
@@ -145,12 +161,7 @@ class SearchViewSet(viewsets.ViewSet):
         if query_data.get('author'):
             posts = posts.filter(author__username=query_data['author'])
         
-        # Select related for performance
-        posts = posts.select_related('author', 'category')
-        
-        # Serialize results
-        serializer = PostSearchSerializer(posts, many=True, context={'request': self.request})
-        return serializer.data
+        return posts
     
     def search_users(self, query, query_data):
         """Search users."""
@@ -183,9 +194,13 @@ class SearchViewSet(viewsets.ViewSet):
         return serializer.data
     
     def sort_results(self, results, sort_by):
-        """Sort search results."""
+        """Sort search results; hits without the sort key go last."""
         if sort_by == 'date':
-            return sorted(results, key=lambda x: x.get('created_at', ''), reverse=True)
+            return sorted(
+                results,
+                key=lambda x: (x.get('created_at') is not None, x.get('created_at') or datetime.min),
+                reverse=True
+            )
         elif sort_by == 'views':
             return sorted(results, key=lambda x: x.get('views_count', 0), reverse=True)
         elif sort_by == 'likes':
@@ -194,14 +209,59 @@ class SearchViewSet(viewsets.ViewSet):
             # Simple relevance scoring based on title/content match
             return results
     
+    def load_page(self, page, query):
+        """Replace the article and post rows of a page with their serialized hits."""
+        context = {'request': self.request, 'query': query}
+        article_ids = [row['id'] for row in page if row['type'] == 'article']
+        post_ids = [row['id'] for row in page if row['type'] == 'post']
+        loaded = {}
+        if article_ids:
+            articles = Article.objects.filter(pk__in=article_ids).select_related(
+                'author', 'category'
+            ).prefetch_related('tags')
+            for data in ArticleSearchSerializer(articles, many=True, context=context).data:
+                loaded['article', data['id']] = data
+        if post_ids:
+            posts = Post.objects.filter(pk__in=post_ids).select_related('author', 'category')
+            for data in PostSearchSerializer(posts, many=True, context=context).data:
+                loaded['post', data['id']] = data
+        return [loaded.get((row['type'], row['id']), row) for row in page]
+    
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """The user's recent searches, newest first."""
+        return Response({'results': recorder.recent(request.user.pk)})
+    
+    @history.mapping.delete
+    def clear_history(self, request):
+        """Remove one search (?q=) or the whole history."""
+        query = request.query_params.get('q')
+        return Response({'results': recorder.forget(request.user.pk, query)})
+    
+    def history_suggestions(self, request, query):
+        """The user's past searches containing the query, most recent first."""
+        if not request.user.is_authenticated:
+            return []
+        folded = query.casefold()
+        matches = [q for q in recorder.recent(request.user.pk) if folded in q.casefold()]
+        return [
+            {
+                'id': f"history_{n}",
+                'text': past,
+                'type': 'history',
+                'url': f"/search.html?q={quote(past)}"
+            }
+            for n, past in enumerate(matches[:settings.SEARCH_HISTORY_SUGGESTIONS])
+        ]
+    
     @action(detail=False, methods=['get'])
     def autocomplete(self, request):
-        """Provide autocomplete suggestions."""
-        query = request.query_params.get('q', '')
+        """Provide autocomplete suggestions, the user's own past searches first."""
+        query = request.query_params.get('q', '').strip()
+        results = self.history_suggestions(request, query)
         if not query or len(query) < 2:
-            return Response([])
+            return Response(results)
         
-        results = []
         
         # Article titles
         articles = Article.objects.filter(
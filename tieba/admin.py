@@ -0,0 +1,53 @@
+from django.contrib import admin
+from .models import Tieba, TiebaMembership, TiebaJoinRequest, TiebaCheckIn
+from .membership import forget_joined
+
+
+class TiebaMembershipInline(admin.TabularInline):
+    model = TiebaMembership
+    extra = 0
+    raw_id_fields = ['user']
+    readonly_fields = ['joined_at']
+
+
+@admin.register(Tieba)
+class TiebaAdmin(admin.ModelAdmin):
+    list_display = ['name', 'owner', 'category', 'join_policy', 'status', 'members_count', 'posts_count', 'created_at']
+    list_filter = ['status', 'join_policy', 'category']
+    search_fields = ['name', 'description']
+    raw_id_fields = ['owner']
+    readonly_fields = ['members_count', 'posts_count', 'checkin_date', 'checkins_today', 'created_at', 'updated_at']
+
+
+@admin.register(TiebaMembership)
+class TiebaMembershipAdmin(admin.ModelAdmin):
+    list_display = ['tieba', 'user', 'role', 'joined_at']
+    list_filter = ['role']
+    search_fields = ['tieba__name', 'user__username']
+    raw_id_fields = ['tieba', 'user']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        forget_joined(obj.user_id)
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        forget_joined(obj.user_id)
+
+
+@admin.register(TiebaJoinRequest)
+class TiebaJoinRequestAdmin(admin.ModelAdmin):
+    list_display = ['tieba', 'user', 'status', 'reviewed_by', 'created_at']
+    list_filter = ['status']
+    search_fields = ['tieba__name', 'user__username']
+    raw_id_fields = ['tieba', 'user', 'reviewed_by']
+
+
+@admin.register(TiebaCheckIn)
+class TiebaCheckInAdmin(admin.ModelAdmin):
+    list_display = ['tieba', 'user', 'year', 'days_count', 'streak', 'last_day', 'last_rank']
+    list_filter = ['year']
+    search_fields = ['tieba__name', 'user__username']
+    raw_id_fields = ['tieba', 'user']
+    exclude = ['days']
+    readonly_fields = ['days_count', 'streak', 'last_day', 'last_rank']
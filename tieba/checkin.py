@@ -0,0 +1,139 @@
+"""
+Daily check-ins (签到) to forums.
+
+A row per member per day would be billions of rows, so each member keeps
+one row per forum per year whose `days` column is a 46-byte bitmap, one
+bit per day. Checking in reads and rewrites that single row: O(1) however
+long the member has been checking in.
+
+Streaks come from the bitmap: the run of set bits ending at today is
+counted with a mask and bit_length(), not by walking days. A run that
+reaches January 1st continues the previous year's row, whose streak was
+stored when it was last extended.
+
+Each forum counts today's check-ins on its own row (checkin_date,
+checkins_today). The UPDATE that increments it locks the forum row until
+the check-in commits, so the value read back is the member's rank that
+day (第N个签到), and "how many checked in today" is a column read rather
+than a COUNT(*). The rank is stored with the check-in, so today's
+ranking is a range scan on (tieba, last_day, last_rank).
+"""
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import CHECKIN_YEAR_BYTES, Tieba, TiebaCheckIn, empty_checkin_year
+
+
+def today():
+    return timezone.localdate()
+
+
+def day_index(day):
+    """0-based day of the year."""
+    return day.timetuple().tm_yday - 1
+
+
+def as_int(days):
+    return int.from_bytes(bytes(days), 'little')
+
+
+def as_bytes(bits):
+    return bits.to_bytes(CHECKIN_YEAR_BYTES, 'little')
+
+
+def has_day(days, index):
+    return bool(as_int(days) >> index & 1)
+
+
+def run_ending_at(days, index):
+    """Consecutive check-in days ending at day `index` (0 if it is not set)."""
+    mask = (1 << (index + 1)) - 1
+    missed = ~as_int(days) & mask
+    if not missed:
+        return index + 1
+    # The latest missed day bounds the run
+    return index - (missed.bit_length() - 1)
+
+
+def longest_run(days):
+    """Longest streak within the year: how many times x & (x >> 1) can shrink it."""
+    bits, longest = as_int(days), 0
+    while bits:
+        bits &= bits >> 1
+        longest += 1
+    return longest
+
+
+def month_days(days, year, month):
+    """Days of the month (1-31) with a check-in."""
+    first = date(year, month, 1)
+    length = ((first + timedelta(days=32)).replace(day=1) - first).days
+    bits = as_int(days) >> day_index(first)
+    return [n + 1 for n in range(length) if bits >> n & 1]
+
+
+def current_streak(checkin, day=None):
+    """The streak still alive on `day`: it ended today or yesterday."""
+    day = day or today()
+    if checkin is None or checkin.last_day is None or checkin.last_day < day - timedelta(days=1):
+        return 0
+    return checkin.streak
+
+
+def count_today(tieba, day=None):
+    """Members who checked in to the forum today, without a COUNT(*)."""
+    return tieba.checkins_today if tieba.checkin_date == (day or today()) else 0
+
+
+def check_in(user, tieba, day=None):
+    """
+    Check the user in to the forum; returns (checkin, created).
+
+    `created` is False when they already checked in today, in which case
+    nothing changes.
+    """
+    day = day or today()
+    index = day_index(day)
+    with transaction.atomic():
+        checkin, _ = TiebaCheckIn.objects.select_for_update().get_or_create(
+            tieba=tieba, user=user, year=day.year, defaults={'days': empty_checkin_year()},
+        )
+        if has_day(checkin.days, index):
+            return checkin, False
+
+        checkin.days = as_bytes(as_int(checkin.days) | 1 << index)
+        streak = run_ending_at(checkin.days, index)
+        if streak == index + 1:
+            # The run reaches January 1st: carry last year's streak over
+            previous = (
+                TiebaCheckIn.objects.filter(tieba=tieba, user=user, year=day.year - 1)
+                .values('last_day', 'streak').first()
+            )
+            if previous and previous['last_day'] == date(day.year - 1, 12, 31):
+                streak += previous['streak']
+
+        Tieba.objects.filter(pk=tieba.pk).update(
+            checkins_today=Case(
+                When(checkin_date=day, then=F('checkins_today') + 1),
+                default=Value(1),
+            ),
+            checkin_date=day,
+        )
+        checkin.last_rank = Tieba.objects.filter(pk=tieba.pk).values_list('checkins_today', flat=True).get()
+        checkin.days_count += 1
+        checkin.last_day = day
+        checkin.streak = streak
+        checkin.save(update_fields=['days', 'days_count', 'last_day', 'streak', 'last_rank'])
+    return checkin, True
+
+
+def ranking(tieba, day=None):
+    """Today's check-ins to the forum, earliest first."""
+    return (
+        TiebaCheckIn.objects.filter(tieba=tieba, last_day=day or today())
+        .select_related('user').order_by('last_rank')
+    )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Post
+from tieba.models import Tieba, TiebaMembership
+
+
+def count_of(queryset):
+    """Correlated COUNT(*) per forum, 0 when there are no rows."""
+    counted = queryset.filter(tieba=OuterRef('pk')).order_by().values('tieba').annotate(n=Count('pk')).values('n')
+    return Coalesce(Subquery(counted), 0)
+
+
+class Command(BaseCommand):
+    """Recompute the members_count and posts_count counters of every forum."""
+
+    help = 'Recompute cached member and post counts of forums.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tieba', type=int, action='append', help='Only these forum ids.')
+
+    def handle(self, *args, **options):
+        tiebas = Tieba.objects.all()
+        if options['tieba']:
+            tiebas = tiebas.filter(pk__in=options['tieba'])
+        updated = tiebas.update(
+            members_count=count_of(TiebaMembership.objects.all()),
+            posts_count=count_of(Post.objects.all()),
+        )
+        self.stdout.write(f"Recomputed counts of {updated} tiebas")
@@ -0,0 +1,145 @@
+"""
+Joining, leaving and roles in forums.
+
+Every user's forums are cached as one list of (tieba_id, role) pairs under
+JOINED_KEY, in join order. The "forums I joined" sidebar and every role
+check (can this user pin, edit the announcement, review requests?) read
+that list instead of querying TiebaMembership. Any change to a membership
+deletes the user's entry.
+
+members_count changes with F() updates in the same transaction as the
+membership row, so concurrent joins never lose a count and the forum page
+never has to COUNT(*) its members.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Tieba, TiebaJoinRequest, TiebaMembership
+
+JOINED_KEY = 'tieba:joined:%s'
+
+MODERATOR_ROLES = ('moderator', 'owner')
+
+
+class MembershipError(Exception):
+    """A membership change that is not allowed, e.g. the owner leaving."""
+
+
+def joined_timeout():
+    return getattr(settings, 'TIEBA_JOINED_CACHE_TTL', 60 * 60)
+
+
+def get_joined(user_id):
+    """[(tieba_id, role), ...] for a user, oldest membership first."""
+    key = JOINED_KEY % user_id
+    joined = cache.get(key)
+    if joined is None:
+        joined = list(
+            TiebaMembership.objects.filter(user_id=user_id)
+            .order_by('joined_at', 'pk')
+            .values_list('tieba_id', 'role')
+        )
+        cache.set(key, joined, joined_timeout())
+    return joined
+
+
+def forget_joined(user_id):
+    cache.delete(JOINED_KEY % user_id)
+
+
+def get_role(user, tieba_id):
+    """The user's role in a forum, or None for non-members and anonymous users."""
+    if not user.is_authenticated:
+        return None
+    return dict(get_joined(user.pk)).get(tieba_id)
+
+
+def is_moderator(user, tieba_id):
+    return user.is_staff or get_role(user, tieba_id) in MODERATOR_ROLES
+
+
+def _add_member(tieba, user, role='member'):
+    """Create the membership and count it; returns False when already a member."""
+    try:
+        with transaction.atomic():
+            TiebaMembership.objects.create(tieba=tieba, user=user, role=role)
+            Tieba.objects.filter(pk=tieba.pk).update(members_count=F('members_count') + 1)
+    except IntegrityError:
+        return False
+    transaction.on_commit(lambda: forget_joined(user.pk))
+    return True
+
+
+def create_tieba(owner, **fields):
+    """Create a forum with its owner as the first member."""
+    with transaction.atomic():
+        tieba = Tieba.objects.create(owner=owner, **fields)
+        _add_member(tieba, owner, role='owner')
+    tieba.members_count = 1
+    return tieba
+
+
+def join(user, tieba, message=''):
+    """
+    Join an open forum, or ask to join one that needs approval.
+
+    Returns 'joined', 'member' (already was one) or 'requested'.
+    """
+    if tieba.status != 'active':
+        raise MembershipError('This tieba is closed.')
+    if get_role(user, tieba.pk):
+        return 'member'
+    if tieba.join_policy == 'open':
+        return 'joined' if _add_member(tieba, user) else 'member'
+    try:
+        with transaction.atomic():
+            TiebaJoinRequest.objects.create(tieba=tieba, user=user, message=message)
+    except IntegrityError:
+        pass  # A request is already pending
+    return 'requested'
+
+
+def leave(user, tieba):
+    """Leave a forum; the owner has to hand it over first."""
+    with transaction.atomic():
+        membership = (
+            TiebaMembership.objects.select_for_update()
+            .filter(tieba=tieba, user=user).first()
+        )
+        if membership is None:
+            return False
+        if membership.role == 'owner':
+            raise MembershipError('The owner cannot leave the tieba.')
+        membership.delete()
+        Tieba.objects.filter(pk=tieba.pk).update(members_count=F('members_count') - 1)
+    transaction.on_commit(lambda: forget_joined(user.pk))
+    return True
+
+
+def review_request(join_request, moderator, approve):
+    """Approve or reject a pending join request; returns False if it was already handled."""
+    status = 'approved' if approve else 'rejected'
+    with transaction.atomic():
+        updated = TiebaJoinRequest.objects.filter(pk=join_request.pk, status='pending').update(
+            status=status, reviewed_by=moderator, reviewed_at=timezone.now(),
+        )
+        if updated and approve:
+            _add_member(join_request.tieba, join_request.user)
+    return bool(updated)
+
+
+def set_role(tieba, user, role):
+    """Promote a member to moderator or demote them; ownership is not transferable here."""
+    if role not in ('member', 'moderator'):
+        raise MembershipError(f"Unknown role '{role}'.")
+    updated = (
+        TiebaMembership.objects.filter(tieba=tieba, user=user)
+        .exclude(role='owner').update(role=role)
+    )
+    if updated:
+        forget_joined(user.pk)
+    return bool(updated)
@@ -0,0 +1,92 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:55
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0005_sensitive_words'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tieba',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='name')),
+                ('description', models.TextField(blank=True, verbose_name='description')),
+                ('avatar', models.ImageField(blank=True, null=True, upload_to='tieba_avatars/')),
+                ('rules', models.TextField(blank=True, verbose_name='rules')),
+                ('announcement', models.TextField(blank=True, verbose_name='announcement')),
+                ('join_policy', models.CharField(choices=[('open', 'Anyone can join'), ('approval', 'Moderators approve join requests')], default='open', max_length=10)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('closed', 'Closed')], default='active', max_length=10)),
+                ('members_count', models.PositiveIntegerField(default=0)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tiebas', to='posts.postcategory')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='owned_tiebas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'tieba',
+                'verbose_name_plural': 'tiebas',
+                'ordering': ['-members_count'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TiebaJoinRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.TextField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_tieba_requests', to=settings.AUTH_USER_MODEL)),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='join_requests', to='tieba.tieba')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tieba_join_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'tieba join request',
+                'verbose_name_plural': 'tieba join requests',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TiebaMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('member', 'Member'), ('moderator', 'Moderator'), ('owner', 'Owner')], default='member', max_length=10)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='tieba.tieba')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tieba_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'tieba membership',
+                'verbose_name_plural': 'tieba memberships',
+                'ordering': ['joined_at'],
+                'indexes': [models.Index(fields=['user', 'joined_at'], name='tieba_tieba_user_id_3a9772_idx'), models.Index(fields=['tieba', 'role'], name='tieba_tieba_tieba_i_74548f_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tiebamembership',
+            constraint=models.UniqueConstraint(fields=('tieba', 'user'), name='unique_tieba_member'),
+        ),
+        migrations.AddIndex(
+            model_name='tiebajoinrequest',
+            index=models.Index(fields=['tieba', 'status', 'created_at'], name='tieba_tieba_tieba_i_1a52fb_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tiebajoinrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('tieba', 'user'), name='unique_pending_join_request'),
+        ),
+        migrations.AddIndex(
+            model_name='tieba',
+            index=models.Index(fields=['category', '-members_count'], name='tieba_tieba_categor_e3f1fc_idx'),
+        ),
+    ]
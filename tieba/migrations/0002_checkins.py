@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import tieba.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tieba', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tieba',
+            name='checkin_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='tieba',
+            name='checkins_today',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TiebaCheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('days', models.BinaryField(default=tieba.models.empty_checkin_year, max_length=46)),
+                ('days_count', models.PositiveSmallIntegerField(default=0)),
+                ('last_day', models.DateField(blank=True, null=True)),
+                ('streak', models.PositiveIntegerField(default=0)),
+                ('last_rank', models.PositiveIntegerField(default=0)),
+                ('tieba', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkins', to='tieba.tieba')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tieba_checkins', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'tieba check-in',
+                'verbose_name_plural': 'tieba check-ins',
+                'indexes': [models.Index(fields=['tieba', 'last_day', 'last_rank'], name='tieba_tieba_tieba_i_345610_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tiebacheckin',
+            constraint=models.UniqueConstraint(fields=('tieba', 'user', 'year'), name='unique_tieba_checkin_year'),
+        ),
+    ]
@@ -0,0 +1,162 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+
+User = get_user_model()
+
+# One bit per day of a year, leap years included
+CHECKIN_YEAR_BYTES = 46
+
+
+def empty_checkin_year():
+    return bytes(CHECKIN_YEAR_BYTES)
+
+
+class Tieba(models.Model):
+    """A forum (贴吧) that groups posts around one topic."""
+    
+    JOIN_POLICY_CHOICES = [
+        ('open', _('Anyone can join')),
+        ('approval', _('Moderators approve join requests')),
+    ]
+    
+    STATUS_CHOICES = [
+        ('active', _('Active')),
+        ('closed', _('Closed')),
+    ]
+    
+    name = models.CharField(_('name'), max_length=100, unique=True)
+    description = models.TextField(_('description'), blank=True)
+    avatar = models.ImageField(upload_to='tieba_avatars/', blank=True, null=True)
+    rules = models.TextField(_('rules'), blank=True)
+    announcement = models.TextField(_('announcement'), blank=True)
+    
+    # Relationships
+    owner = models.ForeignKey(User, on_delete=models.PROTECT, related_name='owned_tiebas')
+    category = models.ForeignKey('posts.PostCategory', on_delete=models.SET_NULL,
+                                 null=True, blank=True, related_name='tiebas')
+    
+    join_policy = models.CharField(max_length=10, choices=JOIN_POLICY_CHOICES, default='open')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
+    
+    # Statistics, kept with F() updates; repair_tieba_counts recomputes them
+    members_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+    # Check-ins (签到) on checkin_date; the first check-in of a new day
+    # restarts the count. See tieba/checkin.py.
+    checkin_date = models.DateField(null=True, blank=True)
+    checkins_today = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = _('tieba')
+        verbose_name_plural = _('tiebas')
+        ordering = ['-members_count']
+        indexes = [
+            models.Index(fields=['category', '-members_count']),
+        ]
+    
+    def __str__(self):
+        return self.name
+
+
+class TiebaMembership(models.Model):
+    """A user's membership of a forum and their role in it."""
+    
+    ROLE_CHOICES = [
+        ('member', _('Member')),
+        ('moderator', _('Moderator')),
+        ('owner', _('Owner')),
+    ]
+    
+    tieba = models.ForeignKey(Tieba, on_delete=models.CASCADE, related_name='memberships')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tieba_memberships')
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='member')
+    joined_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('tieba membership')
+        verbose_name_plural = _('tieba memberships')
+        ordering = ['joined_at']
+        constraints = [
+            models.UniqueConstraint(fields=['tieba', 'user'], name='unique_tieba_member'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'joined_at']),
+            models.Index(fields=['tieba', 'role']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} in {self.tieba} ({self.role})"
+    
+    @property
+    def is_moderator(self):
+        return self.role in ('moderator', 'owner')
+
+
+class TiebaJoinRequest(models.Model):
+    """Request to join a forum whose join_policy is 'approval'."""
+    
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('approved', _('Approved')),
+        ('rejected', _('Rejected')),
+    ]
+    
+    tieba = models.ForeignKey(Tieba, on_delete=models.CASCADE, related_name='join_requests')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tieba_join_requests')
+    message = models.TextField(blank=True, max_length=500)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='reviewed_tieba_requests')
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('tieba join request')
+        verbose_name_plural = _('tieba join requests')
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['tieba', 'user'], condition=Q(status='pending'),
+                                    name='unique_pending_join_request'),
+        ]
+        indexes = [
+            models.Index(fields=['tieba', 'status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} asks to join {self.tieba}"
+
+
+class TiebaCheckIn(models.Model):
+    """A member's check-ins (签到) to a forum in one year, one bit per day."""
+    
+    tieba = models.ForeignKey(Tieba, on_delete=models.CASCADE, related_name='checkins')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tieba_checkins')
+    year = models.PositiveSmallIntegerField()
+    # Bit n (little-endian) is day n of the year, 0 being January 1st
+    days = models.BinaryField(max_length=CHECKIN_YEAR_BYTES, default=empty_checkin_year)
+    days_count = models.PositiveSmallIntegerField(default=0)
+    
+    # The latest check-in: its day, the streak it extended, and how many
+    # members of the forum had checked in before it that day (plus one)
+    last_day = models.DateField(null=True, blank=True)
+    streak = models.PositiveIntegerField(default=0)
+    last_rank = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = _('tieba check-in')
+        verbose_name_plural = _('tieba check-ins')
+        constraints = [
+            models.UniqueConstraint(fields=['tieba', 'user', 'year'], name='unique_tieba_checkin_year'),
+        ]
+        indexes = [
+            # Today's check-in ranking of a forum
+            models.Index(fields=['tieba', 'last_day', 'last_rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user} in {self.tieba} ({self.year}: {self.days_count} days)"
@@ -0,0 +1,103 @@
+from rest_framework import serializers
+from django.utils.translation import gettext_lazy as _
+from posts.serializers import UserSimpleSerializer, check_words
+from .checkin import count_today
+from .models import Tieba, TiebaMembership, TiebaJoinRequest, TiebaCheckIn
+
+
+class TiebaSerializer(serializers.ModelSerializer):
+    """Serializer for forums, with the current user's role in each."""
+    
+    owner = UserSimpleSerializer(read_only=True)
+    role = serializers.SerializerMethodField()
+    checkins_today = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Tieba
+        fields = [
+            'id', 'name', 'description', 'avatar', 'rules', 'announcement',
+            'owner', 'category', 'join_policy', 'status',
+            'members_count', 'posts_count', 'checkins_today', 'role', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'owner', 'status', 'members_count', 'posts_count', 'created_at', 'updated_at'
+        ]
+    
+    def get_role(self, obj):
+        """Role from the cached joined list the view put in the context."""
+        return self.context.get('roles', {}).get(obj.pk)
+    
+    def get_checkins_today(self, obj):
+        return count_today(obj)
+
+
+class TiebaCreateSerializer(serializers.ModelSerializer):
+    """Serializer for creating forums."""
+    
+    class Meta:
+        model = Tieba
+        fields = ['name', 'description', 'avatar', 'rules', 'category', 'join_policy']
+    
+    def validate_name(self, value):
+        """Forum names may not contain any listed sensitive word."""
+        if check_words(value):
+            raise serializers.ValidationError(_('Contains words that are not allowed.'))
+        return value
+
+
+class TiebaUpdateSerializer(serializers.ModelSerializer):
+    """Serializer for moderators editing a forum; the name is fixed."""
+    
+    class Meta:
+        model = Tieba
+        fields = ['description', 'avatar', 'rules', 'announcement', 'category', 'join_policy']
+    
+    def validate_announcement(self, value):
+        check_words(value)
+        return value
+
+
+class TiebaMembershipSerializer(serializers.ModelSerializer):
+    """Serializer for forum members."""
+    
+    user = UserSimpleSerializer(read_only=True)
+    
+    class Meta:
+        model = TiebaMembership
+        fields = ['id', 'user', 'role', 'joined_at']
+        read_only_fields = fields
+
+
+class TiebaJoinRequestSerializer(serializers.ModelSerializer):
+    """Serializer for pending join requests."""
+    
+    user = UserSimpleSerializer(read_only=True)
+    
+    class Meta:
+        model = TiebaJoinRequest
+        fields = ['id', 'user', 'message', 'status', 'reviewed_by', 'reviewed_at', 'created_at']
+        read_only_fields = fields
+
+
+class JoinSerializer(serializers.Serializer):
+    """Optional message for forums that review join requests."""
+    
+    message = serializers.CharField(required=False, allow_blank=True, max_length=500, default='')
+
+
+class RoleSerializer(serializers.Serializer):
+    """Role change for a forum member."""
+    
+    role = serializers.ChoiceField(choices=['member', 'moderator'])
+
+
+class TiebaCheckInSerializer(serializers.ModelSerializer):
+    """A member's place in today's check-in ranking."""
+    
+    user = UserSimpleSerializer(read_only=True)
+    rank = serializers.IntegerField(source='last_rank', read_only=True)
+    
+    class Meta:
+        model = TiebaCheckIn
+        fields = ['user', 'rank', 'streak', 'days_count', 'last_day']
+        read_only_fields = fields
@@ -0,0 +1,55 @@
+from rest_framework.test import APIClient
+
+from baidu_wiki.testing import QueryBudgetTestCase, assert_query_budget, create_users, rows_over_budget
+from posts.models import Post
+
+from . import checkin, membership
+from .views import TiebaViewSet
+
+
+class TiebaQueryBudgetTests(QueryBudgetTestCase):
+    """Forum endpoints stay within their query_budgets however many rows they list."""
+
+    rows = rows_over_budget(TiebaViewSet)
+
+    @classmethod
+    def setUpTestData(cls):
+        # The owner, and `rows` members who join every forum and check in
+        cls.users = create_users('member', cls.rows + 1)
+        cls.tiebas = [membership.create_tieba(cls.users[0], name=f'Forum {i}') for i in range(cls.rows)]
+        cls.tieba = cls.tiebas[0]
+        for user in cls.users[1:]:
+            for tieba in cls.tiebas:
+                membership.join(user, tieba)
+            checkin.check_in(user, cls.tieba)
+        for i in range(cls.rows):
+            Post.objects.create(
+                title=f'Thread {i}', content=f'Forum thread number {i}.', author=cls.users[i],
+                tieba=cls.tieba, status='published', is_approved=True,
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1])
+
+    def test_tieba_list(self):
+        response = assert_query_budget(self.client, 'get', '/api/tieba/tiebas/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_tieba_retrieve(self):
+        response = assert_query_budget(self.client, 'get', f'/api/tieba/tiebas/{self.tieba.pk}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_tieba_posts(self):
+        response = assert_query_budget(self.client, 'get', f'/api/tieba/tiebas/{self.tieba.pk}/posts/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_joined(self):
+        response = assert_query_budget(self.client, 'get', '/api/tieba/tiebas/joined/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), len(self.tiebas))
+
+    def test_checkins(self):
+        response = assert_query_budget(self.client, 'get', f'/api/tieba/tiebas/{self.tieba.pk}/checkins/')
+        self.assertEqual(response.status_code, 200)
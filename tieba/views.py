@@ -0,0 +1,289 @@
+from rest_framework import viewsets, status, permissions
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404
+from django.contrib.auth import get_user_model
+from posts.models import Post
+from posts.serializers import PostListSerializer
+from . import checkin, membership
+from .models import Tieba, TiebaMembership, TiebaJoinRequest, TiebaCheckIn
+from .serializers import (
+    TiebaSerializer, TiebaCreateSerializer, TiebaUpdateSerializer,
+    TiebaMembershipSerializer, TiebaJoinRequestSerializer, TiebaCheckInSerializer,
+    JoinSerializer, RoleSerializer,
+)
+
+User = get_user_model()
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """Custom pagination for consistent results."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KnownCountPaginator(Paginator):
+    """Paginator that takes the total from a counter column instead of COUNT(*)."""
+    
+    def __init__(self, object_list, per_page, known_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        # Fills the count cached_property
+        self.__dict__['count'] = known_count
+
+
+class ForumPostPagination(StandardResultsSetPagination):
+    """
+    Pages of a forum's threads, counted by Tieba.posts_count.
+    
+    COUNT(*) over a forum with millions of posts costs more than the page
+    itself. The counter includes hidden posts, so the last page can come
+    up short, which the listing tolerates. Like Baidu, only the first
+    max_pages pages are served: OFFSET still walks every skipped index
+    entry, so deeper pages would cost seconds.
+    """
+    max_pages = 1000
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        count = min(view.get_tieba().posts_count, self.max_pages * self.get_page_size(request))
+        self.django_paginator_class = lambda *args, **kwargs: KnownCountPaginator(*args, known_count=count, **kwargs)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class CheckInRankingPagination(StandardResultsSetPagination):
+    """Pages of today's check-ins, counted by the forum's checkins_today."""
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        count = checkin.count_today(view.get_tieba())
+        self.django_paginator_class = lambda *args, **kwargs: KnownCountPaginator(*args, known_count=count, **kwargs)
+        return super().paginate_queryset(queryset, request, view)
+
+
+class TiebaViewSet(viewsets.ModelViewSet):
+    """ViewSet for forums: membership, moderation and the thread listing."""
+    
+    queryset = Tieba.objects.select_related('owner')
+    pagination_class = StandardResultsSetPagination
+    query_budgets = {'list': 3, 'retrieve': 3, 'posts': 4, 'joined': 3, 'checkins': 3}
+    throttle_scopes = {'create': 'tieba', 'join': 'follow', 'check_in': 'checkin'}
+    
+    def get_serializer_class(self):
+        """Return appropriate serializer based on action."""
+        if self.action == 'create':
+            return TiebaCreateSerializer
+        elif self.action in ['update', 'partial_update']:
+            return TiebaUpdateSerializer
+        elif self.action == 'posts':
+            return PostListSerializer
+        elif self.action == 'members':
+            return TiebaMembershipSerializer
+        elif self.action == 'join_requests':
+            return TiebaJoinRequestSerializer
+        elif self.action == 'checkins':
+            return TiebaCheckInSerializer
+        return TiebaSerializer
+    
+    def get_serializer_context(self):
+        """Roles for the whole page come from the user's cached joined list."""
+        context = super().get_serializer_context()
+        user = self.request.user
+        context['roles'] = dict(membership.get_joined(user.pk)) if user.is_authenticated else {}
+        return context
+    
+    def get_queryset(self):
+        """Filter queryset based on request parameters."""
+        queryset = self.queryset
+        if self.action == 'list':
+            queryset = queryset.filter(status='active')
+        
+        # Filter by category
+        category_id = self.request.query_params.get('category')
+        if category_id:
+            queryset = queryset.filter(category_id=category_id)
+        
+        # Search by name
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset.filter(name__icontains=search)
+        
+        return queryset.order_by('-members_count', 'pk')
+    
+    def get_permissions(self):
+        """Set permissions based on action."""
+        if self.action == 'destroy':
+            return [permissions.IsAdminUser()]
+        if self.action in ['list', 'retrieve', 'posts', 'members', 'checkins']:
+            return [permissions.AllowAny()]
+        return [permissions.IsAuthenticated()]
+    
+    def get_tieba(self):
+        """The forum in the URL, looked up once per request."""
+        if not hasattr(self, '_tieba'):
+            self._tieba = get_object_or_404(Tieba, pk=self.kwargs['pk'])
+        return self._tieba
+    
+    def check_moderator(self, tieba):
+        if not membership.is_moderator(self.request.user, tieba.pk):
+            raise PermissionDenied('Only moderators of this tieba can do that.')
+    
+    def create(self, request, *args, **kwargs):
+        """Create a forum owned by the current user."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tieba = membership.create_tieba(request.user, **serializer.validated_data)
+        context = dict(self.get_serializer_context(), roles={tieba.pk: 'owner'})
+        return Response(TiebaSerializer(tieba, context=context).data, status=status.HTTP_201_CREATED)
+    
+    def perform_update(self, serializer):
+        """Only the forum's moderators edit its description and announcement."""
+        self.check_moderator(serializer.instance)
+        serializer.save()
+    
+    @action(detail=True, methods=['get'])
+    def posts(self, request, pk=None):
+        """Threads of the forum, pinned first, then by latest reply."""
+        tieba = self.get_tieba()
+        queryset = (
+            Post.objects.filter(tieba=tieba, status='published', is_approved=True)
+            .select_related('author', 'category', 'last_reply_by')
+            .order_by('-is_pinned', '-last_reply_at')
+        )
+        paginator = ForumPostPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def joined(self, request):
+        """Forums the current user joined, in join order."""
+        joined = membership.get_joined(request.user.pk)
+        page = self.paginate_queryset(joined)
+        tiebas = Tieba.objects.select_related('owner').in_bulk([tieba_id for tieba_id, role in page])
+        serializer = TiebaSerializer(
+            [tiebas[tieba_id] for tieba_id, role in page if tieba_id in tiebas],
+            many=True, context=self.get_serializer_context(),
+        )
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['post'])
+    def join(self, request, pk=None):
+        """Join the forum, or file a join request when it needs approval."""
+        serializer = JoinSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = membership.join(request.user, self.get_tieba(), serializer.validated_data['message'])
+        except membership.MembershipError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        code = status.HTTP_202_ACCEPTED if result == 'requested' else status.HTTP_200_OK
+        return Response({'status': result}, status=code)
+    
+    @action(detail=True, methods=['post'])
+    def leave(self, request, pk=None):
+        """Leave the forum."""
+        try:
+            left = membership.leave(request.user, self.get_tieba())
+        except membership.MembershipError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'left': left})
+    
+    @action(detail=True, methods=['get'])
+    def members(self, request, pk=None):
+        """Members of the forum; ?role=moderator lists the moderators."""
+        queryset = TiebaMembership.objects.filter(tieba=self.get_tieba()).select_related('user')
+        role = request.query_params.get('role')
+        if role == 'moderator':
+            queryset = queryset.filter(role__in=membership.MODERATOR_ROLES)
+        elif role:
+            queryset = queryset.filter(role=role)
+        page = self.paginate_queryset(queryset.order_by('joined_at', 'pk'))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['post'], url_path=r'members/(?P<user_id>\d+)/role')
+    def set_role(self, request, pk=None, user_id=None):
+        """Make a member a moderator or a plain member again; owner only."""
+        tieba = self.get_tieba()
+        if tieba.owner_id != request.user.pk and not request.user.is_staff:
+            raise PermissionDenied('Only the owner can change roles.')
+        serializer = RoleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = get_object_or_404(User, pk=user_id)
+        if not membership.set_role(tieba, user, serializer.validated_data['role']):
+            return Response({'error': 'Not a member of this tieba.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'user': user.pk, 'role': serializer.validated_data['role']})
+    
+    @action(detail=True, methods=['get'], url_path='requests')
+    def join_requests(self, request, pk=None):
+        """Pending join requests, oldest first; moderators only."""
+        tieba = self.get_tieba()
+        self.check_moderator(tieba)
+        queryset = (
+            TiebaJoinRequest.objects.filter(tieba=tieba, status='pending')
+            .select_related('user').order_by('created_at')
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['post'], url_path=r'requests/(?P<request_id>\d+)/(?P<decision>approve|reject)')
+    def review_request(self, request, pk=None, request_id=None, decision=None):
+        """Approve or reject a join request."""
+        tieba = self.get_tieba()
+        self.check_moderator(tieba)
+        join_request = get_object_or_404(
+            TiebaJoinRequest.objects.select_related('tieba', 'user'), pk=request_id, tieba=tieba,
+        )
+        if not membership.review_request(join_request, request.user, decision == 'approve'):
+            return Response({'error': 'Request was already reviewed.'}, status=status.HTTP_409_CONFLICT)
+        return Response({'status': 'approved' if decision == 'approve' else 'rejected'})
+    
+    @action(detail=True, methods=['get', 'post'], url_path='checkin')
+    def check_in(self, request, pk=None):
+        """Check in to the forum (POST), or see your check-ins to it (GET, ?month=YYYY-MM)."""
+        tieba = self.get_tieba()
+        if request.method == 'POST':
+            if membership.get_role(request.user, tieba.pk) is None:
+                return Response({'error': 'Join the tieba to check in.'}, status=status.HTTP_403_FORBIDDEN)
+            record, created = checkin.check_in(request.user, tieba)
+            tieba.refresh_from_db(fields=['checkin_date', 'checkins_today'])
+            return Response({
+                'checked_in': created,
+                'rank': record.last_rank,
+                'streak': record.streak,
+                'days_count': record.days_count,
+                'checkins_today': checkin.count_today(tieba),
+            }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        
+        today = checkin.today()
+        year, month = today.year, today.month
+        if request.query_params.get('month'):
+            try:
+                year, month = map(int, request.query_params['month'].split('-'))
+                if not 1 <= month <= 12:
+                    raise ValueError
+            except ValueError:
+                return Response({'error': 'month must be YYYY-MM.'}, status=status.HTTP_400_BAD_REQUEST)
+        records = {
+            record.year: record
+            for record in TiebaCheckIn.objects.filter(tieba=tieba, user=request.user, year__in={year, today.year})
+        }
+        current, shown = records.get(today.year), records.get(year)
+        return Response({
+            'checked_in_today': current is not None and current.last_day == today,
+            'streak': checkin.current_streak(current, today),
+            'days_count': current.days_count if current else 0,
+            'month': f"{year:04d}-{month:02d}",
+            'days': checkin.month_days(shown.days, year, month) if shown else [],
+            'longest_streak': checkin.longest_run(shown.days) if shown else 0,
+        })
+    
+    @action(detail=True, methods=['get'])
+    def checkins(self, request, pk=None):
+        """Today's check-in ranking: who checked in first."""
+        paginator = CheckInRankingPagination()
+        page = paginator.paginate_queryset(checkin.ranking(self.get_tieba()), request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,124 @@
+"""
+Throttled, batched last_active updates.
+
+Writing last_active on every request turns each read into a write on the
+users table. LastActiveMiddleware instead calls touch(), which records a
+user at most once every LAST_ACTIVE_INTERVAL seconds (per process, and
+across processes through the shared cache). A background thread writes the
+pending timestamps every LAST_ACTIVE_FLUSH_INTERVAL seconds in one UPDATE
+per batch. With a flush interval of 0, touch() writes immediately.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_KEY = 'activity:{}'
+BATCH_SIZE = 500
+
+
+class ActivityTracker:
+    """Collects last_active timestamps in memory and writes them in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._touched = {}
+        self._thread = None
+
+    @property
+    def interval(self):
+        return getattr(settings, 'LAST_ACTIVE_INTERVAL', 60)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'LAST_ACTIVE_FLUSH_INTERVAL', 10)
+
+    def touch(self, user_id):
+        """Record activity for user_id; returns False when throttled."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._touched.get(user_id)
+            if last is not None and now - last < self.interval:
+                return False
+            self._touched[user_id] = now
+        # Another process already recorded this user recently
+        if not cache.add(ACTIVITY_KEY.format(user_id), 1, self.interval):
+            return False
+
+        with self._lock:
+            self._pending[user_id] = timezone.now()
+            if self.flush_interval > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='last-active-flusher', daemon=True)
+                self._thread.start()
+        if self.flush_interval <= 0:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write all pending timestamps; returns the number of users updated."""
+        from .models import CustomUser
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            cutoff = time.monotonic() - self.interval
+            self._touched = {pk: at for pk, at in self._touched.items() if at > cutoff}
+        if not pending:
+            return 0
+
+        items = sorted(pending.items())
+        try:
+            for start in range(0, len(items), BATCH_SIZE):
+                batch = items[start:start + BATCH_SIZE]
+                CustomUser.objects.filter(pk__in=[pk for pk, at in batch]).update(
+                    last_active=Case(
+                        *(When(pk=pk, then=Value(at)) for pk, at in batch),
+                        output_field=DateTimeField(),
+                    )
+                )
+        except Exception:
+            logger.exception('Could not write last_active for %d users', len(pending))
+            with self._lock:
+                for pk, at in pending.items():
+                    self._pending[pk] = max(at, self._pending.get(pk, at))
+            return 0
+        return len(pending)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+tracker = ActivityTracker()
+atexit.register(tracker.flush)
+
+
+class LastActiveMiddleware:
+    """Touch last_active for the user a request was authenticated as."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = request.__dict__.get('user')
+        # Don't load the session just to find out who the user is
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            return response
+        if user is not None and user.is_authenticated:
+            tracker.touch(user.pk)
+        return response
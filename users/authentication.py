@@ -0,0 +1,159 @@
+"""
+Token authentication with a two-level token cache.
+
+DRF's TokenAuthentication joins authtoken_token to users_customuser on every
+request. CachedTokenAuthentication looks the token up in a small per-process
+LRU first, then in the shared cache, and only then in the database. It
+returns a minimal principal: a CustomUser instance with PRINCIPAL_FIELDS
+loaded and every other field deferred. Foreign key assignment, ownership
+checks and permission checks work as usual, and any other field is loaded
+from the database the first time it is read.
+
+Shared entries live for TOKEN_CACHE_TTL seconds. invalidate_token() and
+invalidate_user() drop them. Logout and password changes call these, and so
+does saving a user (deactivating them in the admin, say) or deleting a
+token, through the receivers below, which UsersConfig.ready() connects.
+Other processes may keep a revoked token in their local LRU for up to
+TOKEN_LOCAL_CACHE_TTL seconds, so keep that setting short.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .models import CustomUser
+
+PRINCIPAL_FIELDS = ('id', 'email', 'username', 'is_active', 'is_staff', 'is_superuser')
+TOKEN_KEY = 'auth:token:{}'
+USER_TOKEN_KEY = 'auth:user-token:{}'
+
+
+class LocalTTLCache:
+    """Thread-safe LRU whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_tokens = LocalTTLCache(
+    getattr(settings, 'TOKEN_LOCAL_CACHE_SIZE', 10000),
+    getattr(settings, 'TOKEN_LOCAL_CACHE_TTL', 5),
+)
+
+
+def _digest(key):
+    # Keep raw tokens out of cache keys
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def build_principal(fields):
+    """CustomUser with only PRINCIPAL_FIELDS loaded, as if read from the database."""
+    db = router.db_for_read(CustomUser)
+    # from_db() expects values in concrete field order
+    names = [f.attname for f in CustomUser._meta.concrete_fields if f.attname in fields]
+    return CustomUser.from_db(db, names, [fields[name] for name in names])
+
+
+def load_principal_fields(key):
+    row = (
+        Token.objects.filter(key=key)
+        .values_list(*(f'user__{name}' for name in PRINCIPAL_FIELDS))
+        .first()
+    )
+    if row is None:
+        return None
+    return dict(zip(PRINCIPAL_FIELDS, row))
+
+
+def invalidate_token(key):
+    digest = _digest(key)
+    local_tokens.delete(digest)
+    cache.delete(TOKEN_KEY.format(digest))
+
+
+def invalidate_user(user_id):
+    """Drop the cached token of a user, e.g. after a password change."""
+    digest = cache.get(USER_TOKEN_KEY.format(user_id))
+    if digest:
+        local_tokens.delete(digest)
+        cache.delete_many([TOKEN_KEY.format(digest), USER_TOKEN_KEY.format(user_id)])
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid='users.invalidate_saved_user')
+def invalidate_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    """A cached principal must not outlive a change to its fields or password."""
+    if created:
+        return
+    if update_fields is not None and not set(update_fields) & {*PRINCIPAL_FIELDS, 'password'}:
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='users.invalidate_deleted_token')
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`Authorization: Token <key>` resolved through the local and shared token caches."""
+
+    def authenticate_credentials(self, key):
+        digest = _digest(key)
+        fields = local_tokens.get(digest)
+        if fields is None:
+            fields = cache.get(TOKEN_KEY.format(digest))
+            if fields is None:
+                fields = load_principal_fields(key)
+                if fields is None:
+                    raise exceptions.AuthenticationFailed(_('Invalid token.'))
+                ttl = getattr(settings, 'TOKEN_CACHE_TTL', 300)
+                cache.set_many({
+                    TOKEN_KEY.format(digest): fields,
+                    USER_TOKEN_KEY.format(fields['id']): digest,
+                }, ttl)
+            local_tokens.set(digest, fields)
+
+        if not fields['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return build_principal(fields), key
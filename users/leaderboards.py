@@ -0,0 +1,135 @@
+"""
+Contributor leaderboards: who earned the most reputation ('reputation')
+and who wrote the most ('activity'), today, this week and all time, over
+the whole site and per category.
+
+A GROUP BY author over posts, comments and edits on every homepage view
+is out of the question, so each board is a sorted set
+(baidu_wiki/sortedset.py) that users/reputation.py adds to as it records
+events: a contribution or a like adds to the user's score in every
+window that contains now, globally and in the content's category, in
+one round trip once the transaction commits.
+
+Windows are keyed by period (day:2026-10-19, week:2026-W43, all). A
+period's set expires LEADERBOARD_GRACE_DAYS after the period ends, so an
+old window rolls off by its key expiring, never by a scan or a
+decrement. Taking reputation back (unlikes, deleted content) always
+changes the all-time boards, and the current day and week boards by the
+part of it that was earned in the current day or week. Otherwise liking
+and unliking, or posting and deleting, would pile up points on the
+period boards. What was earned in a period that has closed stays on that
+period's board, which nobody reads any more.
+
+"My rank" is ZREVRANK, O(log n). rebuild_leaderboards recomputes the
+all-time boards from the database; the period boards only live in the
+sorted sets.
+"""
+
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from baidu_wiki.sortedset import sorted_sets
+
+BOARDS = ('reputation', 'activity')
+WINDOWS = ('day', 'week', 'all')
+GLOBAL = 'global'
+
+
+def grace_days():
+    return getattr(settings, 'LEADERBOARD_GRACE_DAYS', 1)
+
+
+def period(window, now=None):
+    """(key part, seconds until the set may expire) of the window containing now."""
+    if window == 'all':
+        return 'all', None
+    now = timezone.localtime(now)
+    start, length, name = _period_start(window, now)
+    end = timezone.make_aware(datetime.combine(start + timedelta(days=length + grace_days()), dt_time.min))
+    return name, max(1, int((end - now).total_seconds()))
+
+
+def _period_start(window, now):
+    today = now.date()
+    if window == 'day':
+        start, length, name = today, 1, f"day:{today.isoformat()}"
+    else:
+        year, week, weekday = today.isocalendar()
+        start, length, name = today - timedelta(days=weekday - 1), 7, f"week:{year}-W{week:02d}"
+    return start, length, name
+
+
+def window_starts(now=None):
+    """{'day': ..., 'week': ...}: when the current day and week began."""
+    now = timezone.localtime(now)
+    return {
+        window: timezone.make_aware(datetime.combine(_period_start(window, now)[0], dt_time.min))
+        for window in ('day', 'week')
+    }
+
+
+def current_windows(at, now=None):
+    """The period windows whose current period contains `at`."""
+    starts = window_starts(now)
+    return tuple(window for window in ('day', 'week') if at >= starts[window])
+
+
+def board_key(board, window, scope=GLOBAL, now=None):
+    return f"leaderboard:{board}:{scope}:{period(window, now)[0]}"
+
+
+def post_scope(category_id):
+    return f"posts:{category_id}" if category_id else None
+
+
+def article_scope(category_id):
+    return f"wiki:{category_id}" if category_id else None
+
+
+def _increments(user_id, amounts, scope):
+    """Increments for {window: (points, items)} in the global and the `scope` boards."""
+    now = timezone.now()
+    increments = []
+    for scope_name in filter(None, (GLOBAL, scope)):
+        for window, (points, items) in amounts.items():
+            name, ttl = period(window, now)
+            for board, amount in (('reputation', points), ('activity', items)):
+                if amount:
+                    increments.append((f"leaderboard:{board}:{scope_name}:{name}", str(user_id), amount, ttl))
+    return increments
+
+
+def credit(user_id, points=0, items=0, scope=None):
+    """Add earned reputation and written items to every current window."""
+    increments = _increments(user_id, {window: (points, items) for window in WINDOWS}, scope)
+    transaction.on_commit(lambda: sorted_sets.incr_many(increments))
+
+
+def debit(user_id, points=0, items=0, scope=None, recent=None):
+    """
+    Take reputation and items back from the all-time boards, and from the
+    current day and week boards the part of them `recent` ({'day': (points,
+    items), 'week': ...}) says was earned in that day or week.
+    """
+    amounts = {'all': (points, items), **(recent or {})}
+    increments = _increments(user_id, {window: (-p, -i) for window, (p, i) in amounts.items()}, scope)
+    transaction.on_commit(lambda: sorted_sets.incr_many(increments))
+
+
+def top(board, window, scope=GLOBAL, count=20, offset=0):
+    """[(user_id, score)] from the top of a board."""
+    entries = sorted_sets.top(board_key(board, window, scope), count, offset)
+    # Users debited back to nothing stay in the set, below everyone else
+    return [(int(member), score) for member, score in entries if score > 0]
+
+
+def rank(board, window, scope, user_id):
+    """(1-based rank, score) of a user, or (None, 0) if they are not on the board."""
+    key = board_key(board, window, scope)
+    score = sorted_sets.score(key, str(user_id))
+    if not score or score <= 0:
+        return None, 0
+    return sorted_sets.rank(key, str(user_id)) + 1, score
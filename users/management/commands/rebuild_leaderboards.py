@@ -0,0 +1,49 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Sum, Value
+
+from baidu_wiki.sortedset import sorted_sets
+from posts.models import Post, PostComment
+from users import leaderboards, reputation
+from wiki.models import Article, ArticleVersion
+
+# Content counted for each kind, the category it is scoped to, and
+# whether its likes earn reputation
+SOURCES = {
+    'article': (Article, 'category_id', leaderboards.article_scope, True),
+    'edit': (ArticleVersion, 'article__category_id', leaderboards.article_scope, False),
+    'post': (Post, 'category_id', leaderboards.post_scope, True),
+    'comment': (PostComment, 'post__category_id', leaderboards.post_scope, True),
+}
+
+
+class Command(BaseCommand):
+    """Rebuild the all-time leaderboards from the content that exists."""
+
+    help = 'Recompute the all-time reputation and activity leaderboards, globally and per category.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report board sizes without saving them.')
+
+    def handle(self, *args, **options):
+        boards = defaultdict(Counter)
+        for kind, (model, category, scope_of, likes) in SOURCES.items():
+            # One grouped query per content table
+            rows = model.objects.order_by().values('author_id', scope_category=F(category)).annotate(
+                n=Count('pk'), likes=Sum('likes_count') if likes else Value(0),
+            )
+            for row in rows.iterator():
+                points = reputation.points(kind) * row['n'] + reputation.points(f"{kind}_like") * (row['likes'] or 0)
+                for scope in filter(None, (leaderboards.GLOBAL, scope_of(row['scope_category']))):
+                    boards['reputation', scope][row['author_id']] += points
+                    boards['activity', scope][row['author_id']] += row['n']
+
+        for (board, scope), scores in sorted(boards.items()):
+            scores = {str(user_id): score for user_id, score in scores.items() if score > 0}
+            if not options['dry_run']:
+                sorted_sets.replace(leaderboards.board_key(board, 'all', scope), scores)
+            self.stdout.write(f"{board} {scope}: {len(scores)} users")
+
+        verb = 'Would rebuild' if options['dry_run'] else 'Rebuilt'
+        self.stdout.write(f"{verb} {len(boards)} all-time boards")
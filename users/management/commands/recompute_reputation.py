@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post, PostComment
+from users import reputation
+from users.models import UserProfile
+from wiki.models import Article, ArticleVersion
+
+User = get_user_model()
+
+# Content counted for each kind, and whether its likes earn reputation
+SOURCES = {
+    'article': (Article, True),
+    'edit': (ArticleVersion, False),
+    'post': (Post, True),
+    'comment': (PostComment, True),
+}
+
+
+class Command(BaseCommand):
+    """Rebuild reputation, level and content counters from the content that exists."""
+
+    help = 'Recompute UserProfile counters, reputation and level for all users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Users per chunk.')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them.')
+
+    def handle(self, *args, **options):
+        # Users created outside registration (e.g. createsuperuser) have no profile yet
+        missing = User.objects.filter(profile__isnull=True).values_list('pk', flat=True)
+        if not options['dry_run']:
+            UserProfile.objects.bulk_create(
+                [UserProfile(user_id=pk) for pk in missing.iterator()], batch_size=options['batch_size'],
+                ignore_conflicts=True,
+            )
+
+        fields = [*reputation.FIELDS, 'level']
+        checked = changed = 0
+        last_pk = 0
+        while True:
+            # Keyset chunks: each costs one grouped query per content table
+            chunk = list(
+                UserProfile.objects.filter(user_id__gt=last_pk).order_by('user_id')[:options['batch_size']]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1].user_id
+            user_ids = [profile.user_id for profile in chunk]
+            totals = {
+                kind: reputation.authors_of(model.objects.filter(author_id__in=user_ids), likes=likes)
+                for kind, (model, likes) in SOURCES.items()
+            }
+
+            updated = []
+            for profile in chunk:
+                values = {'reputation': 0}
+                for kind, authors in totals.items():
+                    count, likes = authors.get(profile.user_id, (0, 0))
+                    values[reputation.COUNTERS[kind]] = count
+                    values['reputation'] += reputation.points(kind) * count + reputation.points(f"{kind}_like") * likes
+                values['level'] = reputation.level_for(values['reputation'])
+                if any(getattr(profile, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(profile, field, value)
+                    updated.append(profile)
+            if updated and not options['dry_run']:
+                with transaction.atomic():
+                    UserProfile.objects.bulk_update(updated, fields)
+            checked += len(chunk)
+            changed += len(updated)
+
+        verb = 'would change' if options['dry_run'] else 'changed'
+        self.stdout.write(f"Checked {checked} profiles; {verb} {changed}")
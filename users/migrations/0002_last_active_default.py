@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='last_active',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class CustomUser(AbstractUser):
@@ -18,8 +19,8 @@ class CustomUser(AbstractUser):
     followers_count = models.PositiveIntegerField(default=0)
     following_count = models.PositiveIntegerField(default=0)
     
-    # Activity tracking
-    last_active = models.DateTimeField(auto_now=True)
+    # Activity tracking, written in batches by users.activity
+    last_active = models.DateTimeField(default=timezone.now)
     date_joined = models.DateTimeField(auto_now_add=True)
     
     # Preferences
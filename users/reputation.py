@@ -0,0 +1,251 @@
+"""
+Reputation, levels and content counters on UserProfile.
+
+Counting a user's articles, edits, posts, comments and the likes they
+received on every profile view would touch five tables, so the profile
+keeps the totals and the views that create, like and delete content
+report each event here. An event becomes F() increments of the counter
+and of reputation (REPUTATION_POINTS), then level is set from the new
+reputation by a CASE over REPUTATION_LEVELS, all in SQL, so concurrent
+events never overwrite each other.
+
+Reputation is defined so it can always be recomputed from the content
+that exists:
+
+    points per article, edit, post and comment the user wrote
+    + points per like those articles, posts and comments have now
+
+Deleting content therefore takes back its points and those of its likes,
+for every author whose content went with it (comments under a deleted
+post, edits of a deleted article). recompute_reputation rebuilds every
+profile from grouped aggregates, e.g. after bulk imports that bypass the
+views.
+
+With REPUTATION_FLUSH_INTERVAL > 0, events are merged per user in memory
+once their transaction commits and written in batches by a background
+thread, as users/activity.py does for last_active. With 0 they are
+written immediately, in the transaction of the change itself.
+
+Every event is also passed on to the contributor leaderboards
+(users/leaderboards.py), with the category it happened in as `scope`.
+"""
+
+import atexit
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from . import leaderboards
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POINTS = {
+    'article': 10,
+    'edit': 2,
+    'post': 5,
+    'comment': 1,
+    'article_like': 5,
+    'post_like': 2,
+    'comment_like': 1,
+}
+DEFAULT_LEVELS = [0, 50, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000]
+
+# Profile counter kept for each kind of content
+COUNTERS = {
+    'article': 'articles_created',
+    'edit': 'articles_edited',
+    'post': 'posts_created',
+    'comment': 'comments_created',
+}
+FIELDS = ['reputation', *COUNTERS.values()]
+BATCH_SIZE = 500
+
+
+def points(event):
+    return getattr(settings, 'REPUTATION_POINTS', DEFAULT_POINTS).get(event, 0)
+
+
+def levels():
+    return getattr(settings, 'REPUTATION_LEVELS', DEFAULT_LEVELS)
+
+
+def level_for(reputation):
+    """Level 1 from LEVELS[0], level 2 from LEVELS[1], and so on."""
+    return max(1, bisect.bisect_right(levels(), reputation))
+
+
+def level_expression():
+    """level_for(reputation) in SQL, on the row's current reputation."""
+    thresholds = list(enumerate(levels(), start=1))
+    return Case(
+        *(When(reputation__gte=threshold, then=Value(level)) for level, threshold in reversed(thresholds)),
+        default=Value(1),
+        output_field=IntegerField(),
+    )
+
+
+def write(deltas):
+    """Apply {user_id: Counter(field=delta)}: one UPDATE per distinct change, then levels."""
+    from .models import CustomUser, UserProfile
+
+    # Users created outside registration (admin, createsuperuser) have no
+    # profile yet, and an UPDATE alone would drop their events
+    user_ids = sorted(deltas)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        missing = CustomUser.objects.filter(
+            pk__in=user_ids[start:start + BATCH_SIZE], profile__isnull=True,
+        ).values_list('pk', flat=True)
+        UserProfile.objects.bulk_create([UserProfile(user_id=pk) for pk in missing], ignore_conflicts=True)
+
+    groups = defaultdict(list)
+    for user_id, change in deltas.items():
+        change = tuple(sorted((field, delta) for field, delta in change.items() if delta))
+        if change:
+            groups[change].append(user_id)
+    for change, changed in groups.items():
+        for start in range(0, len(changed), BATCH_SIZE):
+            UserProfile.objects.filter(user_id__in=changed[start:start + BATCH_SIZE]).update(**{
+                # Counters never go below zero, even if an event was missed
+                field: Greatest(F(field) + delta, Value(0)) for field, delta in change
+            })
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        UserProfile.objects.filter(user_id__in=user_ids[start:start + BATCH_SIZE]).update(level=level_expression())
+
+
+class ReputationLedger:
+    """Merges reputation events per user and writes them now or in batches."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(Counter)
+        self._thread = None
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'REPUTATION_FLUSH_INTERVAL', 0)
+
+    def add(self, deltas):
+        """Apply {user_id: Counter(field=delta)} now, or once the transaction commits."""
+        if self.flush_interval <= 0:
+            write(deltas)
+            return
+        transaction.on_commit(lambda: self._queue(deltas))
+
+    def _queue(self, deltas):
+        with self._lock:
+            for user_id, change in deltas.items():
+                self._pending[user_id].update(change)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='reputation-flusher', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write all pending events; returns the number of users updated."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                write(pending)
+        except Exception:
+            logger.exception('Could not write reputation of %d users', len(pending))
+            with self._lock:
+                for user_id, change in pending.items():
+                    self._pending[user_id].update(change)
+            return 0
+        return len(pending)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+ledger = ReputationLedger()
+atexit.register(ledger.flush)
+
+
+def record(user_id, kind, count=1, scope=None):
+    """Credit `count` new articles, edits, posts or comments to their author."""
+    ledger.add({user_id: Counter({COUNTERS[kind]: count, 'reputation': points(kind) * count})})
+    leaderboards.credit(user_id, points(kind) * count, count, scope)
+
+
+def record_like(user_id, kind, count=1, scope=None, earned_at=None):
+    """
+    Credit (or, with count=-1, take back) a like on the user's `kind` of
+    content. When taking back, `earned_at` is when the like was given.
+    """
+    amount = points(f"{kind}_like") * count
+    ledger.add({user_id: Counter({'reputation': amount})})
+    if count > 0:
+        leaderboards.credit(user_id, amount, 0, scope)
+    else:
+        windows = leaderboards.current_windows(earned_at) if earned_at else ()
+        leaderboards.debit(user_id, -amount, 0, scope, {window: (-amount, 0) for window in windows})
+
+
+def take_back(kind, authors, scope=None, recent=None):
+    """
+    Take back deleted content: `authors` maps author id to the number of
+    their `kind` items that went and the likes those items had, and
+    `recent` (see recent_of) what of that was earned this day and week.
+    """
+    if authors:
+        lost = {
+            user_id: (count, points(kind) * count + points(f"{kind}_like") * likes)
+            for user_id, (count, likes) in authors.items()
+        }
+        ledger.add({
+            user_id: Counter({COUNTERS[kind]: -count, 'reputation': -reputation})
+            for user_id, (count, reputation) in lost.items()
+        })
+        for user_id, (count, reputation) in lost.items():
+            windows = {
+                window: (points(kind) * n + points(f"{kind}_like") * likes, n)
+                for window, (n, likes) in (recent or {}).get(user_id, {}).items()
+            }
+            leaderboards.debit(user_id, reputation, count, scope, windows)
+
+
+def recent_of(queryset, likes=None, like_author=None):
+    """
+    {author_id: {'day': (items, likes), 'week': (items, likes)}} for the
+    content in `queryset` and its `likes` (grouped by `like_author`) that
+    were created in the current day and week, in one grouped query each.
+    """
+    starts = leaderboards.window_starts()
+    recent = defaultdict(lambda: {'day': [0, 0], 'week': [0, 0]})
+    sources = [(queryset, 'author_id', 0)]
+    if likes is not None:
+        sources.append((likes, like_author, 1))
+    for source, author, slot in sources:
+        rows = source.filter(created_at__gte=starts['week']).order_by().values(author).annotate(
+            week=Count('pk'), day=Count('pk', filter=Q(created_at__gte=starts['day'])),
+        )
+        for row in rows:
+            for window in ('day', 'week'):
+                recent[row[author]][window][slot] += row[window]
+    return {
+        user_id: {window: tuple(counts) for window, counts in windows.items()}
+        for user_id, windows in recent.items()
+    }
+
+
+def authors_of(queryset, likes=True):
+    """{author_id: (items, likes)} for the content in `queryset`, in one grouped query."""
+    rows = queryset.order_by().values('author_id').annotate(
+        n=Count('pk'), likes=Sum('likes_count') if likes else Value(0),
+    )
+    return {row['author_id']: (row['n'], row['likes'] or 0) for row in rows}
@@ -1,7 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from posts.wordfilter import check_text
 from .models import CustomUser, UserProfile, Follow
 
+
+def validate_username_words(value):
+    """Usernames may not contain any listed sensitive word."""
+    if check_text(value):
+        raise serializers.ValidationError("Username contains words that are not allowed.")
+    return value
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration."""
     
@@ -12,6 +21,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ('email', 'username', 'password', 'password_confirm')
     
+    def validate_username(self, value):
+        return validate_username_words(value)
+    
     def validate(self, attrs):
         """Validate that passwords match."""
         if attrs['password'] != attrs['password_confirm']:
@@ -82,6 +94,9 @@ class UserSerializer(serializers.ModelSerializer):
                  'following_count', 'last_active', 'date_joined', 'profile')
         read_only_fields = ('id', 'last_active', 'date_joined', 'followers_count', 
                            'following_count')
+    
+    def validate_username(self, value):
+        return validate_username_words(value)
 
 
 class FollowSerializer(serializers.ModelSerializer):
@@ -96,6 +111,16 @@ class FollowSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
+class LeaderboardUserSerializer(serializers.ModelSerializer):
+    """The public face of a user on a leaderboard."""
+    
+    level = serializers.IntegerField(source='profile.level', read_only=True)
+    
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'first_name', 'last_name', 'avatar', 'level')
+
+
 class PasswordChangeSerializer(serializers.Serializer):
     """Serializer for password change."""
     
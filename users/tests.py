@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from baidu_wiki.testing import (
+    TEST_CACHES, QueryBudgetTestCase, assert_query_budget, create_users, rows_over_budget,
+)
+
+from . import reputation
+from .authentication import TOKEN_KEY, _digest, local_tokens
+from .models import UserProfile
+from .views import LeaderboardView
+
+
+class LeaderboardQueryBudgetTests(QueryBudgetTestCase):
+    """The leaderboard stays within its query budget however many users it ranks."""
+
+    rows = rows_over_budget(LeaderboardView)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users('writer', cls.rows)
+
+    def setUp(self):
+        super().setUp()
+        # The boards are written once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            for i, user in enumerate(self.users):
+                reputation.record(user.pk, 'post', count=i + 1)
+        self.client = APIClient()
+
+    def test_leaderboard(self):
+        response = assert_query_budget(self.client, 'get', '/api/auth/leaderboards/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), len(self.users))
+
+    def test_leaderboard_signed_in(self):
+        self.client.force_authenticate(self.users[0])
+        response = assert_query_budget(self.client, 'get', '/api/auth/leaderboards/?window=all')
+        self.assertEqual(response.status_code, 200)
+
+
+# last_active written straight away, not by a thread after the test database is gone
+@override_settings(CACHES=TEST_CACHES, LAST_ACTIVE_FLUSH_INTERVAL=0)
+class TokenCacheInvalidationTests(TestCase):
+    """A cached token principal goes away when the user or the token changes."""
+
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user, = create_users('holder', 1)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        # Caches the principal
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 200)
+
+    def test_deactivated_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(cache.get(TOKEN_KEY.format(_digest(self.token.key))))
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+    def test_saving_unrelated_fields_keeps_the_cache(self):
+        self.user.bio = 'Hello'
+        self.user.save(update_fields=['bio'])
+        self.assertIsNotNone(cache.get(TOKEN_KEY.format(_digest(self.token.key))))
+
+    def test_deleted_token_is_rejected(self):
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/auth/profile/').status_code, 401)
+
+
+class ReputationTests(TestCase):
+
+    def test_events_create_missing_profiles(self):
+        # Like a user made with createsuperuser: no profile
+        user, = create_users('admin', 1)
+        reputation.record(user.pk, 'post')
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual((profile.posts_created, profile.reputation), (1, reputation.points('post')))
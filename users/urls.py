@@ -16,4 +16,7 @@ urlpatterns = [
     path('users/<int:user_id>/follow/', views.FollowUserView.as_view(), name='follow_user'),
     path('users/<int:user_id>/followers/', views.UserFollowersView.as_view(), name='user_followers'),
     path('users/<int:user_id>/following/', views.UserFollowingView.as_view(), name='user_following'),
+    
+    # Leaderboards
+    path('leaderboards/', views.LeaderboardView.as_view(), name='leaderboards'),
 ]
\ No newline at end of file
@@ -3,13 +3,16 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
+from django.conf import settings
 from django.contrib.auth import login, logout
 from django.shortcuts import get_object_or_404
 
+from . import leaderboards
+from .authentication import invalidate_token, invalidate_user
 from .models import CustomUser, UserProfile, Follow
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserSerializer,
-    UserProfileSerializer, FollowSerializer, PasswordChangeSerializer
+    UserProfileSerializer, FollowSerializer, PasswordChangeSerializer, LeaderboardUserSerializer
 )
 
 
@@ -17,6 +20,7 @@ class UserRegistrationView(APIView):
     """User registration view."""
     
     permission_classes = [permissions.AllowAny]
+    throttle_scopes = {'post': 'register'}
     
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
@@ -67,7 +71,9 @@ class UserLogoutView(APIView):
     def post(self, request):
         # Delete auth token
         try:
-            request.user.auth_token.delete()
+            token = request.user.auth_token
+            invalidate_token(token.key)
+            token.delete()
         except (AttributeError, Token.DoesNotExist):
             pass
         
@@ -80,10 +86,14 @@ class UserLogoutView(APIView):
 class UserProfileView(APIView):
     """User profile view."""
     
+    def get_user(self, request):
+        # Token requests carry a minimal principal; load the full row once
+        return CustomUser.objects.select_related('profile').get(pk=request.user.pk)
+    
     def get(self, request):
         """Get current user profile."""
         if request.user.is_authenticated:
-            serializer = UserSerializer(request.user)
+            serializer = UserSerializer(self.get_user(request))
             return Response(serializer.data)
         else:
             return Response({
@@ -98,7 +108,7 @@ class UserProfileView(APIView):
                 'error': 'Authentication required.'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        serializer = UserSerializer(request.user, data=request.data, partial=True)
+        serializer = UserSerializer(self.get_user(request), data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
@@ -120,6 +130,8 @@ class UserDetailView(APIView):
 class FollowUserView(APIView):
     """Follow/unfollow user view."""
     
+    throttle_scopes = {'post': 'follow', 'delete': 'follow'}
+    
     def post(self, request, user_id):
         """Follow a user."""
         user_to_follow = get_object_or_404(CustomUser, id=user_id)
@@ -180,7 +192,9 @@ class UserFollowersView(APIView):
     def get(self, request, user_id):
         """Get list of user's followers."""
         user = get_object_or_404(CustomUser, id=user_id)
-        followers = Follow.objects.filter(followed=user).select_related('follower')
+        followers = Follow.objects.filter(followed=user).select_related(
+            'follower__profile', 'followed__profile'
+        )
         serializer = FollowSerializer(followers, many=True)
         return Response(serializer.data)
 
@@ -193,11 +207,66 @@ class UserFollowingView(APIView):
     def get(self, request, user_id):
         """Get list of users that the user is following."""
         user = get_object_or_404(CustomUser, id=user_id)
-        following = Follow.objects.filter(follower=user).select_related('followed')
+        following = Follow.objects.filter(follower=user).select_related(
+            'follower__profile', 'followed__profile'
+        )
         serializer = FollowSerializer(following, many=True)
         return Response(serializer.data)
 
 
+class LeaderboardView(APIView):
+    """
+    Top contributors by reputation earned or items written, for today,
+    this week or all time, site-wide or in one category (?scope=posts:<id>
+    or wiki:<id>). Signed-in users also get their own rank.
+    """
+    
+    permission_classes = [permissions.AllowAny]
+    query_budgets = {'get': 2}
+    
+    def get(self, request):
+        board = request.query_params.get('board', 'reputation')
+        window = request.query_params.get('window', 'week')
+        scope = request.query_params.get('scope', leaderboards.GLOBAL)
+        if board not in leaderboards.BOARDS:
+            return Response(
+                {'error': f"board must be one of: {', '.join(leaderboards.BOARDS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if window not in leaderboards.WINDOWS:
+            return Response(
+                {'error': f"window must be one of: {', '.join(leaderboards.WINDOWS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        kind, _, category = scope.partition(':')
+        if scope != leaderboards.GLOBAL and (kind not in ('posts', 'wiki') or not category.isdigit()):
+            return Response(
+                {'error': "scope must be 'global', 'posts:<category id>' or 'wiki:<category id>'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            offset = max(0, int(request.query_params.get('offset', 0)))
+            limit = min(
+                max(1, int(request.query_params.get('limit', settings.LEADERBOARD_PAGE_SIZE))),
+                settings.LEADERBOARD_MAX_PAGE_SIZE
+            )
+        except ValueError:
+            return Response({'error': 'offset and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        entries = leaderboards.top(board, window, scope, limit, offset)
+        users = CustomUser.objects.select_related('profile').in_bulk([user_id for user_id, _ in entries])
+        results = [
+            {'rank': offset + n, 'user': LeaderboardUserSerializer(users[user_id]).data, 'score': int(score)}
+            for n, (user_id, score) in enumerate(entries, start=1)
+            if user_id in users
+        ]
+        data = {'board': board, 'window': window, 'scope': scope, 'results': results}
+        if request.user.is_authenticated:
+            rank, score = leaderboards.rank(board, window, scope, request.user.pk)
+            data['me'] = {'rank': rank, 'score': int(score)}
+        return Response(data)
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def change_password(request):
@@ -218,9 +287,12 @@ def change_password(request):
         
         # Update auth token
         try:
-            request.user.auth_token.delete()
+            token = request.user.auth_token
+            invalidate_token(token.key)
+            token.delete()
         except (AttributeError, Token.DoesNotExist):
             pass
+        invalidate_user(request.user.pk)
         
         token, created = Token.objects.get_or_create(user=request.user)
         
@@ -0,0 +1,328 @@
+"""
+Streaming bulk import/export helpers used by the import_*/export_* commands.
+
+Records are read one line at a time from JSONL or CSV and processed in
+fixed-size chunks, so memory use is bounded by the chunk size rather than by
+the size of the dump.
+"""
+
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .slugs import slug_base
+
+TAG_SEPARATOR = '|'
+
+
+def detect_format(path, fmt=None):
+    """Return 'jsonl' or 'csv' from an explicit format or the file extension."""
+    if fmt:
+        return fmt
+    if path.endswith('.csv'):
+        return 'csv'
+    return 'jsonl'
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def read_records(path, fmt):
+    """Yield records from a JSONL or CSV file one at a time."""
+    handle = _open(path, 'r')
+    try:
+        if fmt == 'csv':
+            for row in csv.DictReader(handle):
+                yield row
+        else:
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    raise CommandError(f"Invalid JSON on line {line_number}: {exc}")
+                yield record
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+class RecordWriter:
+    """Write records as JSONL or CSV to a file or stdout."""
+
+    def __init__(self, path, fmt, fieldnames):
+        self.handle = _open(path, 'w')
+        self.fmt = fmt
+        self.fieldnames = fieldnames
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(self.handle, fieldnames=fieldnames)
+            self.writer.writeheader()
+
+    def write(self, record):
+        if self.fmt == 'csv':
+            row = dict(record)
+            if isinstance(row.get('tags'), list):
+                row['tags'] = TAG_SEPARATOR.join(row['tags'])
+            self.writer.writerow(row)
+        else:
+            self.handle.write(json.dumps(record, ensure_ascii=False, default=str))
+            self.handle.write('\n')
+
+    def close(self):
+        self.handle.flush()
+        if self.handle is not sys.stdout:
+            self.handle.close()
+
+
+def keyset_chunks(queryset, chunk_size, fields):
+    """
+    Yield lists of value dicts ordered by primary key.
+
+    Paginates with pk > last_pk instead of OFFSET so every chunk is an index
+    range scan no matter how deep into the table the export is.
+    """
+    last_pk = None
+    while True:
+        page = queryset.order_by('pk')
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        rows = list(page.values('pk', *fields)[:chunk_size])
+        if not rows:
+            return
+        last_pk = rows[-1]['pk']
+        yield rows
+
+
+def bulk_create_with_pks(model, objs, key_field, **kwargs):
+    """
+    bulk_create objs and make sure each one has its primary key set.
+
+    Backends that cannot return ids from a bulk insert get them back with a
+    single lookup on the (unique) key_field.
+    """
+    created = model.objects.bulk_create(objs, **kwargs)
+    if created and created[0].pk is None and not connection.features.can_return_rows_from_bulk_insert:
+        pks = dict(model.objects.filter(
+            **{f'{key_field}__in': [getattr(obj, key_field) for obj in created]}
+        ).values_list(key_field, 'pk'))
+        for obj in created:
+            obj.pk = pks.get(getattr(obj, key_field))
+    return created
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_tags(value):
+    """Accept tags as a JSON list or a separator-delimited CSV cell."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(TAG_SEPARATOR)
+    return [name.strip() for name in value if name and name.strip()]
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def parse_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_date(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        return parse_datetime(value)
+    return value
+
+
+class SlugAllocator:
+    """
+    Allocate unique slugs in memory.
+
+    Seeded with the slugs already in the table, it hands out base, base-2,
+    base-3... without any per-record queries.
+    """
+
+    def __init__(self, taken=(), max_length=200, make_base=None, fallback='item'):
+        self.taken = set(taken)
+        self.counters = {}
+        self.max_length = max_length
+        self.make_base = make_base or slug_base
+        self.fallback = fallback
+
+    def allocate(self, text):
+        base = (self.make_base(text or '') or self.fallback)[:self.max_length - 8].strip('-') \
+            or self.fallback
+        n = self.counters.get(base, 1)
+        slug = base if n == 1 else f"{base}-{n}"
+        while slug in self.taken:
+            n += 1
+            slug = f"{base}-{n}"
+        self.counters[base] = n + 1
+        self.taken.add(slug)
+        return slug
+
+    def reserve(self, slug):
+        """Mark an explicitly provided slug as taken; False if already used."""
+        if slug in self.taken:
+            return False
+        self.taken.add(slug)
+        return True
+
+
+class ProgressReporter:
+    """Periodically report processed records and throughput."""
+
+    def __init__(self, stream, label, every=10000):
+        self.stream = stream
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.started = time.monotonic()
+        self._next = every
+
+    def update(self, n, **stats):
+        self.count += n
+        if self.count >= self._next:
+            self._next = self.count + self.every
+            self.report(**stats)
+
+    def report(self, final=False, **stats):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        extra = ''.join(f", {key} {value}" for key, value in stats.items())
+        prefix = 'Done: ' if final else ''
+        self.stream.write(
+            f"{prefix}{self.count} {self.label} in {elapsed:.1f}s "
+            f"({self.count / elapsed:.0f}/s){extra}"
+        )
+
+
+class BaseImportCommand(BaseCommand):
+    """
+    Skeleton for streaming imports.
+
+    Subclasses implement prepare() to warm their lookup caches and
+    import_chunk(records) which returns a dict of counters for that chunk.
+    """
+
+    label = 'records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or '-' for stdin.")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], default=None)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--update-existing', action='store_true',
+                            help='Update rows that already exist instead of skipping them.')
+        parser.add_argument('--default-author', default=None,
+                            help='Username or email used when a record has no known author.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0}
+        fmt = detect_format(options['path'], options['format'])
+
+        self.prepare()
+        progress = ProgressReporter(self.stderr, self.label)
+        for records in chunked(read_records(options['path'], fmt), options['chunk_size']):
+            with transaction.atomic():
+                chunk_stats = self.import_chunk(records)
+            for key, value in chunk_stats.items():
+                self.stats[key] = self.stats.get(key, 0) + value
+            progress.update(len(records), **self.stats)
+
+        self.finish()
+        progress.report(final=True, **self.stats)
+
+    def prepare(self):
+        pass
+
+    def import_chunk(self, records):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+class BaseExportCommand(BaseCommand):
+    """Skeleton for streaming exports; subclasses implement iter_chunks()."""
+
+    label = 'records'
+    fieldnames = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help="Output file, or '-' for stdout.")
+        parser.add_argument('--format', choices=['jsonl', 'csv'], default=None)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        self.options = options
+        fmt = detect_format(options['path'], options['format'])
+        writer = RecordWriter(options['path'], fmt, self.fieldnames)
+        progress = ProgressReporter(self.stderr, self.label)
+        try:
+            for records in self.iter_chunks(options['chunk_size']):
+                for record in records:
+                    writer.write(record)
+                progress.update(len(records))
+        finally:
+            writer.close()
+        progress.report(final=True)
+
+    def iter_chunks(self, chunk_size):
+        raise NotImplementedError
+
+
+class AuthorCache:
+    """Resolve author usernames/emails to user ids, querying once per chunk."""
+
+    def __init__(self, user_model, default=None):
+        self.user_model = user_model
+        self.ids = {}
+        self.default_id = None
+        if default:
+            self.load([default])
+            self.default_id = self.ids.get(default)
+            if self.default_id is None:
+                raise CommandError(f"Default author '{default}' does not exist.")
+
+    def load(self, keys):
+        keys = {key for key in keys if key and key not in self.ids}
+        if not keys:
+            return
+        for pk, username, email in self.user_model.objects.filter(
+            Q(username__in=keys) | Q(email__in=keys)
+        ).values_list('pk', 'username', 'email'):
+            self.ids[username] = pk
+            self.ids[email] = pk
+        for key in keys:
+            self.ids.setdefault(key, None)
+
+    def get(self, key):
+        return self.ids.get(key) or self.default_id
@@ -0,0 +1,58 @@
+from wiki.bulk import BaseExportCommand, keyset_chunks
+from wiki.models import Article
+
+FIELDS = [
+    'slug', 'title', 'summary', 'content', 'author__username', 'author__email',
+    'category__slug', 'status', 'featured', 'views_count', 'likes_count',
+    'comments_count', 'created_at', 'published_at',
+]
+
+
+class Command(BaseExportCommand):
+    """Stream-export wiki articles in the format read by import_articles."""
+
+    help = 'Stream-export wiki articles to JSONL or CSV.'
+    label = 'articles'
+    fieldnames = [
+        'id', 'slug', 'title', 'summary', 'content', 'author', 'category', 'tags',
+        'status', 'featured', 'views_count', 'likes_count', 'comments_count',
+        'created_at', 'published_at',
+    ]
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--status', default=None, help='Only export articles with this status.')
+
+    def iter_chunks(self, chunk_size):
+        queryset = Article.objects.all()
+        if self.options['status']:
+            queryset = queryset.filter(status=self.options['status'])
+
+        through = Article.tags.through
+        for rows in keyset_chunks(queryset, chunk_size, FIELDS):
+            tags = {}
+            for article_id, name in through.objects.filter(
+                article_id__in=[row['pk'] for row in rows]
+            ).values_list('article_id', 'tag__name'):
+                tags.setdefault(article_id, []).append(name)
+
+            yield [
+                {
+                    'id': row['pk'],
+                    'slug': row['slug'],
+                    'title': row['title'],
+                    'summary': row['summary'],
+                    'content': row['content'],
+                    'author': row['author__username'] or row['author__email'],
+                    'category': row['category__slug'],
+                    'tags': tags.get(row['pk'], []),
+                    'status': row['status'],
+                    'featured': row['featured'],
+                    'views_count': row['views_count'],
+                    'likes_count': row['likes_count'],
+                    'comments_count': row['comments_count'],
+                    'created_at': row['created_at'],
+                    'published_at': row['published_at'],
+                }
+                for row in rows
+            ]
@@ -0,0 +1,147 @@
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from wiki.bulk import (
+    AuthorCache, BaseImportCommand, SlugAllocator, bulk_create_with_pks,
+    parse_bool, parse_date, parse_tags,
+)
+from wiki.models import Article, Category, Tag
+from wiki.slugs import reset_slug_counters
+from wiki.tagging import resolve_tags
+
+User = get_user_model()
+
+UPDATE_FIELDS = [
+    'title', 'content', 'summary', 'author', 'category', 'status',
+    'featured', 'published_at', 'updated_at',
+]
+STATUSES = {choice for choice, label in Article.STATUS_CHOICES}
+
+
+class Command(BaseImportCommand):
+    """
+    Stream-import wiki articles from JSONL or CSV.
+
+    Each record may contain: title, content, summary, slug, author (username
+    or email), category (slug), tags (list, or '|' separated in CSV), status,
+    featured and published_at. Records whose slug already exists are skipped
+    unless --update-existing is given.
+    """
+
+    help = 'Stream-import wiki articles from a JSONL or CSV dump.'
+    label = 'articles'
+
+    def prepare(self):
+        self.authors = AuthorCache(User, self.options['default_author'])
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.slugs = SlugAllocator(
+            Article.objects.values_list('slug', flat=True).iterator(chunk_size=10000),
+            max_length=Article._meta.get_field('slug').max_length,
+            fallback='article',
+        )
+
+    def finish(self):
+        # Suffixes were handed out in memory, let the counters re-seed from the table
+        reset_slug_counters(Article)
+
+    def get_category_id(self, slug):
+        if not slug:
+            return None
+        if slug not in self.categories:
+            # Unknown categories are rare, create them through save() so the tree stays valid
+            category, created = Category.objects.get_or_create(slug=slug, defaults={'name': slug})
+            self.categories[slug] = category.id
+        return self.categories[slug]
+
+    def import_chunk(self, records):
+        now = timezone.now()
+        update_existing = self.options['update_existing']
+        stats = {'created': 0, 'updated': 0, 'skipped': 0}
+
+        self.authors.load(record.get('author') for record in records)
+
+        existing = {}
+        if update_existing:
+            explicit = [record['slug'] for record in records if record.get('slug')]
+            existing = dict(Article.objects.filter(slug__in=explicit).values_list('slug', 'id'))
+
+        to_create, to_update, tagged = [], [], []
+        for record in records:
+            title = (record.get('title') or '').strip()
+            author_id = self.authors.get(record.get('author'))
+            if not title or author_id is None:
+                stats['skipped'] += 1
+                continue
+
+            status = record.get('status') or 'draft'
+            if status not in STATUSES:
+                status = 'draft'
+            published_at = parse_date(record.get('published_at'))
+            if status == 'published' and not published_at:
+                published_at = now
+
+            article = Article(
+                title=title[:200],
+                content=record.get('content') or '',
+                summary=(record.get('summary') or '')[:500],
+                author_id=author_id,
+                category_id=self.get_category_id(record.get('category')),
+                status=status,
+                featured=parse_bool(record.get('featured', False)),
+                published_at=published_at,
+            )
+
+            slug = (record.get('slug') or '').strip()
+            if slug and slug in existing:
+                article.pk = existing.pop(slug)
+                article.slug = slug
+                article.updated_at = now
+                to_update.append(article)
+            elif slug:
+                if not self.slugs.reserve(slug):
+                    stats['skipped'] += 1
+                    continue
+                article.slug = slug
+                to_create.append(article)
+            else:
+                article.slug = self.slugs.allocate(title)
+                to_create.append(article)
+
+            if 'tags' in record:
+                tagged.append((article, parse_tags(record.get('tags'))))
+
+        if to_create:
+            bulk_create_with_pks(Article, to_create, 'slug')
+        if to_update:
+            # INSERT ... ON CONFLICT DO UPDATE is far cheaper than bulk_update's CASE WHEN
+            Article.objects.bulk_create(
+                to_update, update_conflicts=True,
+                unique_fields=['slug'], update_fields=UPDATE_FIELDS,
+            )
+        self.apply_tags(tagged, [article.pk for article in to_update])
+
+        stats['created'] = len(to_create)
+        stats['updated'] = len(to_update)
+        return stats
+
+    def apply_tags(self, tagged, updated_ids):
+        """Replace tags for the chunk with one delete and one bulk insert."""
+        through = Article.tags.through
+        updated_ids = set(updated_ids)
+        retagged = [article.pk for article, names in tagged if article.pk in updated_ids]
+        if retagged:
+            through.objects.filter(article_id__in=retagged).delete()
+
+        names = {name for article, article_names in tagged for name in article_names}
+        if not names:
+            return
+        tag_ids = {tag.name: tag.pk for tag in resolve_tags(Tag, names)}
+        through.objects.bulk_create(
+            [
+                through(article_id=article.pk, tag_id=tag_ids[name])
+                for article, article_names in tagged
+                for name in dict.fromkeys(article_names)
+                if name in tag_ids
+            ],
+            ignore_conflicts=True,
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+def populate_paths(apps, schema_editor):
+    """Compute materialized paths for existing categories, parents first."""
+    Category = apps.get_model('wiki', 'Category')
+    children = {}
+    for pk, parent_id in Category.objects.values_list('pk', 'parent_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    stack = [(pk, '') for pk in children.get(None, [])]
+    while stack:
+        pk, parent_path = stack.pop()
+        path = parent_path + format(pk, '08x') + '/'
+        Category.objects.filter(pk=pk).update(path=path, depth=path.count('/') - 1)
+        stack.extend((child, path) for child in children.get(pk, []))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wiki', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
-from django.utils.text import slugify
+from .slugs import allocate_slug
 
 User = get_user_model()
 
@@ -15,10 +18,17 @@ class Category(models.Model):
     parent = models.ForeignKey('self', on_delete=models.CASCADE, 
                              null=True, blank=True, related_name='subcategories')
     
+    # Materialized path of ancestor ids, e.g. "00000001/0000000a/".
+    # Maintained on save so a whole subtree is a single prefix range query.
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    PATH_STEP = 8
+    
     class Meta:
         verbose_name = _('category')
         verbose_name_plural = _('categories')
@@ -27,10 +37,73 @@ class Category(models.Model):
     def __str__(self):
         return self.name
     
+    @classmethod
+    def path_segment(cls, pk):
+        """Return the fixed-width path segment for a category id."""
+        return format(pk, '0%dx' % cls.PATH_STEP) + '/'
+    
+    def clean(self):
+        """Prevent a category from being moved under its own subtree."""
+        if self.pk and self.parent_id:
+            parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).first() or ''
+            if self.parent_id == self.pk or self.path_segment(self.pk) in parent_path:
+                raise ValidationError('A category cannot be moved under its own subcategory.')
+    
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+            self.slug = allocate_slug(Category, self.name)
+        
+        with transaction.atomic():
+            # Read the stored path rather than trusting a possibly stale instance
+            old_path = ''
+            if self.pk:
+                old_path = Category.objects.filter(pk=self.pk).values_list('path', flat=True).first() or ''
+                self.clean()
+            
+            super().save(*args, **kwargs)
+            
+            parent_path = ''
+            if self.parent_id:
+                parent_path = Category.objects.filter(pk=self.parent_id).values_list('path', flat=True).get()
+            new_path = parent_path + self.path_segment(self.pk)
+            
+            if new_path != old_path:
+                self._move_subtree(old_path, new_path)
+        
+        from .taxonomy import bump_taxonomy_version
+        transaction.on_commit(bump_taxonomy_version)
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        from .taxonomy import bump_taxonomy_version
+        transaction.on_commit(bump_taxonomy_version)
+        return result
+    
+    def _move_subtree(self, old_path, new_path):
+        """Rewrite the path of this category and all of its descendants."""
+        new_depth = new_path.count('/') - 1
+        if old_path:
+            depth_delta = new_depth - (old_path.count('/') - 1)
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + depth_delta,
+            )
+        Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        self.path = new_path
+        self.depth = new_depth
+    
+    def get_ancestor_ids(self):
+        """Return ancestor ids from the root down, decoded from the path."""
+        step = self.PATH_STEP + 1
+        return [int(self.path[i:i + self.PATH_STEP], 16)
+                for i in range(0, len(self.path) - step, step)]
+    
+    def get_descendants(self, include_self=True):
+        """Return the subtree rooted at this category."""
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
     
     def get_absolute_url(self):
         return reverse('category_detail', kwargs={'slug': self.slug})
@@ -52,10 +125,24 @@ class Tag(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            self.slug = allocate_slug(Tag, self.name)
         super().save(*args, **kwargs)
 
 
+class SlugCounter(models.Model):
+    """Per-base counter used to hand out unique slug suffixes atomically."""
+    
+    scope = models.CharField(max_length=100)
+    base = models.CharField(max_length=200)
+    value = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['scope', 'base']
+    
+    def __str__(self):
+        return f"{self.scope}:{self.base} = {self.value}"
+
+
 class Article(models.Model):
     """Wiki article model."""
     
@@ -105,7 +192,7 @@ class Article(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            self.slug = allocate_slug(Article, self.title)
         
         # Set published_at when status changes to published
         if self.status == 'published' and not self.published_at:
@@ -1,9 +1,14 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
 from .models import (
     Category, Tag, Article, ArticleVersion, ArticleLike, 
     ArticleComment, ArticleBookmark, CommentLike
 )
+from posts.wordfilter import check_text
+from .tagging import set_tags
+from .taxonomy import get_breadcrumbs
 
 User = get_user_model()
 
@@ -15,9 +20,16 @@ class CategorySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'description', 'color', 
+        fields = ['id', 'name', 'slug', 'description', 'parent', 'depth',
                  'article_count', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'slug', 'depth', 'created_at', 'updated_at']
+    
+    def validate_parent(self, value):
+        """Refuse to move a category under itself or one of its subcategories."""
+        if self.instance is not None and value is not None:
+            if value.pk == self.instance.pk or Category.path_segment(self.instance.pk) in value.path:
+                raise serializers.ValidationError('A category cannot be moved under its own subcategory.')
+        return value
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -27,8 +39,8 @@ class TagSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Tag
-        fields = ['id', 'name', 'slug', 'article_count', 'created_at']
-        read_only_fields = ['id', 'slug', 'created_at']
+        fields = ['id', 'name', 'slug', 'article_count']
+        read_only_fields = ['id', 'slug']
 
 
 class UserSimpleSerializer(serializers.ModelSerializer):
@@ -67,18 +79,25 @@ class ArticleDetailSerializer(serializers.ModelSerializer):
     author = UserSimpleSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    breadcrumbs = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     
     class Meta:
         model = Article
         fields = [
-            'id', 'title', 'slug', 'content', 'author', 'category', 'tags',
+            'id', 'title', 'slug', 'content', 'author', 'category', 'breadcrumbs', 'tags',
             'status', 'featured', 'views_count', 
             'likes_count', 'comments_count', 'is_liked', 
             'created_at', 'updated_at', 'published_at'
         ]
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at', 'published_at']
     
+    def get_breadcrumbs(self, obj):
+        """Category chain from the root, resolved from the cached taxonomy."""
+        if obj.category_id is None:
+            return []
+        return get_breadcrumbs(obj.category_id)
+    
     def get_is_liked(self, obj):
         """Check if current user has liked this article."""
         request = self.context.get('request')
@@ -93,13 +112,23 @@ class ArticleCreateSerializer(serializers.ModelSerializer):
     tags = serializers.ListField(
         child=serializers.CharField(max_length=50),
         required=False,
-        default=list
+        default=list,
+        write_only=True
     )
     
     class Meta:
         model = Article
         fields = ['title', 'content', 'category', 'tags', 'status']
     
+    def validate(self, attrs):
+        """Reject blocked words; articles with review words stay drafts."""
+        words = check_text(attrs.get('title', ''), attrs.get('content', ''))
+        if words.blocked:
+            raise serializers.ValidationError("Article contains words that are not allowed.")
+        if words.review:
+            attrs['status'] = 'draft'
+        return attrs
+    
     def create(self, validated_data):
         """Set the author and handle tags."""
         tags_data = validated_data.pop('tags', [])
@@ -111,9 +140,8 @@ class ArticleCreateSerializer(serializers.ModelSerializer):
         article = super().create(validated_data)
         
         # Handle tags
-        for tag_name in tags_data:
-            tag, created = Tag.objects.get_or_create(name=tag_name)
-            article.tags.add(tag)
+        if tags_data:
+            set_tags(article, tags_data, Tag)
         
         return article
 
@@ -123,34 +151,50 @@ class ArticleUpdateSerializer(serializers.ModelSerializer):
     
     tags = serializers.ListField(
         child=serializers.CharField(max_length=50),
-        required=False
+        required=False,
+        write_only=True
     )
     
     class Meta:
         model = Article
         fields = ['title', 'content', 'category', 'tags', 'status']
     
+    def validate(self, attrs):
+        """Reject blocked words; edits with review words take the article back to draft."""
+        words = check_text(attrs.get('title', ''), attrs.get('content', ''))
+        if words.blocked:
+            raise serializers.ValidationError("Article contains words that are not allowed.")
+        if words.review:
+            attrs['status'] = 'draft'
+        return attrs
+    
     def update(self, instance, validated_data):
         """Handle tags and create version history."""
         tags_data = validated_data.pop('tags', None)
         
-        # Create version before updating
-        ArticleVersion.objects.create(
-            article=instance,
-            title=instance.title,
-            content=instance.content,
-            editor=self.context['request'].user,
-            version_notes=f"Updated via API"
-        )
-        
-        article = super().update(instance, validated_data)
-        
-        # Update tags if provided
-        if tags_data is not None:
-            article.tags.clear()
-            for tag_name in tags_data:
-                tag, created = Tag.objects.get_or_create(name=tag_name)
-                article.tags.add(tag)
+        with transaction.atomic():
+            # Concurrent edits of the article wait here for each other, so
+            # each takes the next version number and snapshots the text the
+            # previous one saved
+            current = Article.objects.select_for_update().only('title', 'content', 'summary').get(pk=instance.pk)
+            last_version = instance.versions.aggregate(
+                last=Max('version_number')
+            )['last'] or 0
+            ArticleVersion.objects.create(
+                article=instance,
+                title=current.title,
+                content=current.content,
+                summary=current.summary,
+                version_number=last_version + 1,
+                author=self.context['request'].user,
+                change_description="Updated via API"
+            )
+            
+            article = super().update(instance, validated_data)
+            
+            # Update tags if provided, touching only the ones that changed
+            if tags_data is not None:
+                set_tags(article, tags_data, Tag)
         
         return article
 
@@ -158,13 +202,13 @@ class ArticleUpdateSerializer(serializers.ModelSerializer):
 class ArticleVersionSerializer(serializers.ModelSerializer):
     """Serializer for article versions."""
     
-    editor = UserSimpleSerializer(read_only=True)
+    author = UserSimpleSerializer(read_only=True)
     
     class Meta:
         model = ArticleVersion
         fields = [
-            'id', 'article', 'title', 'content', 'editor', 
-            'version_notes', 'created_at'
+            'id', 'article', 'title', 'content', 'version_number', 'author', 
+            'change_description', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
 
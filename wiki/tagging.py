@@ -0,0 +1,74 @@
+"""
+Bulk tag resolution shared by wiki articles and community posts.
+
+Tags are resolved with one ``name__in`` query, missing ones are created with a
+single ``bulk_create`` and only the difference between the current and the
+requested tag set is written to the M2M table.
+"""
+
+import hashlib
+
+from .slugs import slug_base
+
+
+def _tag_slug(tag_model, name, suffix=False):
+    """Build a slug for a tag name that fits the model's slug column."""
+    max_length = tag_model._meta.get_field('slug').max_length
+    digest = hashlib.md5(name.encode('utf-8')).hexdigest()[:8]
+    base = slug_base(name, max_length)
+    if not base:
+        return digest
+    if suffix:
+        return f"{base[:max_length - len(digest) - 1]}-{digest}"
+    return base[:max_length]
+
+
+def clean_tag_names(names):
+    """Strip, drop empty and de-duplicate tag names, keeping their order."""
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+
+def resolve_tags(tag_model, names):
+    """Return tag instances for the given names, creating missing ones in bulk."""
+    names = clean_tag_names(names)
+    if not names:
+        return []
+
+    tags = {tag.name: tag for tag in tag_model.objects.filter(name__in=names)}
+    missing = [name for name in names if name not in tags]
+
+    if missing:
+        tag_model.objects.bulk_create(
+            [tag_model(name=name, slug=_tag_slug(tag_model, name)) for name in missing],
+            ignore_conflicts=True
+        )
+        tags.update({tag.name: tag for tag in tag_model.objects.filter(name__in=missing)})
+
+        # Rows skipped because a different name produced the same slug
+        for name in missing:
+            if name not in tags:
+                tags[name], created = tag_model.objects.get_or_create(
+                    name=name,
+                    defaults={'slug': _tag_slug(tag_model, name, suffix=True)}
+                )
+
+    return [tags[name] for name in names]
+
+
+def set_tags(instance, names, tag_model, field='tags'):
+    """
+    Make instance.<field> contain exactly the tags named in names.
+
+    Only the set difference is applied, so unchanged tags cause no M2M writes.
+    """
+    manager = getattr(instance, field)
+    wanted = {tag.pk for tag in resolve_tags(tag_model, names)}
+    current = set(manager.values_list('pk', flat=True))
+
+    to_remove = current - wanted
+    to_add = wanted - current
+
+    if to_remove:
+        manager.remove(*to_remove)
+    if to_add:
+        manager.add(*to_add)
@@ -0,0 +1,120 @@
+"""
+Cached view of the category tree.
+
+The whole taxonomy is loaded with a single query and cached under a version
+number that is bumped whenever a category is saved, moved or deleted, so the
+tree endpoint, slug lookups and breadcrumbs never touch the database between
+taxonomy changes.
+"""
+
+import threading
+
+from django.core.cache import cache
+
+from .models import Category
+
+TAXONOMY_VERSION_KEY = 'wiki:taxonomy:version'
+TAXONOMY_INDEX_KEY = 'wiki:taxonomy:index:%s'
+TAXONOMY_TIMEOUT = 60 * 60 * 24
+
+_local = threading.local()
+
+
+def get_taxonomy_version():
+    """Return the current taxonomy version, initialising it if needed."""
+    version = cache.get(TAXONOMY_VERSION_KEY)
+    if version is None:
+        cache.add(TAXONOMY_VERSION_KEY, 1, None)
+        version = cache.get(TAXONOMY_VERSION_KEY, 1)
+    return version
+
+
+def bump_taxonomy_version():
+    """Invalidate every cached representation of the category tree."""
+    try:
+        cache.incr(TAXONOMY_VERSION_KEY)
+    except ValueError:
+        cache.add(TAXONOMY_VERSION_KEY, 1, None)
+
+
+def _build_index():
+    """Load all categories and assemble the lookup maps and nested tree."""
+    nodes = {}
+    for row in Category.objects.order_by('path').values(
+        'id', 'name', 'slug', 'description', 'parent_id', 'path', 'depth'
+    ):
+        row['children'] = []
+        nodes[row['id']] = row
+
+    roots = []
+    # Ordering by path guarantees parents are seen before their children
+    for node in nodes.values():
+        parent = nodes.get(node['parent_id'])
+        if parent is not None:
+            parent['children'].append(node)
+        else:
+            roots.append(node)
+
+    for node in nodes.values():
+        node['children'].sort(key=lambda child: child['name'])
+    roots.sort(key=lambda node: node['name'])
+
+    return {
+        'nodes': nodes,
+        'slugs': {node['slug']: node['id'] for node in nodes.values()},
+        'tree': roots,
+    }
+
+
+def get_category_index():
+    """Return the cached taxonomy index for the current version."""
+    version = get_taxonomy_version()
+
+    # Per-thread memo avoids unpickling the whole tree on every request
+    if getattr(_local, 'version', None) == version:
+        return _local.index
+
+    key = TAXONOMY_INDEX_KEY % version
+    index = cache.get(key)
+    if index is None:
+        index = _build_index()
+        cache.set(key, index, TAXONOMY_TIMEOUT)
+
+    _local.version = version
+    _local.index = index
+    return index
+
+
+def get_category_tree():
+    """Return the full nested category tree."""
+    return get_category_index()['tree']
+
+
+def get_category_path(slug):
+    """Return the materialized path for a category slug, or None."""
+    index = get_category_index()
+    category_id = index['slugs'].get(slug)
+    if category_id is None:
+        return None
+    return index['nodes'][category_id]['path']
+
+
+def get_breadcrumbs(category_id):
+    """Return the chain of categories from the root down to category_id."""
+    nodes = get_category_index()['nodes']
+    node = nodes.get(category_id)
+    if node is None:
+        return []
+
+    step = Category.PATH_STEP + 1
+    path = node['path']
+    breadcrumbs = []
+    for i in range(0, len(path), step):
+        ancestor = nodes.get(int(path[i:i + Category.PATH_STEP], 16))
+        if ancestor is not None:
+            breadcrumbs.append({
+                'id': ancestor['id'],
+                'name': ancestor['name'],
+                'slug': ancestor['slug'],
+            })
+    return breadcrumbs
@@ -0,0 +1,69 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from baidu_wiki.testing import (
+    TEST_CACHES, QueryBudgetTestCase, assert_query_budget, create_users, rows_over_budget,
+)
+
+from .models import Article, ArticleVersion, Category, Tag
+from .views import ArticleViewSet
+
+
+class ArticleQueryBudgetTests(QueryBudgetTestCase):
+    """Article endpoints stay within their query_budgets however many rows they list."""
+
+    rows = rows_over_budget(ArticleViewSet)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users('editor', 3)
+        parent = Category.objects.create(name='Science', slug='science')
+        category = Category.objects.create(name='Physics', slug='physics', parent=parent)
+        tags = [Tag.objects.create(name=f'tag{i}', slug=f'tag{i}') for i in range(2)]
+        cls.articles = []
+        for i in range(cls.rows):
+            article = Article.objects.create(
+                title=f'Article {i}', slug=f'article-{i}', content=f'Body of article number {i}.',
+                author=cls.users[i % 3], category=category, status='published',
+            )
+            article.tags.set(tags)
+            cls.articles.append(article)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[1])
+
+    def test_article_list(self):
+        response = assert_query_budget(self.client, 'get', '/api/wiki/articles/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_article_list_by_category(self):
+        response = assert_query_budget(self.client, 'get', '/api/wiki/articles/?category=science')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], len(self.articles))
+
+    def test_article_retrieve(self):
+        response = assert_query_budget(self.client, 'get', f'/api/wiki/articles/{self.articles[0].slug}/')
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ArticleEditTests(TestCase):
+
+    def setUp(self):
+        self.editor, = create_users('reviser', 1)
+        self.article = Article.objects.create(
+            title='Bridge', slug='bridge', content='First text.', author=self.editor, status='published',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.editor)
+
+    def test_each_edit_saves_the_previous_text_as_the_next_version(self):
+        for content in ['Second text.', 'Third text.']:
+            response = self.client.patch(f'/api/wiki/articles/{self.article.slug}/', {'content': content})
+            self.assertEqual(response.status_code, 200)
+        versions = ArticleVersion.objects.filter(article=self.article).order_by('version_number')
+        self.assertEqual(
+            [(v.version_number, v.content) for v in versions], [(1, 'First text.'), (2, 'Second text.')],
+        )
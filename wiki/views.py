@@ -2,14 +2,20 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
-from django.db.models import Count, Q, Avg
+from django.db.models import Count, F, Q, Avg, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from baidu_wiki.throttling import get_client_ip
+from users import reputation
+from users.leaderboards import article_scope
 from .models import (
     Category, Tag, Article, ArticleVersion, ArticleLike, 
     ArticleComment, ArticleBookmark, CommentLike
 )
 from .serializers import *
+from .taxonomy import get_category_tree, get_category_path, get_breadcrumbs
 
 User = get_user_model()
 
@@ -35,6 +41,19 @@ class CategoryViewSet(viewsets.ModelViewSet):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAdminUser()]
         return [permissions.AllowAny()]
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Get the full category tree (cached per taxonomy version)."""
+        return Response(get_category_tree())
+    
+    @action(detail=True, methods=['get'])
+    def breadcrumbs(self, request, pk=None):
+        """Get the chain of categories from the root down to this one."""
+        crumbs = get_breadcrumbs(int(pk)) if pk.isdigit() else []
+        if not crumbs:
+            return Response({'error': 'Category not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(crumbs)
 
 
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
@@ -63,6 +82,8 @@ class ArticleViewSet(viewsets.ModelViewSet):
     queryset = Article.objects.select_related('author', 'category').prefetch_related('tags')
     pagination_class = StandardResultsSetPagination
     lookup_field = 'slug'
+    query_budgets = {'list': 5, 'retrieve': 6}
+    throttle_scopes = {'like': 'like'}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -78,10 +99,13 @@ class ArticleViewSet(viewsets.ModelViewSet):
         """Filter queryset based on request parameters."""
         queryset = self.queryset.filter(status='published')
         
-        # Filter by category
+        # Filter by category, including all of its subcategories
         category_slug = self.request.query_params.get('category')
         if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+            category_path = get_category_path(category_slug)
+            if category_path is None:
+                return queryset.none()
+            queryset = queryset.filter(category__path__startswith=category_path)
         
         # Filter by tag
         tag_slug = self.request.query_params.get('tag')
@@ -101,7 +125,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
             )
         
         # Order by featured first, then by creation date
-        queryset = queryset.order_by('-is_featured', '-created_at')
+        queryset = queryset.order_by('-featured', '-created_at')
         
         return queryset.distinct()
     
@@ -124,39 +148,67 @@ class ArticleViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Set author and handle published_at."""
-        article = serializer.save(author=self.request.user)
+        with transaction.atomic():
+            article = serializer.save(author=self.request.user)
+            reputation.record(article.author_id, 'article', scope=article_scope(article.category_id))
         if article.status == 'published' and not article.published_at:
             article.published_at = timezone.now()
             article.save()
     
+    def perform_update(self, serializer):
+        """Saving an edit adds a version, credited to the editor."""
+        with transaction.atomic():
+            article = serializer.save()
+            reputation.record(self.request.user.pk, 'edit', scope=article_scope(article.category_id))
+    
+    def perform_destroy(self, instance):
+        """Take back the reputation of the article, its likes and its edits."""
+        with transaction.atomic():
+            scope = article_scope(instance.category_id)
+            versions = instance.versions.all()
+            reputation.take_back(
+                'edit', reputation.authors_of(versions, likes=False), scope, reputation.recent_of(versions),
+            )
+            # The likes themselves, not likes_count, which may have drifted
+            likes = instance.likes.count()
+            reputation.take_back(
+                'article', {instance.author_id: (1, likes)}, scope, reputation.recent_of(
+                    Article.objects.filter(pk=instance.pk), ArticleLike.objects.filter(article=instance),
+                    'article__author_id',
+                ),
+            )
+            instance.delete()
+    
     def get_client_ip(self, request):
         """Get client IP address."""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
+        return get_client_ip(request)
     
     @action(detail=True, methods=['post'])
     def like(self, request, slug=None):
         """Like or unlike an article."""
         article = self.get_object()
-        like, created = ArticleLike.objects.get_or_create(
-            article=article, 
-            user=request.user
-        )
-        
-        if not created:
-            # Unlike if already liked
-            like.delete()
-            article.likes_count = max(0, article.likes_count - 1)
-            message = 'Article unliked'
-        else:
-            article.likes_count += 1
-            message = 'Article liked'
-        
-        article.save(update_fields=['likes_count'])
+        with transaction.atomic():
+            like, created = ArticleLike.objects.get_or_create(
+                article=article, 
+                user=request.user
+            )
+            
+            if not created:
+                # Unlike if already liked
+                like.delete()
+                change = Greatest(F('likes_count') - 1, Value(0))
+                message = 'Article unliked'
+            else:
+                change = F('likes_count') + 1
+                message = 'Article liked'
+            
+            # Counted in SQL so concurrent likes don't overwrite each other
+            Article.objects.filter(pk=article.pk).update(likes_count=change)
+            article.refresh_from_db(fields=['likes_count'])
+            reputation.record_like(
+                article.author_id, 'article', 1 if created else -1, article_scope(article.category_id),
+                earned_at=like.created_at,
+            )
         return Response({'message': message, 'likes_count': article.likes_count})
     
     @action(detail=True, methods=['post'])
@@ -180,7 +232,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
     def featured(self, request):
         """Get featured articles."""
         featured_articles = self.get_queryset().filter(
-            is_featured=True, 
+            featured=True, 
             status='published'
         )[:10]
         serializer = self.get_serializer(featured_articles, many=True)
@@ -197,7 +249,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
 class ArticleVersionViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for article versions (read-only)."""
     
-    queryset = ArticleVersion.objects.select_related('article', 'editor')
+    queryset = ArticleVersion.objects.select_related('article', 'author')
     serializer_class = ArticleVersionSerializer
     pagination_class = StandardResultsSetPagination
     
@@ -218,6 +270,7 @@ class ArticleCommentViewSet(viewsets.ModelViewSet):
     queryset = ArticleComment.objects.select_related('author', 'article', 'parent')
     serializer_class = ArticleCommentSerializer
     pagination_class = StandardResultsSetPagination
+    throttle_scopes = {'create': 'comment'}
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""